@@ -0,0 +1,90 @@
+# build_skiplist.py — AFAP
+# Auteur : Vincent Chapeau — Teel Technologies Canada (vincent.chapeau@teeltechcanada.com)
+#
+# Construit une skiplist ÉTENDUE (md5,taille,md5_tete) à partir d'un ou plusieurs
+# dossiers de RÉFÉRENCE (fichiers d'origine connus : firmware, APK d'usine…).
+#
+# Usage :
+#   python build_skiplist.py REF_DIR [REF_DIR ...] -o hash_skiplist.txt
+#   python build_skiplist.py REF_DIR --from hash_skiplist.txt -o hash_skiplist.txt
+#
+# --from : ne garde que les MD5 de la liste existante, complétés par la taille
+# et la tête trouvées dans les dossiers de référence. Les MD5 introuvables sont
+# conservés en ancien format (md5 seul), sauf avec --drop-unmatched : une seule
+# ligne sans taille désactive le filtre par taille de should_skip.
+
+import argparse
+import hashlib
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from core_scanner import HEAD_BYTES, long_path_aware
+from fs_provider import scan_tree
+
+
+def _hash_file(item):
+    path, size = item
+    h, head = hashlib.md5(), None
+    try:
+        with open(long_path_aware(path), 'rb') as f:
+            first = f.read(HEAD_BYTES)
+            head = hashlib.md5(first).hexdigest()
+            h.update(first)
+            for chunk in iter(lambda: f.read(1048576), b''):
+                h.update(chunk)
+    except OSError:
+        return None
+    return h.hexdigest(), size, head
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="AFAP — construction d'une skiplist étendue (md5,taille,tête)")
+    p.add_argument('refs', nargs='+', help="Dossier(s) de référence")
+    p.add_argument('--out', '-o', required=True, help="Skiplist à écrire")
+    p.add_argument('--from', dest='from_list', help="Skiplist existante (md5) à compléter")
+    p.add_argument('--drop-unmatched', action='store_true',
+                   help="Avec --from : supprime les MD5 absents des références")
+    p.add_argument('--threads', type=int, default=8, help="Threads de hachage (défaut: 8)")
+    args = p.parse_args(argv)
+
+    files = []
+    for ref in args.refs:
+        if not os.path.isdir(ref):
+            print(f"ERREUR : dossier introuvable : {ref}", file=sys.stderr)
+            return 2
+        files.extend((full, size) for full, _, size, _, _, _ in scan_tree(long_path_aware(ref)))
+
+    entries = {}
+    with ThreadPoolExecutor(max_workers=max(1, args.threads)) as ex:
+        for res in ex.map(_hash_file, files):
+            if res:
+                entries.setdefault(res[0], res)
+
+    wanted = None
+    if args.from_list:
+        with open(args.from_list, 'r', encoding='utf-8') as f:
+            wanted = [l.split(',')[0].strip().lower() for l in f
+                      if l.strip() and not l.startswith('#')]
+
+    lines, unmatched = [], 0
+    for md5 in (wanted if wanted is not None else sorted(entries)):
+        if md5 in entries:
+            _, size, head = entries[md5]
+            lines.append(f"{md5},{size},{head if size > HEAD_BYTES else ''}")
+        else:
+            unmatched += 1
+            if not args.drop_unmatched:
+                lines.append(md5)
+
+    with open(args.out, 'w', encoding='utf-8', newline='\n') as f:
+        f.write('\n'.join(lines) + '\n')
+    print(f"{len(lines)} entrées écrites dans {args.out} ({len(files)} fichiers hachés"
+          + (f", {unmatched} MD5 sans référence" if wanted is not None else '') + ")")
+    if unmatched and not args.drop_unmatched:
+        print("ATTENTION : des entrées sans taille désactivent le filtre par taille.", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
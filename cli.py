@@ -4,12 +4,17 @@
 # Usage :
 #   python cli.py --source <path> --out <dir> [--lang fr|en] [--skiplist <file>]
 #                 [--modules vins,mac,...] [--no-vins] [--quiet]
+#                 [--solid-7z] [--spool-dir <dir>] [--manifest] [--manifest-dir <dir>]
+#                 [--cache-mb <Mo>] [--prefetch-depth <N>] [--prefetch-mb <Mo>]
+#                 [--no-compressed-logs] [--sqlite-all] [--dcim-dedup] [--physical-order]
 #
 # Exemples :
 #   python cli.py --source ./KM100_B               --out ./out
 #   python cli.py --source ./extraction.7z         --out ./out --lang en
 #   python cli.py --source ./KM100_B --no-vins                # skip extract_vins
 #   python cli.py --source ./KM100_B --modules cloud,vci,wal  # uniquement ces 3
+#   python cli.py --source ./extraction.7z --out ./out --solid-7z  # 7z solide (LZMA2)
+#   python cli.py --source ./userdata.img --out ./out          # image ext4, sans montage
 
 import argparse
 import datetime
@@ -36,6 +41,7 @@ from extract_external_storage import extract_external_storage
 from extract_secrets import extract_secrets
 from extract_event_log import extract_event_log
 from extract_wal_indicators import extract_wal_indicators
+from extract_sqlite_carved import extract_sqlite_carved
 from create_forensic_report import create_forensic_report
 # --- v2.2 : identité compte, WiFi/tethering, QR KYC, table maître, décalage horloge ---
 from extract_account import extract_account
@@ -48,6 +54,7 @@ from parse_uart_bootlog import parse_uart_bootlog, detect_tablet_time
 from finalize_export import finalize_export
 from scan_text import scan_text_single_pass
 from clock_offset import ClockOffset
+import core_scanner
 
 try:
     from i18n import set_lang
@@ -73,6 +80,7 @@ MODULES = {
     'secrets':  ('Secrets',             extract_secrets, {}),
     'events':   ('EventLog',            extract_event_log, {}),
     'wal':      ('WAL indicators',      extract_wal_indicators, {}),
+    'carve':    ('SQLite carving',      extract_sqlite_carved, {}),
     'account':  ('Account identity',    extract_account, {}),
     'bootlog':  ('UART boot log',       parse_uart_bootlog, {}),
     'wifi':     ('WiFi / tethering',    extract_wifi, {}),
@@ -92,6 +100,8 @@ MODULES = {
 # compte + WiFi + Bluetooth (remplace account/wifi/bt dans le pipeline par
 # défaut ; ces trois modules restent disponibles séparément via --modules).
 # Placé APRÈS 'mac' car le volet WiFi lit mac_found.csv.
+# 'carve' (enregistrements SQLite supprimés) n'est PAS dans l'ordre par défaut :
+# à demander explicitement (--modules ...,carve), avant 'report'.
 DEFAULT_ORDER = ['vins', 'logs', 'mac', 'user', 'pwd', 'vehref', 'dcim', 'sqlite',
                  'cloud', 'usage', 'vci', 'es', 'storage', 'secrets', 'events',
                  'wal', 'bootlog', 'scan1', 'kyc', 'timeline', 'report', 'master', 'htimeline', 'finalize']
@@ -102,7 +112,8 @@ def main(argv=None):
         description="AFAP v2.3.2 — Autel Forensics Analyzer (CLI mode)",
         epilog="Exemple : python cli.py --source ./KM100_B --out ./out --lang en")
     p.add_argument('--source', '-s', required=True,
-                   help="Source : dossier d'extraction OU archive .zip/.7z")
+                   help="Source : dossier d'extraction OU archive .zip/.7z/.tar(.gz/.bz2/.xz) "
+                        "OU image de partition/disque .img/.dd/.raw (ext4, FAT, exFAT)")
     p.add_argument('--out', '-o', required=True,
                    help="Dossier d'export (créé si absent)")
     p.add_argument('--lang', '-l', choices=['fr', 'en'], default='fr',
@@ -127,11 +138,55 @@ def main(argv=None):
     p.add_argument('--clock-offset-seconds', type=int,
                    help="Décalage en secondes fourni directement "
                         "(tablette - réel). Alternative à --tablet-time/--real-time.")
+    # --- Performance VFS ---
+    p.add_argument('--solid-7z', action='store_true',
+                   help="Source .7z solide : décompresse chaque bloc UNE fois (pool de "
+                        "processus) vers un spool local partagé par tous les modules.")
+    p.add_argument('--spool-dir',
+                   help="Dossier des spools temporaires (défaut : dossier temp système). "
+                        "Prévoir la taille décompressée de l'archive.")
+    p.add_argument('--walk-threads', type=int, default=16,
+                   help="Threads du parcours de dossier (défaut 16 ; augmenter sur NAS).")
+    p.add_argument('--manifest', action='store_true',
+                   help="Manifeste SQLite persistant de la source (listing + MD5/SHA-256), "
+                        "réutilisé aux runs suivants sur le même scellé.")
+    p.add_argument('--manifest-dir',
+                   help="Dossier des manifestes (implique --manifest ; défaut : ~/.cache/afap/manifests).")
+    p.add_argument('--cache-mb', type=int, default=800,
+                   help="Budget mémoire du cache texte en Mo (défaut 800) ; au-delà, les "
+                        "textes sont compressés puis déversés sur disque (sous --spool-dir).")
+    p.add_argument('--prefetch-depth', type=int, default=16,
+                   help="Lecture anticipée : fichiers texte lus d'avance vers le cache pendant "
+                        "le traitement du fichier courant (défaut 16 ; 0 = désactivée).")
+    p.add_argument('--prefetch-mb', type=int, default=256,
+                   help="Plafond des octets lus d'avance par le prefetch, en Mo (défaut 256).")
+    p.add_argument('--no-compressed-logs', action='store_true',
+                   help="Ne PAS lire les journaux compressés (*.log.gz, logcat.txt.1.gz, .bz2, .xz) "
+                        "comme des textes (par défaut : décompressés en flux, sans copie sur disque).")
+    p.add_argument('--sqlite-all', action='store_true',
+                   help="Module 'sqlite' : exporte TOUTES les tables de TOUTES les bases "
+                        "(sqlite_export/ + sqlite_catalog.csv), bases réparties sur un pool de processus.")
+    p.add_argument('--dcim-dedup', action='store_true',
+                   help="Module 'dcim' : un média en double (même SHA-256) n'est stocké qu'une "
+                        "fois, les autres chemins sont des liens physiques vers lui.")
+    p.add_argument('--physical-order', action='store_true',
+                   help="Lit les fichiers dans l'ordre physique du support (premier extent via "
+                        "FIEMAP, sinon inode ; offset dans une image disque) : scellé sur disque "
+                        "dur ou USB. Les CSV restent dans l'ordre du listing.")
     p.add_argument('--quiet', '-q', action='store_true', help="Sortie minimale")
     p.add_argument('--version', action='version', version='AFAP 2.3.2')
     args = p.parse_args(argv)
 
     set_lang(args.lang)
+    core_scanner.configure(solid_7z=args.solid_7z, spool_dir=args.spool_dir,
+                           walk_threads=args.walk_threads,
+                           manifest=bool(args.manifest or args.manifest_dir),
+                           manifest_dir=args.manifest_dir,
+                           cache_mb=max(16, args.cache_mb),
+                           prefetch_depth=max(0, args.prefetch_depth),
+                           prefetch_mb=max(1, args.prefetch_mb),
+                           compressed_logs=not args.no_compressed_logs,
+                           physical_order=args.physical_order)
 
     if not os.path.exists(args.source):
         print(f"ERREUR : source introuvable : {args.source}", file=sys.stderr)
@@ -140,10 +195,7 @@ def main(argv=None):
     # Skiplist
     script_dir = os.path.dirname(os.path.abspath(__file__))
     skiplist_file = args.skiplist or os.path.join(script_dir, 'hash_skiplist.txt')
-    skip_md5 = set()
-    if os.path.isfile(skiplist_file):
-        with open(skiplist_file, 'r', encoding='utf-8') as f:
-            skip_md5 = {l.strip().lower() for l in f if l.strip()}
+    skip_md5 = core_scanner.load_skiplist(skiplist_file)
 
     # Sélection des modules
     if args.modules:
@@ -158,6 +210,12 @@ def main(argv=None):
         skip = {m.strip() for m in args.skip.split(',')}
         order = [m for m in order if m not in skip]
 
+    # Besoins déclarés (WANTS) des modules retenus : une source tar, lue une
+    # seule fois, n'en matérialise que les membres voulus.
+    core_scanner.configure(source_wants=core_scanner.module_wants(
+        [get_tablet_info] + [MODULES[k][1] for k in order]),
+        binary_scan='vins' in order)
+
     # Identification + dossier export
     info = get_tablet_info(args.source)
     serial = info.get('serial', 'inconnu')
@@ -188,6 +246,19 @@ def main(argv=None):
         print(f"             Modules: {len(order)} -> {','.join(order)}")
         print()
 
+    try:
+        core_scanner.prime_skip_hashes(args.source, skip_md5)
+        _run_modules(args, order, export_dir, skip_md5, clock, serial, scelle)
+    finally:
+        core_scanner.end_run()
+
+    if not args.quiet:
+        print(f"\nTermine. Rapport : {os.path.join(export_dir, 'rapport_forensique.md')}")
+    print(export_dir)
+    return 0
+
+
+def _run_modules(args, order, export_dir, skip_md5, clock, serial, scelle):
     total = len(order)
     for i, key in enumerate(order, 1):
         display, fn, extra = MODULES[key]
@@ -196,7 +267,8 @@ def main(argv=None):
         try:
             kwargs = dict(src_dir=args.source, export_dir=export_dir, skip_md5=skip_md5,
                           clock=clock, serial=serial, scelle=scelle,
-                          bootlog=args.bootlog, real_time=args.real_time)
+                          bootlog=args.bootlog, real_time=args.real_time,
+                          sqlite_all=args.sqlite_all, dcim_dedup=args.dcim_dedup)
             kwargs.update(extra)
             r = fn(**kwargs)
             n = len(r) if r else 0
@@ -207,11 +279,6 @@ def main(argv=None):
             if not args.quiet:
                 print(f"ERR: {e}")
 
-    if not args.quiet:
-        print(f"\nTermine. Rapport : {os.path.join(export_dir, 'rapport_forensique.md')}")
-    print(export_dir)
-    return 0
-
 
 if __name__ == '__main__':
     sys.exit(main())
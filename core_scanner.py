@@ -6,18 +6,107 @@ import csv
 import logging
 import sys
 import io
+import mmap
+import bisect
+import fnmatch
+import re
+import shutil
+import tempfile
 import datetime
-from dataclasses import dataclass
+from array import array
+from collections import deque
+from contextlib import contextmanager, ExitStack
+from concurrent.futures import ThreadPoolExecutor
 from typing import Iterator, Optional
-from fs_provider import open_source
+from fs_provider import (open_source, solid_source, release_solid_sources, scan_tree, ARCHIVE_POOL,
+                         NESTED_POOL, NESTED_SEP, COMPRESSED_EXT, compressed_logical_name,
+                         logical_ext, open_decompressed, is_tar_path, tar_source, release_tar_sources,
+                         IMAGE_EXT, release_image_sources, physical_sort_keys,
+                         image_physical_keys)
+from source_manifest import SourceManifest
+from dir_listing import DirListing
+from hash_index import HashIndex, is_hash_index
+from text_cache import TextCache
+from sqlite_store import DB_STORE
+import sqlite_format
 
-def _long_path_aware(path: str) -> str:
+# Options de run (positionnées par cli.py / main.py via configure()).
+#   solid_7z   : lit les .7z bloc solide par bloc solide (spool local partagé)
+#   spool_dir  : dossier parent des spools (défaut : dossier temporaire système)
+#   walk_threads : threads du parcours de dossier (latence USB / NAS)
+#   manifest   : manifeste SQLite persistant (listing + empreintes) réutilisé
+#                d'un run à l'autre ; manifest_dir = son dossier (défaut cache)
+#   hash_threads : threads du pré-calcul MD5 de la skiplist (hashlib libère le GIL)
+#   cache_mb   : budget mémoire du cache texte (Mo) ; cache_compress / cache_spill :
+#                niveau zlib en mémoire / déversement disque (sous spool_dir)
+#   prefetch_depth : lecture anticipée des N fichiers suivants vers le cache
+#                (0 = désactivée) ; prefetch_threads / prefetch_mb : threads de
+#                lecture et plafond des octets lus d'avance (latence USB / NAS)
+#   compressed_logs : journaux .gz/.bz2/.xz exposés décompressés sous leur nom
+#                logique quand leur extension logique est demandée (include_ext)
+#   source_wants : besoins déclarés des modules du run (module_wants) ; une
+#                source tar n'en matérialise que les membres voulus (None = tout)
+#   binary_scan : le run comporte un scan binaire (VIN) qui relit le contenu
+#                brut des fichiers texte (voir tampon partagé, end_binary_scan)
+RUN_OPTIONS = {
+    'solid_7z': False,
+    'spool_dir': None,
+    'walk_threads': 16,
+    'manifest': False,
+    'manifest_dir': None,
+    'hash_threads': 8,
+    'cache_mb': 800,
+    'cache_compress': True,
+    'cache_spill': True,
+    'prefetch_depth': 16,
+    'prefetch_threads': 4,
+    'prefetch_mb': 256,
+    'compressed_logs': True,
+    'source_wants': None,
+    'physical_order': False,
+    'binary_scan': True,
+}
+
+def configure(**options):
+    """Met à jour les options de run (clés inconnues refusées)."""
+    unknown = set(options) - set(RUN_OPTIONS)
+    if unknown:
+        raise ValueError(f"Options de run inconnues : {sorted(unknown)}")
+    RUN_OPTIONS.update(options)
+
+def end_run():
+    """Libère les ressources du run (spools et handles d'archives, listings)
+    et écrit les manifestes. À appeler une fois tous les modules exécutés."""
+    global _TEXT_CACHE, _BINARY_SCAN_DONE
+    _save_manifests()
+    release_solid_sources()
+    release_tar_sources()
+    ARCHIVE_POOL.close_all()
+    release_image_sources()
+    NESTED_POOL.close_all()
+    while _OPEN_INDEXES:
+        _OPEN_INDEXES.pop().close()
+    DB_STORE.close_all()
+    _DIR_LISTING_CACHE.clear()
+    _ARCHIVE_LISTING_CACHE.clear()
+    _HEAD_CACHE.clear()
+    _PATH_INDEX.clear()
+    _PHYSICAL_KEYS.clear()
+    _ARCHIVE_NAME_SETS.clear()
+    if _TEXT_CACHE is not None:
+        _TEXT_CACHE.clear()
+        _TEXT_CACHE = None
+    _BINARY_SCAN_DONE = False
+
+def long_path_aware(path: str) -> str:
     """Préfixe le chemin pour gérer les chemins longs sur Windows."""
     if sys.platform == 'win32':
         abs_path = os.path.abspath(path)
         return f"\\\\?\\{abs_path}"
     return path
 
+_long_path_aware = long_path_aware   # ancien nom (modules existants)
+
 def relpath_safe(path, start=os.curdir):
     """Version sécurisée de os.path.relpath."""
     try:
@@ -45,33 +134,158 @@ def iter_files(src_dir, include_ext=None, exclude_ext=None):
 
 # Cache MD5 partagé entre modules : un fichier n'est haché qu'UNE fois par run,
 # ce qui évite de re-traiter/re-hacher les fichiers du skiplist à chaque module.
+# Avec le manifeste persistant, les empreintes d'un run précédent sont reprises
+# telles quelles si taille + mtime du fichier n'ont pas bougé (un stat, pas de
+# lecture) ; le SHA-256 est alors calculé dans la même lecture que le MD5.
 _MD5_CACHE = {}
+_SHA256_CACHE = {}
+_MANIFEST_HASHES = {}   # chemin -> (size, mtime, md5, sha256) du run précédent
 
 def file_md5(path):
     """Calcule (et met en cache) le hash MD5 d'un fichier."""
     aware_path = _long_path_aware(path)
     if aware_path in _MD5_CACHE:
         return _MD5_CACHE[aware_path]
+    known = _MANIFEST_HASHES.get(path)
+    if known:
+        try:
+            st = os.stat(aware_path)
+            if st.st_size == known[0] and st.st_mtime == known[1]:
+                _MD5_CACHE[aware_path] = known[2]
+                if known[3]:
+                    _SHA256_CACHE[aware_path] = known[3]
+                return known[2]
+        except OSError:
+            pass
     if not os.path.isfile(aware_path):
         _MD5_CACHE[aware_path] = None
         return None
     h = hashlib.md5()
+    h256 = hashlib.sha256() if RUN_OPTIONS['manifest'] else None
     try:
         with open(aware_path, 'rb') as f:
-            for chunk in iter(lambda: f.read(8192), b''):
+            for chunk in iter(lambda: f.read(1048576), b''):
                 h.update(chunk)
+                if h256: h256.update(chunk)
         val = h.hexdigest().lower()
+        if h256: _SHA256_CACHE[aware_path] = h256.hexdigest()
     except (IOError, OSError):
         val = None
     _MD5_CACHE[aware_path] = val
     return val
 
-def should_skip(path, skip_md5_set):
+# --- Skiplist étendue -------------------------------------------------------
+# Format texte, une entrée par ligne :  md5[,taille[,md5_tete]]
+#   md5_tete = MD5 des HEAD_BYTES premiers octets (fichiers plus grands).
+# Une ligne "md5" seule (ancien format) reste acceptée, mais désactive le filtre
+# par taille (il faut alors hacher tous les fichiers, comme avant).
+# Étapes de should_skip : taille absente de l'index -> rejet immédiat (un stat) ;
+# tête différente -> rejet (64 Ko lus) ; sinon MD5 complet.
+HEAD_BYTES = 65536
+_HEAD_CACHE = {}
+
+class SkipList(set):
+    """Ensemble de MD5 (compatible avec `md5 in skip`) + index par taille."""
+    def __init__(self, hashes=()):
+        super().__init__(hashes)
+        self.sizes = {}        # taille -> set(md5_tete) (vide si têtes inconnues)
+        self.unsized = False   # au moins une entrée sans taille
+
+    def add_entry(self, md5, size=None, head=None):
+        self.add(md5)
+        if size is None:
+            self.unsized = True
+            return
+        heads = self.sizes.setdefault(size, set())
+        heads.add(head)
+
+    def has_size(self, size):
+        return self.unsized or size in self.sizes
+
+    def may_contain(self, path, size=None):
+        """False si le fichier ne PEUT PAS être dans la liste (taille / tête)."""
+        if self.unsized:
+            return True
+        if size is None:
+            try: size = os.stat(_long_path_aware(path)).st_size
+            except OSError: return False
+        heads = self.sizes.get(size)
+        if heads is None:
+            return False
+        if size <= HEAD_BYTES or None in heads:
+            return True
+        return _head_md5(path) in heads
+
+def _head_md5(path):
+    aware_path = _long_path_aware(path)
+    if aware_path not in _HEAD_CACHE:
+        try:
+            with open(aware_path, 'rb') as f:
+                _HEAD_CACHE[aware_path] = hashlib.md5(f.read(HEAD_BYTES)).hexdigest()
+        except OSError:
+            _HEAD_CACHE[aware_path] = None
+    return _HEAD_CACHE[aware_path]
+
+_OPEN_INDEXES = []   # index mmap chargés pendant le run
+
+def load_skiplist(path):
+    """Charge une skiplist : index binaire mmap (hash_index.py, listes NSRL de
+    plusieurs millions d'entrées) ou texte (ancien format md5 / étendu)."""
+    skip = SkipList()
+    if not path or not os.path.isfile(path):
+        return skip
+    if is_hash_index(path):
+        index = HashIndex(path)
+        _OPEN_INDEXES.append(index)   # fermé par end_run()
+        return index
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = [p.strip().lower() for p in line.split(',')]
+            try:
+                size = int(parts[1]) if len(parts) > 1 and parts[1] else None
+            except ValueError:
+                size = None
+            head = parts[2] if len(parts) > 2 and parts[2] else None
+            skip.add_entry(parts[0], size, head)
+    return skip
+
+def should_skip(path, skip_md5_set, size=None):
     """Vérifie si un fichier doit être ignoré sur base de son MD5 (skiplist)."""
     if not skip_md5_set: return False
+    if hasattr(skip_md5_set, 'may_contain') and not skip_md5_set.may_contain(path, size):
+        return False
     hash_val = file_md5(path)
     return bool(hash_val and hash_val in skip_md5_set)
 
+def prime_skip_hashes(src, skip_md5_set):
+    """Pré-calcule en parallèle (threads) les MD5 des seuls fichiers candidats
+    d'une source DOSSIER ; les appels should_skip suivants lisent le cache.
+    Skiplist sans tailles (md5 seuls, dont le hash_skiplist.txt livré) : aucun
+    filtre ne limite les candidats, rien n'est pré-calculé ; les MD5 restent
+    calculés à la demande, pour les seuls fichiers vérifiés par les modules."""
+    if not skip_md5_set or not os.path.isdir(src):
+        return
+    if getattr(skip_md5_set, 'unsized', False):
+        logging.info("Skiplist sans tailles : pré-calcul des MD5 désactivé (hachage à la demande)")
+        return
+    listing = _dir_listing(src)
+    if hasattr(skip_md5_set, 'has_size'):
+        paths = [listing.path(i) for i, size in enumerate(listing.sizes) if skip_md5_set.has_size(size)]
+    else:
+        paths = [listing.path(i) for i in range(len(listing))]
+
+    def _candidate(path):
+        if should_skip(path, skip_md5_set):
+            return path
+        return None
+
+    with ThreadPoolExecutor(max_workers=max(1, RUN_OPTIONS['hash_threads'])) as ex:
+        skipped = sum(1 for r in ex.map(_candidate, paths) if r)
+    logging.info(f"Skiplist : {len(paths)}/{len(listing)} fichiers candidats, {skipped} ignorés")
+
 def open_csv(export_dir, filename, header):
     """Ouvre un fichier CSV pour l'écriture."""
     path = os.path.join(export_dir, filename)
@@ -82,14 +296,25 @@ def open_csv(export_dir, filename, header):
     return f, writer
 
 # --- ARCHITECTURE VFS ---
-@dataclass
 class Entry:
-    """Classe unifiée pour représenter un fichier, qu'il soit sur le disque ou dans une archive."""
-    rel_path: str
-    mtime: Optional[float]
-    is_os: bool
-    path: Optional[str] = None
-    v_open_bin: Optional[callable] = None
+    """Classe unifiée pour représenter un fichier, qu'il soit sur le disque ou dans une archive.
+    __slots__ : une Entry est créée par fichier retenu et par module, sans dict."""
+    __slots__ = ('rel_path', 'mtime', 'is_os', 'path', 'v_open_bin', 'size', 'src', 'seq')
+
+    def __init__(self, rel_path: str, mtime: Optional[float], is_os: bool,
+                 path: Optional[str] = None, v_open_bin: Optional[callable] = None,
+                 size: Optional[int] = None, src: Optional[str] = None, seq: Optional[int] = None):
+        self.rel_path = rel_path
+        self.mtime = mtime
+        self.is_os = is_os
+        self.path = path
+        self.v_open_bin = v_open_bin
+        self.size = size
+        self.src = src         # archive source d'un membre (compagnons -wal/-shm)
+        self.seq = seq         # position dans le listing (ordre logique, voir logical_order)
+
+    def __repr__(self):
+        return f"Entry(rel_path={self.rel_path!r}, is_os={self.is_os!r}, size={self.size!r})"
 
     def open_binary(self):
         if self.is_os:
@@ -101,74 +326,730 @@ class Entry:
             return open(_long_path_aware(self.path), 'r', encoding=encoding, errors=errors)
         return io.TextIOWrapper(self.v_open_bin(), encoding=encoding, errors=errors)
 
-# Cache du LISTING d'un dossier (chemin, rel, mtime) : l'arborescence n'est
-# parcourue (os.walk + stat) qu'UNE fois par run, quel que soit le nombre de
-# modules. Transparent : iter_entries filtre ensuite par extension en mémoire.
-# (Uniquement pour les sources DOSSIER ; les archives gardent le comportement
-# d'origine pour ne pas conserver de handles ouverts.)
+# Cache du LISTING d'un dossier (chemin, rel, mtime, size, inode, device) :
+# l'arborescence n'est parcourue qu'UNE fois par run, quel que soit le nombre
+# de modules, par le walker parallèle os.scandir (fs_provider.scan_tree) qui
+# relève toutes les métadonnées en une passe. Tenu en colonnes (DirListing :
+# bloc UTF-8 des chemins, arrays, extensions internées) ; iter_entries filtre
+# par id d'extension et ne crée une Entry que pour les fichiers retenus.
 _DIR_LISTING_CACHE = {}
 
+# Manifestes persistants ouverts pendant le run : chemin abs -> (manifeste, dir_mtimes)
+_MANIFESTS = {}
+
+def _manifest(src):
+    if not RUN_OPTIONS['manifest']:
+        return None
+    return SourceManifest(src, RUN_OPTIONS['manifest_dir'])
+
 def _dir_listing(src):
     key = os.path.abspath(src)
     cached = _DIR_LISTING_CACHE.get(key)
     if cached is not None:
         return cached
-    listing = []
-    for full_path in iter_files(src):  # sans filtre : on liste tout une fois
-        rel = relpath_safe(full_path, src)
-        try:
-            mtime = os.path.getmtime(_long_path_aware(full_path))
-        except Exception:
-            mtime = None
-        listing.append((full_path, rel, mtime))
+    root = _long_path_aware(src)
+    if root.startswith('\\\\?\\'):
+        root = root[4:]
+    man = _manifest(src)
+    if man is not None:
+        rows = man.load_listing(root=root, threads=RUN_OPTIONS['walk_threads'])
+        if rows is not None:
+            listing = DirListing.from_rows(root, rows)
+            _MANIFEST_HASHES.update(man.hashes)
+            _MANIFESTS[key] = (man, None)   # déjà à jour : réécrit seulement les hachages
+            _DIR_LISTING_CACHE[key] = listing
+            return listing
+    listing = DirListing(root)
+    dir_mtimes = {} if man is not None else None
+    for _full, rel, size, mtime, ino, dev in scan_tree(_long_path_aware(src),
+                                                       threads=RUN_OPTIONS['walk_threads'],
+                                                       dir_mtimes=dir_mtimes):
+        listing.append(rel, mtime, size, ino, dev)
+    if man is not None:
+        _MANIFESTS[key] = (man, dir_mtimes)
     _DIR_LISTING_CACHE[key] = listing
     return listing
 
-def iter_entries(src: str, include_ext=None, exclude_ext=None) -> Iterator[Entry]:
-    """Itérateur unifié qui lit les fichiers d'un dossier OU d'une archive."""
+# Équivalent ARCHIVE du cache de listing : le répertoire central ZIP / l'en-tête
+# 7z n'est analysé qu'UNE fois par run ; les membres sont ensuite ouverts via le
+# pool borné de handles partagé (fs_provider.ARCHIVE_POOL), fermé par end_run().
+_ARCHIVE_LISTING_CACHE = {}
+_POOLED_ARCHIVE_EXT = ('.zip', '.7z') + IMAGE_EXT   # images disque : fs_provider.ImageSource
+
+def _archive_listing(src):
+    key = os.path.abspath(src)
+    cached = _ARCHIVE_LISTING_CACHE.get(key)
+    if cached is None:
+        man = _manifest(src)
+        cached = man.load_members() if man is not None else None
+        if cached is None:
+            cached = ARCHIVE_POOL.members(src)
+            if man is not None:
+                man.save_members(cached)
+        _ARCHIVE_LISTING_CACHE[key] = cached
+    return cached
+
+def _save_manifests():
+    """Écrit/actualise le manifeste de chaque dossier listé pendant le run."""
+    for key, (man, dir_mtimes) in list(_MANIFESTS.items()):
+        listing = _DIR_LISTING_CACHE.get(key)
+        if listing is None:
+            continue
+        hashes = {}
+        for i in range(len(listing)):
+            full_path = listing.path(i)
+            aware = _long_path_aware(full_path)
+            md5 = _MD5_CACHE.get(aware)
+            if md5:
+                hashes[full_path] = (md5, _SHA256_CACHE.get(aware))
+            elif full_path in _MANIFEST_HASHES:
+                hashes[full_path] = _MANIFEST_HASHES[full_path][2:]
+        if dir_mtimes is None:
+            # listing repris du manifeste : les dossiers sont inchangés
+            if man.unchanged(hashes):
+                continue
+            dir_mtimes = man.load_dir_mtimes()
+        man.save_listing(listing, dir_mtimes, hashes)
+    _MANIFESTS.clear()
+    _MANIFEST_HASHES.clear()
+
+def _pooled_opener(src, name):
+    return lambda: ARCHIVE_POOL.open_member(src, name)
+
+# --- Index des chemins -----------------------------------------------------
+# Construit UNE fois par source (dossier ou archive .zip/.7z listée) et partagé
+# par les modules : au lieu de tester chaque chemin de l'extraction, une requête
+# ne touche que les fichiers concernés.
+#   under  : segment de dossier, même sens que  '/Scan/EventLog/' in '/' + rel
+#            (dossiers indexés par nom + plage triée des sous-dossiers) ;
+#   under_icase : idem, insensible à la casse ('/dcim/' : DCIM, Dcim, dCIM…
+#            d'une carte FAT/exFAT) ;
+#   suffix : fin de chemin,   même sens que  ('/' + rel).endswith(suffix)
+#            (positions triées par nom inversé, recherche par préfixe) ;
+#   glob   : motif fnmatch (sensible à la casse) sur rel, séparateurs '/'.
+# Chaque critère accepte une chaîne ou un tuple ; un chemin est retenu s'il
+# satisfait AU MOINS UN critère (union). Résultat toujours dans l'ORDRE du listing.
+def _as_tuple(v):
+    if v is None: return ()
+    return (v,) if isinstance(v, str) else tuple(v)
+
+def _path_match(norm, under, suffix, glob, under_icase=()):
+    """Même sélection que PathIndex.select, pour un chemin '/'+rel isolé
+    (sources parcourues en flux : 7z solide, autres formats)."""
+    if under and any(u in norm.rsplit('/', 1)[0] + '/' for u in under): return True
+    if under_icase and any(u in norm.rsplit('/', 1)[0].lower() + '/' for u in under_icase): return True
+    if suffix and norm.endswith(suffix): return True
+    return bool(glob) and any(fnmatch.fnmatchcase(norm[1:], g) for g in glob)
+
+def _norm_under(seg):
+    return '/' + seg.strip('/\\').replace('\\', '/') + '/' if seg.strip('/\\') else '/'
+
+def _bisect_key(n, key_at, x):
+    """bisect_left sur n clés calculées à la demande (key_at(k), triées)."""
+    lo, hi = 0, n
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if key_at(mid) < x: lo = mid + 1
+        else: hi = mid
+    return lo
+
+class PathIndex:
+    """Index des chemins relatifs d'un DirListing (positions = ordre du listing).
+
+    Bâti sur les colonnes du listing : les chaînes ne sont gardées qu'une fois
+    par DOSSIER ; par fichier, seuls des array('I') de positions (regroupées
+    par dossier, triées par nom inversé / par nom), noms relus du bloc UTF-8
+    du listing à la demande."""
+    def __init__(self, listing):
+        self._listing = listing
+        n = len(listing)
+        dir_ids = listing.dir_ids
+        # dossiers normalisés : 'a/b/' -> '/a/b'  ('' = racine)
+        self.dirs = ['/' + d.replace('\\', '/').strip('/') if d.strip('/\\') else ''
+                     for d in listing.dirs]
+        start = [0] * (len(self.dirs) + 1)
+        for did in dir_ids:
+            start[did + 1] += 1
+        for i in range(len(self.dirs)):
+            start[i + 1] += start[i]
+        self._dir_start = array('Q', start)
+        self._by_dir = array('I', sorted(range(n), key=dir_ids.__getitem__))   # stable
+        self._dir_ids = {}       # '/a/b' -> [ids de dossier du listing]
+        self.dirs_by_name = {}   # 'b' -> {'/a/b', ...} (ancêtres compris)
+        for did, d in enumerate(self.dirs):
+            ids = self._dir_ids.get(d)
+            if ids is None:
+                ids = self._dir_ids[d] = []
+                while d:
+                    head, name = d.rsplit('/', 1)
+                    known = self.dirs_by_name.setdefault(name, set())
+                    if d in known: break
+                    known.add(d)
+                    d = head
+            ids.append(did)
+        self.sorted_dirs = sorted(self._dir_ids)
+        name = listing.name
+        self._rev = array('I', sorted(range(n), key=lambda i: name(i)[::-1]))
+        self._names = self._dir_names = None
+        self._dirs_by_lower = None
+
+    def __len__(self):
+        return len(self._listing)
+
+    def norm(self, pos):
+        """'/' + chemin relatif (séparateurs '/') de la position `pos`."""
+        return self.dirs[self._listing.dir_ids[pos]] + '/' + self._listing.name(pos)
+
+    def _files_in(self, d, out):
+        for did in self._dir_ids.get(d, ()):
+            out.update(self._by_dir[self._dir_start[did]:self._dir_start[did + 1]])
+
+    def _subtree(self, top, out):
+        self._files_in(top, out)
+        lo = bisect.bisect_left(self.sorted_dirs, top + '/')
+        hi = bisect.bisect_left(self.sorted_dirs, top + '0')   # '0' suit '/'
+        for d in self.sorted_dirs[lo:hi]:
+            self._files_in(d, out)
+
+    def _under(self, seg):
+        seg = _norm_under(seg)
+        if seg == '/':
+            return set(range(len(self)))
+        name = seg.rstrip('/').rsplit('/', 1)[1]
+        out = set()
+        for top in self.dirs_by_name.get(name, ()):
+            if (top + '/').endswith(seg):
+                self._subtree(top, out)
+        return out
+
+    def _under_icase(self, seg):
+        seg = _norm_under(seg).lower()
+        if seg == '/':
+            return set(range(len(self)))
+        if self._dirs_by_lower is None:
+            self._dirs_by_lower = {}
+            for name in self.dirs_by_name:
+                self._dirs_by_lower.setdefault(name.lower(), []).append(name)
+        out = set()
+        for name in self._dirs_by_lower.get(seg.rstrip('/').rsplit('/', 1)[1], ()):
+            for top in self.dirs_by_name[name]:
+                if (top + '/').lower().endswith(seg):
+                    self._subtree(top, out)
+        return out
+
+    def _suffix(self, suffix):
+        # recherche sur les noms inversés triés ; partie dossier du suffixe
+        # éventuelle vérifiée ensuite sur le chemin complet
+        suffix = suffix.replace('\\', '/')
+        key = suffix.rsplit('/', 1)[-1][::-1]
+        rev, name = self._rev, self._listing.name
+        key_at = lambda k: name(rev[k])[::-1]
+        lo = _bisect_key(len(rev), key_at, key)
+        hi = _bisect_key(len(rev), key_at, key + '\U0010ffff')
+        if '/' not in suffix:
+            return set(rev[lo:hi])
+        return {p for p in rev[lo:hi] if self.norm(p).endswith(suffix)}
+
+    def _component_prefix(self, prefix):
+        """Positions des chemins dont un composant (dossier ou fichier) commence
+        par `prefix` (index des noms triés, construit à la première demande)."""
+        name = self._listing.name
+        if self._names is None:
+            self._names = array('I', sorted(range(len(self)), key=name))
+            self._dir_names = sorted(self.dirs_by_name)
+        names = self._names
+        key_at = lambda k: name(names[k])
+        lo = _bisect_key(len(names), key_at, prefix)
+        hi = _bisect_key(len(names), key_at, prefix + '\U0010ffff')
+        out = set(names[lo:hi])
+        lo = bisect.bisect_left(self._dir_names, prefix)
+        hi = bisect.bisect_left(self._dir_names, prefix + '\U0010ffff')
+        for d in self._dir_names[lo:hi]:
+            out |= self._under(d)
+        return out
+
+    def _glob(self, pattern):
+        tail = pattern
+        for ch in '*?[':
+            tail = tail.rsplit(ch, 1)[-1]
+        if tail:
+            cands = self._suffix(tail)
+        else:
+            # motif sans fin littérale ('*/build.prop*') : '/' + préfixe littéral
+            # du dernier segment => un composant du chemin commence par ce préfixe
+            head = pattern.rpartition('/')[2]
+            prefix = re.split(r'[*?\[]', head, 1)[0] if '/' in pattern else ''
+            cands = self._component_prefix(prefix) if prefix else range(len(self))
+        return {p for p in cands if fnmatch.fnmatchcase(self.norm(p)[1:], pattern)}
+
+    def select(self, under=(), suffix=(), glob=(), under_icase=()):
+        """Positions (triées) des chemins satisfaisant les critères."""
+        result = set()
+        for crit, fn in ((under, self._under), (suffix, self._suffix), (glob, self._glob),
+                         (under_icase, self._under_icase)):
+            for c in crit:
+                result |= fn(c)
+        return sorted(result)
+
+_PATH_INDEX = {}
+
+def path_index(src):
+    """PathIndex d'une source (dossier ou .zip/.7z listé), construit une fois."""
+    key = os.path.abspath(src)
+    idx = _PATH_INDEX.get(key)
+    if idx is None:
+        if os.path.isdir(src):
+            listing = _dir_listing(src)
+        elif src.lower().endswith(_POOLED_ARCHIVE_EXT) and not (RUN_OPTIONS['solid_7z'] and src.lower().endswith('.7z')):
+            listing = DirListing(src)
+            for name, _, _ in _archive_listing(src):
+                listing.append(name.replace('\\', '/').replace('/', os.sep), None, 0, 0, 0)
+        else:
+            return None
+        idx = _PATH_INDEX[key] = PathIndex(listing)
+    return idx
+
+# --- Ordre physique (option physical_order) ---------------------------------
+# Sur un disque rotatif ou USB, les modules qui lisent tout (VIN, DCIM) sont
+# dominés par les déplacements de tête : l'ordre os.walk saute d'un bout à
+# l'autre du plateau. Avec physical_order, iter_entries(physical=True) rend les
+# fichiers d'un dossier triés par premier extent physique (FIEMAP, sinon
+# inode), et ceux d'une image disque par offset dans l'image. Chaque Entry
+# garde sa position logique (seq) : logical_order() rétablit l'ordre du
+# listing pour les sorties. Les autres appels restent en ordre logique.
+_PHYSICAL_KEYS = {}
+
+def _physical_positions(src, positions):
+    """Positions du listing triées par clé physique (calculées une fois par source)."""
+    key = os.path.abspath(src)
+    keys = _PHYSICAL_KEYS.get(key)
+    if keys is None:
+        if os.path.isdir(src):
+            listing = _dir_listing(src)
+            keys = physical_sort_keys([(_long_path_aware(listing.path(i)), listing.inos[i], listing.devs[i])
+                                       for i in range(len(listing))],
+                                      threads=RUN_OPTIONS['walk_threads'])
+        else:
+            by_name = image_physical_keys(src)
+            keys = [by_name.get(name, 0) for name, _, _ in _archive_listing(src)]
+        _PHYSICAL_KEYS[key] = keys
+    return sorted(positions, key=keys.__getitem__)
+
+def logical_order(items, entry_of=None):
+    """Remet dans l'ordre du listing des éléments produits en ordre physique.
+    entry_of(item) -> Entry de l'élément (défaut : l'élément est l'Entry).
+    Sans l'option physical_order, `items` est rendu tel quel."""
+    if not RUN_OPTIONS['physical_order']:
+        return items
+    get = entry_of or (lambda x: x)
+
+    def _seq(pair):
+        seq = get(pair[1]).seq
+        return pair[0] if seq is None else seq
+    return [item for _, item in sorted(enumerate(items), key=_seq)]
+
+def _listing_entry(listing, pos):
+    rel = listing.rel(pos)
+    return Entry(rel_path=rel, mtime=listing.mtime(pos), is_os=True,
+                 path=os.path.join(listing.root, rel), size=listing.sizes[pos], seq=pos)
+
+def iter_entries(src: str, include_ext=None, exclude_ext=None,
+                 under=None, suffix=None, glob=None, nested=False,
+                 physical=False, under_icase=None) -> Iterator[Entry]:
+    """Itérateur unifié qui lit les fichiers d'un dossier OU d'une archive.
+    under / suffix / glob / under_icase : sélection par l'index des chemins
+    (voir PathIndex).
+    nested=True : chaque .zip sélectionné est suivi de ses membres (un niveau,
+    voir iter_nested_entries) ; les filtres d'extension s'appliquent aux deux.
+    Un journal compressé ('logcat.txt.1.gz') dont l'extension logique est dans
+    include_ext est rendu décompressé en flux (voir _decompressed_entry).
+    physical=True : ordre physique du support si l'option physical_order est
+    active (dossier, image disque) ; logical_order() rétablit l'ordre."""
+    if nested:
+        yield from _iter_with_nested(src, include_ext, exclude_ext, under, suffix, glob, physical,
+                                     under_icase)
+        return
+    physical = physical and RUN_OPTIONS['physical_order']
     include = {e.lower() for e in include_ext} if include_ext else None
     exclude = {e.lower() for e in exclude_ext} if exclude_ext else None
+    under = tuple(_norm_under(u) for u in _as_tuple(under))
+    suffix, glob = tuple(s.replace('\\', '/') for s in _as_tuple(suffix)), _as_tuple(glob)
+    under_icase = tuple(_norm_under(u).lower() for u in _as_tuple(under_icase))
+    filtered = bool(under or suffix or glob or under_icase)
 
     if os.path.isdir(src):
-        for full_path, rel, mtime in _dir_listing(src):
-            ext = os.path.splitext(full_path)[1].lower()
-            if include and ext not in include: continue
-            if exclude and ext in exclude: continue
-            yield Entry(rel_path=rel, mtime=mtime, is_os=True, path=full_path)
+        listing = _dir_listing(src)
+        positions = path_index(src).select(under, suffix, glob, under_icase) if filtered else range(len(listing))
+        if physical:
+            positions = _physical_positions(src, positions)
+        # filtre par id d'extension : aucun chemin décodé pour un fichier écarté
+        wanted = listing.ext_ids_for(include) if include else None
+        compressed = listing.ext_ids_for(COMPRESSED_EXT) if include else ()
+        skipped = listing.ext_ids_for(exclude) if exclude else ()
+        ext_ids = listing.ext_ids
+        for pos in positions:
+            eid = ext_ids[pos]
+            if wanted is not None and eid not in wanted:
+                if eid in compressed:
+                    yield from _decompressed_entry(_listing_entry(listing, pos), include, exclude)
+                continue
+            if eid in skipped: continue
+            yield _listing_entry(listing, pos)
     else:
         # --- LA CORRECTION EST ICI ---
         # On retire le try/except pour laisser l'erreur remonter à main.py
-        with open_source(src) as vfs:
+        if RUN_OPTIONS['solid_7z'] and src.lower().endswith('.7z'):
+            vfs = solid_source(src, spool_root=RUN_OPTIONS['spool_dir'], want=source_want())
+        elif is_tar_path(src):
+            vfs = tar_source(src, spool_root=RUN_OPTIONS['spool_dir'], want=source_want())
+        elif src.lower().endswith(_POOLED_ARCHIVE_EXT):
+            members = _archive_listing(src)
+            positions = path_index(src).select(under, suffix, glob, under_icase) if filtered else range(len(members))
+            if physical and src.lower().endswith(IMAGE_EXT):
+                positions = _physical_positions(src, positions)
+            for pos in positions:
+                name, size, mtime = members[pos]
+                ext = os.path.splitext(name)[1].lower()
+                if include and ext not in include:
+                    if ext in COMPRESSED_EXT:
+                        yield from _decompressed_entry(
+                            Entry(rel_path=name, mtime=mtime, is_os=False,
+                                  v_open_bin=_pooled_opener(src, name), size=size, seq=pos),
+                            include, exclude)
+                    continue
+                if exclude and ext in exclude: continue
+                yield Entry(rel_path=name, mtime=mtime, is_os=False,
+                            v_open_bin=_pooled_opener(src, name), size=size, src=src, seq=pos)
+            return
+        else:
+            vfs = open_source(src, spool_root=RUN_OPTIONS['spool_dir'], want=source_want())
+        with vfs:
             for vf in vfs.iter_files():
                 ext = os.path.splitext(vf.vfs_path)[1].lower()
-                if include and ext not in include: continue
+                if include and ext not in include and ext not in COMPRESSED_EXT: continue
+                if filtered and not _path_match('/' + vf.vfs_path.replace('\\', '/').lstrip('/'),
+                                                under, suffix, glob, under_icase): continue
+                if include and ext not in include:
+                    yield from _decompressed_entry(
+                        Entry(rel_path=vf.vfs_path, mtime=vf.mtime, is_os=False,
+                              v_open_bin=vf.open_binary, size=vf.size),
+                        include, exclude)
+                    continue
                 if exclude and ext in exclude: continue
-                yield Entry(rel_path=vf.vfs_path, mtime=vf.mtime, is_os=False, v_open_bin=vf.open_binary)
+                yield Entry(rel_path=vf.vfs_path, mtime=vf.mtime, is_os=False,
+                            v_open_bin=vf.open_binary, size=vf.size, src=src)
+
+# --- Besoins déclarés des modules (WANTS) ------------------------------------
+# Chaque module peut déclarer, au niveau module, WANTS = liste de filtres au
+# format des arguments d'iter_entries ({'include_ext': ..., 'under': ...}) :
+# les fichiers de la source qu'il lit. Un tar (lu une seule fois, en flux) ne
+# matérialise que les membres voulus par au moins un module du run. Un module
+# sans WANTS (ou WANTS = None) veut tout ; WANTS = () : rien de la source.
 
-# Cache TEXTE plafonné : chaque fichier .log/.txt n'est lu qu'une fois ;
-# les modules suivants (account/wifi/bt/master) réutilisent le contenu.
-# Plafond mémoire pour rester sûr sur de grosses extractions (au-delà, on
-# relit sans mettre en cache).
-_TEXT_CACHE = {}
-_TEXT_CACHE_BYTES = [0]
-_TEXT_CACHE_CAP = 800 * 1024 * 1024  # 800 Mo
+def module_wants(fns):
+    """Union des WANTS des modules des fonctions `fns`, ou None (tout)."""
+    specs = []
+    for fn in fns:
+        wants = getattr(sys.modules.get(getattr(fn, '__module__', None)), 'WANTS', None)
+        if wants is None:
+            return None
+        specs.extend(wants)
+    return specs
+
+def _want_spec(spec):
+    include = {e.lower() for e in spec['include_ext']} if spec.get('include_ext') else None
+    exclude = {e.lower() for e in spec['exclude_ext']} if spec.get('exclude_ext') else None
+    under = tuple(_norm_under(u) for u in _as_tuple(spec.get('under')))
+    suffix = tuple(x.replace('\\', '/') for x in _as_tuple(spec.get('suffix')))
+    under_icase = tuple(_norm_under(u).lower() for u in _as_tuple(spec.get('under_icase')))
+    return include, exclude, under, suffix, _as_tuple(spec.get('glob')), under_icase
+
+def source_want(specs=None):
+    """Prédicat (nom, taille) -> bool des membres voulus par `specs` (défaut :
+    RUN_OPTIONS['source_wants']), ou None si tout est voulu. Même sélection
+    qu'iter_entries, journaux compressés compris."""
+    specs = RUN_OPTIONS['source_wants'] if specs is None else specs
+    if specs is None:
+        return None
+    compiled = [_want_spec(sp) for sp in specs]
+
+    def want(name, _size=None):
+        norm = '/' + name.replace('\\', '/').lstrip('/')
+        ext = os.path.splitext(norm)[1].lower()
+        if ext in COMPRESSED_EXT and RUN_OPTIONS['compressed_logs']:
+            logical = compressed_logical_name(norm)
+            lext = logical_ext(logical) if logical else ext
+        else:
+            lext = ext
+        for include, exclude, under, suffix, glob, under_icase in compiled:
+            if include and ext not in include and lext not in include: continue
+            if exclude and ext in exclude: continue
+            if (under or suffix or glob or under_icase) and \
+                    not _path_match(norm, under, suffix, glob, under_icase): continue
+            return True
+        return False
+    return want
+
+def _decompressed_entry(entry, include, exclude):
+    """Vue décompressée de `entry` (journal .gz/.bz2/.xz), rendue si son
+    extension logique est demandée : rel_path 'x.log.gz' + NESTED_SEP + 'x.log',
+    lecture en flux (fs_provider.open_decompressed, thread de décompression)."""
+    if not RUN_OPTIONS['compressed_logs']:
+        return
+    logical = compressed_logical_name(entry.rel_path)
+    if logical is None:
+        return
+    ext = logical_ext(logical)
+    if ext not in include or (exclude and ext in exclude):
+        return
+    yield Entry(rel_path=entry.rel_path + NESTED_SEP + logical, mtime=entry.mtime, is_os=False,
+                v_open_bin=lambda: open_decompressed(entry.open_binary, entry.rel_path), seq=entry.seq)
+
+def _iter_with_nested(src, include_ext, exclude_ext, under, suffix, glob, physical=False,
+                      under_icase=None):
+    include = {e.lower() for e in include_ext} if include_ext else None
+    exclude = {e.lower() for e in exclude_ext} if exclude_ext else None
+    for entry in iter_entries(src, under=under, suffix=suffix, glob=glob, physical=physical,
+                              under_icase=under_icase):
+        ext = os.path.splitext(entry.rel_path)[1].lower()
+        if (not include or ext in include) and not (exclude and ext in exclude):
+            yield entry
+        if ext == '.zip':
+            for inner in iter_nested_entries(entry, include_ext):
+                if exclude and os.path.splitext(inner.rel_path)[1].lower() in exclude: continue
+                yield inner
+
+def iter_nested_entries(entry: Entry, include_ext=None) -> Iterator[Entry]:
+    """Membres d'un .zip de la source, en entrées à part entière : rel_path
+    'chemin/x.zip!/membre' (répertoire central mis en cache, voir NESTED_POOL)."""
+    include = {e.lower() for e in include_ext} if include_ext else None
+    key = _cache_key(entry)
+    opener = entry.open_binary
+    NESTED_POOL.spool_dir = RUN_OPTIONS['spool_dir']
+    try:
+        members = NESTED_POOL.members(key, opener)
+    except Exception as e:
+        logging.warning(f"Archive interne illisible {entry.rel_path}: {e}")
+        return
+    for name, size, mtime in members:
+        if include and os.path.splitext(name)[1].lower() not in include: continue
+        yield Entry(rel_path=entry.rel_path + NESTED_SEP + name, mtime=mtime, is_os=False,
+                    v_open_bin=lambda n=name: NESTED_POOL.open_member(key, opener, n), size=size,
+                    seq=entry.seq)
+
+# --- Bases SQLite (sqlite_store.DB_STORE) ------------------------------------
+DB_SIDECARS = ('-wal', '-shm')   # compagnons matérialisés avec la base
+_ARCHIVE_NAME_SETS = {}
+
+def _sibling_opener(entry, suffix):
+    """Ouvreur du compagnon `rel + suffix` d'un membre d'archive, ou None."""
+    src, name = entry.src, entry.rel_path + suffix
+    if not src or NESTED_SEP in entry.rel_path:
+        return None
+    if RUN_OPTIONS['solid_7z'] and src.lower().endswith('.7z'):
+        solid = solid_source(src, spool_root=RUN_OPTIONS['spool_dir'], want=source_want())
+        names = _ARCHIVE_NAME_SETS.get(src)
+        if names is None:
+            names = _ARCHIVE_NAME_SETS[src] = {n for block in solid.blocks() for n, _, _ in block}
+        return (lambda: open(solid._spool_member(name), 'rb')) if name in names else None
+    if is_tar_path(src):
+        tar = tar_source(src, spool_root=RUN_OPTIONS['spool_dir'], want=source_want())
+        return (lambda: open(tar.spool_path(name), 'rb')) if name in tar.members() else None
+    if src.lower().endswith(_POOLED_ARCHIVE_EXT):
+        names = _ARCHIVE_NAME_SETS.get(src)
+        if names is None:
+            names = _ARCHIVE_NAME_SETS[src] = {n for n, _, _ in _archive_listing(src)}
+        return _pooled_opener(src, name) if name in names else None
+    return None
+
+def _db_source(entry):
+    DB_STORE.spool_root = RUN_OPTIONS['spool_dir']
+    if entry.is_os:
+        return {'os_path': entry.path}
+    if entry.src and is_tar_path(entry.src) and NESTED_SEP not in entry.rel_path:
+        # déjà matérialisée (avec ses -wal/-shm voulus) dans le spool du tar
+        tar = tar_source(entry.src, spool_root=RUN_OPTIONS['spool_dir'], want=source_want())
+        return {'os_path': tar.spool_path(entry.rel_path)}
+    sidecars = [(s, op) for s in DB_SIDECARS if (op := _sibling_opener(entry, s))]
+    return {'name': entry.rel_path, 'opener': entry.open_binary, 'sidecars': sidecars}
+
+def open_db(entry):
+    """Connexion SQLite PARTAGÉE (lecture seule) d'un Entry, ou None.
+    Ne pas la fermer : elle sert aux modules suivants (fermée par end_run)."""
+    return DB_STORE.connect(_cache_key(entry), **_db_source(entry))
+
+def db_local_path(entry):
+    """(chemin local, immutable) de la base d'un Entry — en place ou matérialisée
+    une fois par run, comme open_db — pour un worker qui ouvre sa propre
+    connexion (sqlite_store.connect_readonly). (None, False) si impossible."""
+    src = _db_source(entry)
+    path = DB_STORE.local_path(_cache_key(entry), **src)
+    return path, path is not None and path == src.get('os_path')
+
+def db_table_names(entry):
+    """Tables d'une base lues dans son en-tête et le b-tree de sqlite_master
+    seulement (quelques Ko, sans matérialisation), ou None si indécidable :
+    -wal non vide présent (le schéma peut y avoir changé), format inattendu."""
+    if entry.is_os:
+        try:
+            if os.path.getsize(entry.path + '-wal') > 0:
+                return None
+        except OSError:
+            pass
+    elif _sibling_opener(entry, '-wal') is not None:
+        return None
+    try:
+        with entry.open_binary() as f:
+            return sqlite_format.table_names(f)
+    except Exception as e:
+        logging.debug(f"Sonde SQLite impossible {entry.rel_path}: {e}")
+        return None
+
+# Cache TEXTE du run (text_cache.TextCache) : chaque fichier .log/.txt n'est lu
+# qu'une fois ; les modules suivants (account/wifi/bt/master) réutilisent le
+# contenu. Budget mémoire en octets réels (cache_mb) ; au-delà, les textes les
+# moins récents sont compressés (zlib) puis déversés sur disque, jamais relus
+# sur la source.
+_TEXT_CACHE = None
+
+def _text_cache():
+    global _TEXT_CACHE
+    if _TEXT_CACHE is None:
+        _TEXT_CACHE = TextCache(int(RUN_OPTIONS['cache_mb'] * 1024 * 1024),
+                                compress=RUN_OPTIONS['cache_compress'],
+                                spill=RUN_OPTIONS['cache_spill'],
+                                spill_root=RUN_OPTIONS['spool_dir'])
+    return _TEXT_CACHE
+
+# Tampon PARTAGÉ par fichier : pour les fichiers texte (extensions ci-dessous,
+# taille bornée), le contenu brut n'est lu qu'UNE fois par run ; le scan binaire
+# (VIN) l'utilise tel quel, le texte (read_text_cached, iter_text_lines_entry)
+# en est décodé (utf-8, erreurs ignorées, fins de ligne universelles comme
+# open_text). Les autres fichiers gardent leur lecture directe.
+# Une fois décodé, le brut n'est gardé que si le scan binaire du run reste à
+# faire (RUN_OPTIONS['binary_scan'], end_binary_scan) : sinon il est libéré.
+_SHARED_TEXT_EXT = {'.log', '.txt', '.json', '.ini', '.xml', '.prop', '.csv', '.cfg', '.conf'}
+_SHARED_MAX_BYTES = 64 * 1024 * 1024
+
+def _cache_key(entry):
+    return entry.path if entry.is_os else ('vfs:' + entry.rel_path)
+
+def shares_buffer(entry):
+    """True si le contenu de l'entry passe par le tampon partagé
+    (read_bytes_cached). Taille inconnue (vue décompressée en flux d'un .gz…) :
+    plafond non vérifiable, lecture directe."""
+    return (os.path.splitext(entry.rel_path)[1].lower() in _SHARED_TEXT_EXT
+            and entry.size is not None and entry.size <= _SHARED_MAX_BYTES)
+
+_BINARY_SCAN_DONE = False
+
+def _bytes_still_needed():
+    return RUN_OPTIONS['binary_scan'] and not _BINARY_SCAN_DONE
+
+def end_binary_scan():
+    """Scan binaire du run terminé : le contenu brut des fichiers déjà
+    décodés en texte est libéré, celui des suivants le sera après décodage."""
+    global _BINARY_SCAN_DONE
+    _BINARY_SCAN_DONE = True
+    if _TEXT_CACHE is None:
+        return
+    for key in _TEXT_CACHE.keys():
+        if key.startswith('bytes:') and key[6:] in _TEXT_CACHE:
+            _TEXT_CACHE.discard(key)
+
+def read_bytes_cached(entry):
+    """Contenu brut d'un Entry, lu une seule fois par run (cache partagé)."""
+    key = 'bytes:' + _cache_key(entry)
+    cache = _text_cache()
+    data = cache.get(key)
+    if data is None:
+        with entry.open_binary() as f:
+            data = f.read()
+        cache.put(key, data)
+    return data
+
+def _decode_text(data):
+    # Équivalent de open_text() : utf-8 / ignore + fins de ligne universelles.
+    return data.decode('utf-8', 'ignore').replace('\r\n', '\n').replace('\r', '\n')
 
 def read_text_cached(entry):
-    """Retourne le texte intégral d'un Entry, mis en cache (dans la limite)."""
-    key = entry.path if entry.is_os else ('vfs:' + entry.rel_path)
-    if key in _TEXT_CACHE:
-        return _TEXT_CACHE[key]
+    """Retourne le texte intégral d'un Entry, mis en cache."""
+    key = _cache_key(entry)
+    cache = _text_cache()
+    txt = cache.get(key)
+    if txt is not None:
+        return txt
     try:
-        with entry.open_text() as f:
-            txt = f.read()
+        if shares_buffer(entry):
+            txt = _decode_text(read_bytes_cached(entry))
+            if not _bytes_still_needed():
+                cache.discard('bytes:' + key)
+        else:
+            with entry.open_text() as f:
+                txt = f.read()
     except Exception as e:
         logging.debug(f"read_text_cached {entry.rel_path}: {e}")
         txt = ""
-    if _TEXT_CACHE_BYTES[0] + len(txt) <= _TEXT_CACHE_CAP:
-        _TEXT_CACHE[key] = txt
-        _TEXT_CACHE_BYTES[0] += len(txt)
+    cache.put(key, txt)
     return txt
 
+def _warm_quiet(warm, entry):
+    try:
+        warm(entry)
+    except Exception as e:
+        logging.debug(f"prefetch {entry.rel_path}: {e}")
+
+def prefetched(entries, warm=None):
+    """Rend les entries DANS L'ORDRE pendant que des threads lisent les
+    suivantes vers le cache texte (warm, défaut read_text_cached) : le disque
+    (bloqueur USB, NAS) travaille pendant que le CPU traite le fichier courant.
+
+    Fenêtre de prefetch_depth entries, plafonnée à prefetch_mb octets lus
+    d'avance (au moins une entry ; taille inconnue comptée _SHARED_MAX_BYTES).
+    Une entry n'est rendue qu'une fois sa lecture terminée : l'appelant la
+    retrouve dans le cache, sans seconde lecture de la source. prefetch_depth = 0 : itération directe."""
+    depth = RUN_OPTIONS['prefetch_depth']
+    if depth <= 0:
+        yield from entries
+        return
+    warm = warm or read_text_cached
+    budget = int(RUN_OPTIONS['prefetch_mb'] * 1024 * 1024)
+    it = iter(entries)
+    window = deque()             # (entry, future, taille) dans l'ordre
+    ahead = 0
+    pending = next(it, None)
+    with ThreadPoolExecutor(max_workers=max(1, min(depth, RUN_OPTIONS['prefetch_threads']))) as pool:
+        try:
+            while True:
+                while pending is not None and len(window) < depth:
+                    # taille inconnue (vue .gz en flux) : comptée au plafond du tampon
+                    size = _SHARED_MAX_BYTES if pending.size is None else pending.size
+                    if window and ahead + size > budget:
+                        break
+                    window.append((pending, pool.submit(_warm_quiet, warm, pending), size))
+                    ahead += size
+                    pending = next(it, None)
+                if not window:
+                    return
+                entry, fut, size = window.popleft()
+                fut.result()
+                ahead -= size
+                yield entry
+        finally:
+            for _entry, fut, _size in window:
+                fut.cancel()
+
+def _text_entries(src, include_ext, skip_md5):
+    for entry in iter_entries(src, include_ext=include_ext):
+        if entry.is_os and should_skip(entry.path, skip_md5):
+            continue
+        yield entry
+
+def iter_text_entries(src, include_ext=('.log', '.txt'), skip_md5=None):
+    """Entries texte hors skiplist, lues d'avance vers le cache (prefetched) :
+    read_text_cached(entry) y est un accès cache."""
+    return prefetched(_text_entries(src, include_ext, skip_md5))
+
 def run_text_consumers(src, consumers, include_ext=('.log', '.txt'), skip_md5=None):
     """PASSE UNIQUE : parcourt l'arborescence texte UNE seule fois, lit chaque
     fichier UNE fois (via le cache) et le fournit à tous les consommateurs.
@@ -180,10 +1061,9 @@ def run_text_consumers(src, consumers, include_ext=('.log', '.txt'), skip_md5=No
 
     Garantit une seule lecture disque par fichier, même au-delà du plafond du
     cache texte. Les fichiers du skiplist (MD5) sont écartés avant les feed().
+    Les fichiers suivants sont lus d'avance en arrière-plan (iter_text_entries).
     Renvoie la liste des consommateurs (pour enchaîner les finalize())."""
-    for entry in iter_entries(src, include_ext=include_ext):
-        if entry.is_os and should_skip(entry.path, skip_md5):
-            continue
+    for entry in iter_text_entries(src, include_ext, skip_md5):
         text = read_text_cached(entry)
         for c in consumers:
             try:
@@ -194,7 +1074,11 @@ def run_text_consumers(src, consumers, include_ext=('.log', '.txt'), skip_md5=No
 
 
 def iter_text_lines_entry(entry: Entry):
-    """Lit les lignes de texte d'un objet Entry."""
+    """Lit les lignes de texte d'un objet Entry (depuis le tampon partagé
+    pour les fichiers texte)."""
+    if shares_buffer(entry):
+        yield from io.StringIO(read_text_cached(entry))
+        return
     try:
         with entry.open_text() as f:
             for line in f:
@@ -202,8 +1086,39 @@ def iter_text_lines_entry(entry: Entry):
     except Exception as e:
         logging.warning(f"Impossible de lire en mode texte {entry.rel_path}: {e}")
 
-def iter_binary_chunks_entry(entry: Entry, chunk_size=1048576, overlap=128):
-    """Lit les blocs binaires d'un objet Entry."""
+def iter_binary_chunks_entry(entry: Entry, chunk_size=1048576, overlap=128, mmap_os=False):
+    """Lit les blocs binaires d'un objet Entry.
+
+    mmap_os=True : pour un fichier du disque, rend UNE vue mmap du fichier
+    entier (zéro copie, pas de relecture de recouvrement) ; regex et détecteurs
+    s'appliquent directement dessus. La vue n'est valide que jusqu'à l'élément
+    suivant. Membres d'archive (ou mmap impossible) : lecture par blocs.
+    Fichier texte éligible au tampon partagé : UN bloc = le tampon."""
+    if shares_buffer(entry):
+        try:
+            yield read_bytes_cached(entry)
+        except Exception as e:
+            logging.warning(f"Impossible de lire en mode binaire {entry.rel_path}: {e}")
+        return
+    if mmap_os and entry.is_os:
+        try:
+            with open(_long_path_aware(entry.path), 'rb') as f:
+                try:
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except (ValueError, OSError, OverflowError):
+                    mm = None   # fichier vide ou non mappable -> blocs
+                if mm is not None:
+                    try:
+                        yield mm
+                    finally:
+                        try:
+                            mm.close()
+                        except BufferError:
+                            pass  # vue encore référencée : libérée par le GC
+                    return
+        except Exception as e:
+            logging.warning(f"Impossible de mapper {entry.rel_path}: {e}")
+            return
     try:
         with entry.open_binary() as f:
             while True:
@@ -214,3 +1129,40 @@ def iter_binary_chunks_entry(entry: Entry, chunk_size=1048576, overlap=128):
                     f.seek(f.tell() - overlap)
     except Exception as e:
         logging.warning(f"Impossible de lire en mode binaire {entry.rel_path}: {e}")
+
+@contextmanager
+def map_entry(entry: Entry):
+    """Vue mmap (lecture seule) du contenu COMPLET d'un Entry, pour les parseurs
+    qui adressent le fichier par offsets (WAL, carving) sans le charger en bytes.
+    Fichier du disque ou membre déjà spoolé : mappé en place ; autre membre
+    d'archive : copié en flux dans un fichier temporaire (spool_dir) puis mappé.
+    Fichier vide : b''. La vue n'est valide que dans le bloc `with`."""
+    with ExitStack() as stack:
+        if entry.is_os:
+            f = stack.enter_context(open(_long_path_aware(entry.path), 'rb'))
+        else:
+            f = stack.enter_context(entry.open_binary())
+            try:
+                os.fstat(f.fileno())
+            except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+                spool_root = RUN_OPTIONS['spool_dir']
+                if spool_root:
+                    os.makedirs(spool_root, exist_ok=True)
+                tmp = stack.enter_context(tempfile.TemporaryFile(prefix='afap_map_', dir=spool_root))
+                shutil.copyfileobj(f, tmp, 1048576)
+                tmp.flush()
+                f = tmp
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            mm = None   # fichier vide
+        if mm is None:
+            yield b''
+            return
+        try:
+            yield mm
+        finally:
+            try:
+                mm.close()
+            except BufferError:
+                pass  # vue encore référencée : libérée par le GC
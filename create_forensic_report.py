@@ -32,6 +32,9 @@ except ImportError:
     def get_lang(): return 'fr'
 
 # ----------------------------------------------------------------------
+
+WANTS = ()   # lit les CSV de l'export
+
 def _read(path):
     if not os.path.isfile(path):
         return []
@@ -300,6 +303,7 @@ def _section_standard_modules(export_dir):
         ('endpoints_found.csv',       "URLs / endpoints HTTP(S)"),
         ('pwd_sn_found.csv',          "Couples sérial / mot de passe"),
         ('vehicule_refs_found.csv',   "Refs pièces véhicule (OEM, FCCID)"),
+        ('sqlite_carved_records.csv', "Enregistrements SQLite supprimés récupérés (carving)"),
     ]
     out.append("| CSV | " + ("Contenu" if get_lang()=='fr' else "Content") + " | "
                + ("Lignes" if get_lang()=='fr' else "Rows") + " |")
@@ -15,10 +15,9 @@ import os
 import re
 import csv
 import json
-import zipfile
 import logging
 import datetime
-from core_scanner import iter_entries, iter_text_lines_entry, open_csv
+from core_scanner import iter_entries, iter_text_lines_entry, open_csv, NESTED_SEP
 from clock_offset import ClockOffset
 
 MAKES = ("Toyota", "Lexus", "Nissan", "Renault", "Citroen", "Peugeot", "VW",
@@ -27,6 +26,10 @@ COLS = ["no", "date_tablette", "heure_tablette", "heure_fin", "duree", "date_cor
         "categorie", "constructeur", "modele", "operation", "detail", "mac_address",
         "fiabilite", "scelle", "sn_tablette", "compte_autel", "source_fichier", "horodatage"]
 
+WANTS = [{'include_ext': ('.zip', '.log'), 'under': '/DataLogging/'},
+         {'under': '/UserData/'},
+         {'include_ext': ('.jpg', '.jpeg', '.png')}]
+
 
 def _dt_from_name(s):
     m = re.search(r'(20\d{2})(\d{2})(\d{2})(\d{2})(\d{2})(\d{2})', s)
@@ -94,44 +97,47 @@ def create_master_timeline(src_dir, export_dir, skip_md5=None, serial="inconnu",
 
     # --- opérations clé + sessions + EEPROM depuis la source (DataLogging/UserData) ---
     try:
-        for entry in iter_entries(src_dir, include_ext=('.zip',)):
-            rel = entry.rel_path.replace('\\', '/')
-            if '/DataLogging/' not in '/' + rel:
+        # Sessions .zip + leurs membres (VFS imbriqué : 'x.zip!/x_main.log')
+        constr_dir = ""
+        for entry in iter_entries(src_dir, include_ext=('.zip', '.log'), under='/DataLogging/',
+                                  nested=True):
+            rel, sep, member = entry.rel_path.replace('\\', '/').partition(NESTED_SEP)
+            if not sep:
+                if not rel.lower().endswith('.zip'):
+                    continue
+                constr_dir = ""
+                parts = rel.split('/')
+                if 'DataLogging' in parts:
+                    i = parts.index('DataLogging')
+                    if i + 1 < len(parts):
+                        constr_dir = parts[i + 1]
+                # session (horodatage = nom)
+                add(_dt_from_name(os.path.basename(rel)), "Session diagnostic", constr_dir,
+                    "", "", os.path.basename(rel), rel)
+                continue
+            # opération clé (_main.log interne)
+            if not member.lower().endswith("main.log"):
                 continue
-            constr_dir = ""
-            parts = rel.split('/')
-            if 'DataLogging' in parts:
-                i = parts.index('DataLogging')
-                if i + 1 < len(parts):
-                    constr_dir = parts[i + 1]
-            # session (horodatage = nom)
-            add(_dt_from_name(os.path.basename(rel)), "Session diagnostic", constr_dir,
-                "", "", os.path.basename(rel), rel)
-            # opération clé (lire le _main.log interne)
             try:
                 with entry.open_binary() as b:
-                    zf = zipfile.ZipFile(b)
-                    for n in zf.namelist():
-                        if not n.lower().endswith("main.log"):
-                            continue
-                        data = zf.read(n).decode("utf-8", "ignore")
-                        fn = ""
-                        for m in re.finditer(r'"FuncName"\s*:\s*"([^"]{2,90})"', data):
-                            if "," not in m.group(1) and m.group(1).lower() != "keytool":
-                                fn = m.group(1)
-                                break
-                        if not fn:
-                            continue
-                        st = _field(data, "FuncStartTime")
-                        et = _field(data, "FuncEndTime")
-                        veh = ""
-                        for mm in re.finditer(r'title\\?"\s*:\s*\\?"([^"\\]{3,50})', data):
-                            if any(mk.lower() in mm.group(1).lower() for mk in MAKES):
-                                veh = mm.group(1).strip()
-                                break
-                        add(st or _dt_from_name(os.path.basename(rel)), "Opération clé",
-                            constr_dir or "Toyota", veh, fn,
-                            "mode OBD" if "OBD" in data[:6000] else "", rel, fin=et)
+                    data = b.read().decode("utf-8", "ignore")
+                fn = ""
+                for m in re.finditer(r'"FuncName"\s*:\s*"([^"]{2,90})"', data):
+                    if "," not in m.group(1) and m.group(1).lower() != "keytool":
+                        fn = m.group(1)
+                        break
+                if not fn:
+                    continue
+                st = _field(data, "FuncStartTime")
+                et = _field(data, "FuncEndTime")
+                veh = ""
+                for mm in re.finditer(r'title\\?"\s*:\s*\\?"([^"\\]{3,50})', data):
+                    if any(mk.lower() in mm.group(1).lower() for mk in MAKES):
+                        veh = mm.group(1).strip()
+                        break
+                add(st or _dt_from_name(os.path.basename(rel)), "Opération clé",
+                    constr_dir or "Toyota", veh, fn,
+                    "mode OBD" if "OBD" in data[:6000] else "", rel, fin=et)
             except Exception:
                 pass
     except Exception as e:
@@ -139,10 +145,10 @@ def create_master_timeline(src_dir, export_dir, skip_md5=None, serial="inconnu",
 
     # EEPROM
     try:
-        for entry in iter_entries(src_dir):
+        for entry in iter_entries(src_dir, under='/UserData/'):
             rel = entry.rel_path.replace('\\', '/')
             base = os.path.basename(rel)
-            if '/UserData/' in '/' + rel and 'eeprom' in base.lower():
+            if 'eeprom' in base.lower():
                 constr = rel.split('/')[-2] if '/' in rel else ""
                 d = _dt_from_name(base)
                 if not d and entry.mtime:
@@ -20,6 +20,8 @@ import json
 import logging
 from core_scanner import open_csv  # noqa: F401  (cohérence d'import projet)
 
+WANTS = ()   # lit la table maître de l'export
+
 
 def _load_master(export_dir):
     p = os.path.join(export_dir, 'Chronologie_MAITRE.csv')
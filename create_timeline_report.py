@@ -3,6 +3,8 @@
 import os, csv, logging
 from datetime import datetime
 
+WANTS = ()   # lit les CSV de l'export
+
 def create_timeline_report(src_dir, export_dir, **kwargs):
     timeline_events = []
     
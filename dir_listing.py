@@ -0,0 +1,107 @@
+# dir_listing.py — AFAP
+# Auteur : Vincent Chapeau — Teel Technologies Canada (vincent.chapeau@teeltechcanada.com)
+#
+# Listing COLONNAIRE d'un dossier source, partagé par tous les modules du run.
+# Une extraction Android de 1,5 M fichiers tient en moins de 100 Mo au lieu
+# de plusieurs centaines de Mo à quelques Go de tuples (un objet str, float
+# ou int par champ) :
+#   - dossiers internés (table des dossiers + id par fichier), noms de
+#     fichiers concaténés en UN bloc UTF-8 + tableau d'offsets ;
+#   - array('d') des mtimes (NaN = stat échoué), array('q') des tailles,
+#     array('Q') des inodes / devices ;
+#   - extension (minuscules) internée : un id par fichier ; filtrer par
+#     extension ne décode aucun chemin.
+# Le chemin complet (racine + rel) n'est reconstruit qu'à la demande.
+
+import os
+from array import array
+
+_NAN = float('nan')
+_U64 = (1 << 64) - 1
+
+class DirListing:
+    """Listing d'un dossier en colonnes ; positions = ordre d'os.walk.
+    listing[i] rend le tuple historique (chemin, rel, mtime, size, ino, dev)."""
+    def __init__(self, root):
+        self.root = root
+        self._blob = bytearray()          # noms de fichiers (sans dossier)
+        self._offsets = array('Q', [0])
+        self.dir_ids = array('I')
+        self.dirs = []          # id -> dossier relatif avec séparateur final ('' = racine)
+        self._dir_index = {}
+        self.mtimes = array('d')
+        self.sizes = array('q')
+        self.inos = array('Q')
+        self.devs = array('Q')
+        self.ext_ids = array('I')
+        self.exts = []          # id -> extension ('' = sans extension)
+        self._ext_index = {}    # extension -> id
+
+    @classmethod
+    def from_rows(cls, root, rows):
+        """Listing construit depuis des tuples (chemin, rel, mtime, size, ino, dev)."""
+        listing = cls(root)
+        for _path, rel, mtime, size, ino, dev in rows:
+            listing.append(rel, mtime, size, ino, dev)
+        return listing
+
+    def append(self, rel, mtime, size, ino, dev):
+        head, sep, name = rel.rpartition(os.sep)
+        head += sep
+        did = self._dir_index.get(head)
+        if did is None:
+            did = self._dir_index[head] = len(self.dirs)
+            self.dirs.append(head)
+        self.dir_ids.append(did)
+        self._blob += name.encode('utf-8', 'surrogatepass')
+        self._offsets.append(len(self._blob))
+        self.mtimes.append(_NAN if mtime is None else mtime)
+        self.sizes.append(size or 0)
+        self.inos.append((ino or 0) & _U64)
+        self.devs.append((dev or 0) & _U64)
+        ext = os.path.splitext(name)[1].lower()
+        eid = self._ext_index.get(ext)
+        if eid is None:
+            eid = self._ext_index[ext] = len(self.exts)
+            self.exts.append(ext)
+        self.ext_ids.append(eid)
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def name(self, i):
+        """Nom du fichier i (sans dossier)."""
+        return self._blob[self._offsets[i]:self._offsets[i + 1]].decode('utf-8', 'surrogatepass')
+
+    def rel(self, i):
+        return self.dirs[self.dir_ids[i]] + self.name(i)
+
+    def path(self, i):
+        return os.path.join(self.root, self.rel(i))
+
+    def mtime(self, i):
+        m = self.mtimes[i]
+        return None if m != m else m
+
+    def rels(self):
+        for i in range(len(self)):
+            yield self.rel(i)
+
+    def ext_ids_for(self, exts):
+        """Ids des extensions (minuscules) présentes dans le listing."""
+        return {self._ext_index[e] for e in exts if e in self._ext_index}
+
+    def __getitem__(self, i):
+        rel = self.rel(i)
+        return (os.path.join(self.root, rel), rel, self.mtime(i), self.sizes[i],
+                self.inos[i], self.devs[i])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def nbytes(self):
+        """Empreinte mémoire approximative des colonnes (octets)."""
+        cols = (self._offsets, self.dir_ids, self.mtimes, self.sizes, self.inos, self.devs, self.ext_ids)
+        return (len(self._blob) + sum(len(d) for d in self.dirs)
+                + sum(len(c) * c.itemsize for c in cols))
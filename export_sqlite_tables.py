@@ -1,59 +1,169 @@
 # export_sqlite_tables.py (version VFS)
 # Auteur : Vincent Chapeau — Teel Technologies Canada (vincent.chapeau@teeltechcanada.com)
+#
+# Deux modes :
+#   - par défaut : tables connues (tb_history_menu, tb_user_info, tb_vci_record),
+#     bases écartées par la sonde d'en-tête (core_scanner.db_table_names) ;
+#   - --sqlite-all (sqlite_all=True) : TOUTES les tables de TOUTES les bases,
+#     CSV dans sqlite_export/, une base par tâche sur un pool de processus
+#     (repli séquentiel), et sqlite_catalog.csv (base, table, lignes, colonnes).
+# Lignes lues par lots (fetchmany) et écrites en bloc (writerows) : une table
+# n'est jamais chargée entière en mémoire.
 import os
-import sqlite3
+import re
 import csv
+import sqlite3
 import logging
-import tempfile
 import datetime
-from core_scanner import iter_entries, open_csv
+import multiprocessing
+from core_scanner import iter_entries, open_csv, open_db, db_table_names, db_local_path, DB_SIDECARS
+from sqlite_store import connect_readonly
+
+DB_EXT = ('.db', '.sqlite', '.db3')
+EXPORT_SUBDIR = 'sqlite_export'
+CATALOG_HEADER = ['chemin_base', 'table', 'nb_lignes', 'colonnes', 'fichier_csv', 'erreur']
+_FETCH_ROWS = 5000
+_MAX_PROCS = 8
+
+WANTS = [{'include_ext': DB_EXT}, {'suffix': DB_SIDECARS}]
+
+def _mtime_str(entry):
+    try:
+        return datetime.datetime.fromtimestamp(entry.mtime).strftime('%Y-%m-%d %H:%M:%S') if entry.mtime else "Date Inconnue"
+    except Exception:
+        return "Date Inconnue"
+
+def _safe_name(text):
+    return re.sub(r'[^\w.-]', '_', text).strip('_')
+
+def _quote_ident(name):
+    return '"' + name.replace('"', '""') + '"'
+
+def _export_table(cur, table_name, out_csv_path, mtime):
+    """Écrit une table en CSV par lots ; renvoie (colonnes, nombre de lignes)."""
+    with open(out_csv_path, 'w', newline='', encoding='utf-8-sig') as cf:
+        writer = csv.writer(cf)
+        cur.execute(f"SELECT * FROM {_quote_ident(table_name)};")
+        columns = [d[0] for d in cur.description]
+        writer.writerow(columns + ['date_modification_fichier_db'])
+        count = 0
+        while True:
+            batch = cur.fetchmany(_FETCH_ROWS)
+            if not batch:
+                break
+            writer.writerows([*row, mtime] for row in batch)
+            count += len(batch)
+    return columns, count
+
+def _export_db(task):
+    """Worker (--sqlite-all) : toutes les tables d'une base locale.
+    task = (n° de base, chemin, immutable, chemin relatif, mtime, dossier CSV)
+    -> (lignes du catalogue, liste 'base -> table').
+    CSV préfixés du n° de base : 'a_b/x.db' et 'a/b_x.db' ne se recouvrent pas
+    (workers concurrents) ; tables au nom assaini identique suffixées _2, _3…"""
+    seq, path, immutable, rel_path, mtime, out_dir = task
+    catalog, exported, used = [], [], set()
+    prefix = f"{seq:04d}_" + _safe_name(rel_path.replace('\\', '/').replace('/', '_'))
+    try:
+        conn = connect_readonly(path, immutable)
+    except sqlite3.Error as e:
+        return [[rel_path, '', '', '', '', str(e)]], []
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name;")
+        tables = [r[0] for r in cur.fetchall()]
+        for table_name in tables:
+            base, n = f"{prefix}_{_safe_name(table_name)}", 1
+            while (csv_name := base + (f"_{n}" if n > 1 else '') + '.csv').lower() in used:
+                n += 1
+            used.add(csv_name.lower())
+            try:
+                columns, count = _export_table(cur, table_name, os.path.join(out_dir, csv_name), mtime)
+                catalog.append([rel_path, table_name, count, ', '.join(columns),
+                                f"{EXPORT_SUBDIR}/{csv_name}", ''])
+                exported.append(f"{rel_path} -> {table_name}")
+            except sqlite3.Error as e:
+                # table virtuelle (FTS…) ou page corrompue : consignée, on continue
+                catalog.append([rel_path, table_name, '', '', '', str(e)])
+    except sqlite3.Error as e:
+        catalog.append([rel_path, '', '', '', '', str(e)])
+    finally:
+        conn.close()
+    return catalog, exported
+
+def _run_tasks(tasks):
+    """Résultats de _export_db dans l'ordre des tâches : pool de processus si
+    plusieurs bases et plusieurs CPU, sinon (ou en cas d'échec) séquentiel."""
+    nproc = min(os.cpu_count() or 1, _MAX_PROCS, len(tasks))
+    if nproc >= 2:
+        try:
+            with multiprocessing.Pool(processes=nproc) as pool:
+                results = pool.map(_export_db, tasks)
+            logging.info(f"SQLite : export parallèle ({nproc} procs, {len(tasks)} bases)")
+            return results
+        except Exception as e:
+            logging.warning(f"SQLite : multiprocessing indisponible ({e}) -> séquentiel")
+    return [_export_db(t) for t in tasks]
+
+def _export_all(src_dir, export_dir):
+    out_dir = os.path.join(export_dir, EXPORT_SUBDIR)
+    os.makedirs(out_dir, exist_ok=True)
+    tasks, catalog = [], []
+    for entry in iter_entries(src_dir, include_ext=DB_EXT):
+        if db_table_names(entry) == set():
+            continue                                  # pas une base / aucune table
+        path, immutable = db_local_path(entry)
+        if path is None:
+            catalog.append([entry.rel_path, '', '', '', '', 'base non lisible'])
+            continue
+        tasks.append((len(tasks) + 1, path, immutable, entry.rel_path, _mtime_str(entry), out_dir))
+
+    exported = []
+    for rows, names in (_run_tasks(tasks) if tasks else []):
+        catalog.extend(rows)
+        exported.extend(names)
+
+    f_csv, writer = open_csv(export_dir, 'sqlite_catalog.csv', CATALOG_HEADER)
+    try:
+        writer.writerows(catalog)
+    finally:
+        f_csv.close()
+    return exported
+
+def export_sqlite_tables(src_dir, export_dir, tables=None, sqlite_all=False, **kwargs):
+    if sqlite_all:
+        return _export_all(src_dir, export_dir)
 
-def export_sqlite_tables(src_dir, export_dir, tables=None, **kwargs):
     tables_to_export = tables or []
     if not tables_to_export:
         return []
 
     exported = []
-    
-    for entry in iter_entries(src_dir, include_ext=('.db', '.sqlite', '.db3')):
-        temp_db_path = None
-        conn = None
-        try:
-            with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as tmp:
-                temp_db_path = tmp.name
-                with entry.open_binary() as f_in:
-                    tmp.write(f_in.read())
+    wanted = set(tables_to_export)
 
-            conn = sqlite3.connect(f'file:{temp_db_path}?mode=ro', uri=True)
+    for entry in iter_entries(src_dir, include_ext=DB_EXT):
+        # Sonde de l'en-tête / sqlite_master : une base sans aucune des tables
+        # demandées n'est ni copiée ni ouverte (None = indécidable -> ouverture).
+        probed = db_table_names(entry)
+        if probed is not None and not probed & wanted:
+            continue
+        conn = open_db(entry)
+        if conn is None:
+            continue
+        try:
             cur = conn.cursor()
             cur.execute("SELECT name FROM sqlite_master WHERE type='table';")
             available_tables = {r[0] for r in cur.fetchall()}
+            mtime = _mtime_str(entry)
 
-            try:
-                mtime = datetime.datetime.fromtimestamp(entry.mtime).strftime('%Y-%m-%d %H:%M:%S') if entry.mtime else "Date Inconnue"
-            except Exception:
-                mtime = "Date Inconnue"
-            
             for table_name in tables_to_export:
                 if table_name in available_tables:
                     sanitized_path = entry.rel_path.replace('/', '_').replace('\\', '_').strip('_')
                     out_csv_path = os.path.join(export_dir, f"{sanitized_path}_{table_name}.csv")
-                    
-                    with open(out_csv_path, 'w', newline='', encoding='utf-8-sig') as cf:
-                        writer = csv.writer(cf)
-                        cur.execute(f"SELECT * FROM '{table_name}';")
-                        header = [d[0] for d in cur.description] + ['date_modification_fichier_db']
-                        writer.writerow(header)
-                        for row in cur.fetchall():
-                            writer.writerow(list(row) + [mtime])
+                    _export_table(cur, table_name, out_csv_path, mtime)
                     exported.append(f"{entry.rel_path} -> {table_name}")
-            
+
         except sqlite3.Error as e:
             logging.error(f"Erreur SQLite sur {entry.rel_path}: {e}")
-        finally:
-            if conn:
-                conn.close()
-            if temp_db_path and os.path.exists(temp_db_path):
-                os.unlink(temp_db_path)
-                
+
     return exported
@@ -23,7 +23,7 @@ import base64
 import json
 import logging
 import datetime
-from core_scanner import iter_entries, iter_text_lines_entry, should_skip, open_csv, read_text_cached
+from core_scanner import iter_text_entries, iter_text_lines_entry, open_csv, read_text_cached
 
 USER_RE = re.compile(r"autelId='([^']*)',\s*nickname='([^']*)'")
 KV_RE = {
@@ -42,6 +42,8 @@ KV_RE = {
 JWT_RE = re.compile(r'eyJ[A-Za-z0-9_\-]+\.(eyJ[A-Za-z0-9_\-]+)\.')
 EMAIL_RE = re.compile(r'[A-Za-z0-9._%+\-]+@[A-Za-z0-9.\-]+\.[A-Za-z]{2,}')
 
+WANTS = [{'include_ext': ('.log', '.txt')}]
+
 
 def userid_to_creation(uid):
     """userId (ns depuis epoch Unix) -> date de création UTC, ou '' si implausible."""
@@ -168,9 +170,7 @@ def extract_account(src_dir, export_dir, skip_md5=None, **kwargs):
     identique à l'orchestrateur, mais pour ce seul module)."""
     c = AccountConsumer()
     try:
-        for entry in iter_entries(src_dir, include_ext=('.log', '.txt')):
-            if entry.is_os and should_skip(entry.path, skip_md5):
-                continue
+        for entry in iter_text_entries(src_dir, skip_md5=skip_md5):
             c.feed(entry, read_text_cached(entry))
     except Exception as e:
         logging.warning(f"extract_account: {e}")
@@ -18,7 +18,7 @@ import re
 import csv
 import logging
 import datetime
-from core_scanner import iter_entries, iter_text_lines_entry, should_skip, open_csv, read_text_cached
+from core_scanner import iter_text_entries, iter_text_lines_entry, open_csv, read_text_cached
 
 try:
     from extract_mac import load_oui_db, get_vendor
@@ -33,6 +33,8 @@ NAME_MAC_RE = re.compile(MAC_RE + r'[^\n]{0,30}?\bname\b[^A-Za-z0-9]{0,4}([A-Za-
 GETNAME_RE = re.compile(r'getname:\s*([A-Za-z0-9 _\-\[\]]{2,30})', re.I)
 TS_RE = re.compile(r'(?:^|\s)(\d{2})-(\d{2})\s+(\d{2}:\d{2}:\d{2})')  # log Android: MM-DD HH:MM:SS
 
+WANTS = [{'include_ext': ('.log', '.txt')}]
+
 
 def _is_random(mac):
     try:
@@ -126,9 +128,7 @@ def extract_bluetooth(src_dir, export_dir, skip_md5=None, **kwargs):
     identique à l'orchestrateur, mais pour ce seul module)."""
     c = BluetoothConsumer()
     try:
-        for entry in iter_entries(src_dir, include_ext=('.log', '.txt')):
-            if entry.is_os and should_skip(entry.path, skip_md5):
-                continue
+        for entry in iter_text_entries(src_dir, skip_md5=skip_md5):
             c.feed(entry, read_text_cached(entry))
     except Exception as e:
         logging.warning(f"extract_bluetooth: {e}")
@@ -34,6 +34,8 @@ HEADER = [
     'ip_locale', 'index_file', 'source_path'
 ]
 
+WANTS = [{'include_ext': ('.json',)}]
+
 def _ts_from_name(name):
     """Le préfixe du nom est un epoch_ms — utile si le JSON ne contient pas de date."""
     try:
@@ -1,25 +1,134 @@
 # extract_dcim_media.py (version VFS)
 # Auteur : Vincent Chapeau — Teel Technologies Canada (vincent.chapeau@teeltechcanada.com)
+#
+# Copie des médias des dossiers DCIM (index des chemins : seuls les fichiers
+# sous un dossier DCIM sont visités).
+#   - Copie EN FLUX, jamais de lecture intégrale en mémoire (une vidéo peut
+#     faire plusieurs Go) : fichier du disque -> os.copy_file_range / sendfile
+#     (copie noyau), sinon tampon borné ; membre d'archive -> tampon borné.
+#   - Copies concurrentes sur un pool de threads (I/O), résultat dans l'ordre
+#     du listing ; avec --physical-order, lues dans l'ordre physique du support.
+#   - --dcim-dedup (dcim_dedup=True) : SHA-256 calculé pendant la copie ; un
+#     média déjà exporté n'est pas stocké une seconde fois, son chemin devient
+#     un lien physique vers le premier exemplaire (copie si le système de
+#     fichiers ne gère pas les liens).
 import os
+import sys
+import shutil
+import hashlib
 import logging
-from core_scanner import iter_entries
-
-def extract_dcim_media(src_dir, export_dir, **kwargs):
-    media_found = []
-    MEDIA_EXT = ('.jpg','.jpeg','.png','.mp4','.mov')
-    
-    for entry in iter_entries(src_dir):
-        if '/dcim/' in entry.rel_path.lower() and entry.rel_path.lower().endswith(MEDIA_EXT):
-            try:
-                relative_path = entry.rel_path.lstrip('/')
-                dst_path = os.path.join(export_dir, relative_path)
-                os.makedirs(os.path.dirname(dst_path), exist_ok=True)
-                
-                with entry.open_binary() as f_in, open(dst_path, 'wb') as f_out:
-                    f_out.write(f_in.read())
-                
-                media_found.append(relative_path)
-            except Exception as e:
-                logging.warning(f"Copie DCIM échouée pour {entry.rel_path}: {e}")
-                
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from core_scanner import iter_entries, logical_order
+
+MEDIA_EXT = ('.jpg', '.jpeg', '.png', '.mp4', '.mov')
+DCIM_DIR = '/dcim/'   # toute casse (under_icase) : DCIM, Dcim, dCIM… sur FAT/exFAT
+_COPY_BUF = 1024 * 1024
+_KERNEL_CHUNK = 64 * 1024 * 1024
+_COPY_THREADS = 8
+
+WANTS = [{'include_ext': MEDIA_EXT, 'under_icase': DCIM_DIR}]
+
+def _copy_fd(fin, fout):
+    """Copie fd -> fd : copy_file_range, puis sendfile, puis tampon borné
+    (chaque méthode reprend là où la précédente s'est arrêtée)."""
+    size = os.fstat(fin).st_size
+    sent = 0
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while sent < size:
+                n = os.copy_file_range(fin, fout, min(size - sent, _KERNEL_CHUNK))
+                if not n:
+                    break
+                sent += n
+        except OSError:
+            pass
+    if sent < size and hasattr(os, 'sendfile') and sys.platform.startswith('linux'):
+        os.lseek(fout, sent, os.SEEK_SET)
+        try:
+            while sent < size:
+                n = os.sendfile(fout, fin, sent, min(size - sent, _KERNEL_CHUNK))
+                if not n:
+                    break
+                sent += n
+        except OSError:
+            pass
+    os.lseek(fin, sent, os.SEEK_SET)
+    os.lseek(fout, sent, os.SEEK_SET)
+    while True:
+        buf = os.read(fin, _COPY_BUF)
+        if not buf:
+            break
+        while buf:
+            buf = buf[os.write(fout, buf):]
+
+def _copy_plain(entry, dst_path):
+    # open_binary : chemin long Windows (\\?\) pour un fichier du disque
+    with entry.open_binary() as f_in, open(dst_path, 'wb') as f_out:
+        if entry.is_os:
+            _copy_fd(f_in.fileno(), f_out.fileno())
+        else:
+            shutil.copyfileobj(f_in, f_out, _COPY_BUF)
+
+def _copy_hashed(entry, dst_path):
+    h = hashlib.sha256()
+    with entry.open_binary() as f_in, open(dst_path, 'wb') as f_out:
+        while True:
+            buf = f_in.read(_COPY_BUF)
+            if not buf:
+                break
+            h.update(buf)
+            f_out.write(buf)
+    return h.hexdigest()
+
+class _DedupStore:
+    """SHA-256 -> premier chemin exporté ; les doublons deviennent des liens."""
+    def __init__(self):
+        self.first = {}
+        self.linked = 0
+        self._lock = threading.Lock()
+
+    def export(self, entry, dst_path):
+        tmp = dst_path + '.part'
+        digest = _copy_hashed(entry, tmp)
+        with self._lock:
+            original = self.first.get(digest)
+            if original is None:
+                os.replace(tmp, dst_path)
+                self.first[digest] = dst_path
+                return
+            self.linked += 1
+        os.remove(tmp)
+        if os.path.exists(dst_path):
+            os.remove(dst_path)
+        try:
+            os.link(original, dst_path)
+        except OSError:
+            shutil.copyfile(original, dst_path)   # FAT/exFAT, autre volume…
+
+def extract_dcim_media(src_dir, export_dir, dcim_dedup=False, **kwargs):
+    store = _DedupStore() if dcim_dedup else None
+
+    def _export(entry):
+        relative_path = entry.rel_path.lstrip('/')
+        try:
+            dst_path = os.path.join(export_dir, relative_path)
+            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+            if store is not None:
+                store.export(entry, dst_path)
+            else:
+                _copy_plain(entry, dst_path)
+            return relative_path
+        except Exception as e:
+            logging.warning(f"Copie DCIM échouée pour {entry.rel_path}: {e}")
+            return None
+
+    entries = list(iter_entries(src_dir, include_ext=MEDIA_EXT, under_icase=DCIM_DIR, physical=True))
+    if not entries:
+        return []
+    with ThreadPoolExecutor(max_workers=min(_COPY_THREADS, len(entries))) as pool:
+        exported = list(zip(entries, pool.map(_export, entries)))
+    media_found = [p for _e, p in logical_order(exported, entry_of=lambda r: r[0]) if p is not None]
+    if store is not None and store.linked:
+        logging.info(f"DCIM : {store.linked} doublon(s) exporté(s) en lien physique")
     return media_found
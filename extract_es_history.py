@@ -22,34 +22,23 @@
 
 import csv
 import logging
-import os
-import sqlite3
-import tempfile
-from core_scanner import iter_entries, open_csv
+from core_scanner import iter_entries, open_csv, open_db, DB_SIDECARS
 
 VISIT_HEADER = ['id', 'isdir', 'title', 'path', 'source_path']
 APPS_HEADER  = ['package', 'app_name', 'source_path']
-
-def _open_db_copy(entry):
-    tmp = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
-    try:
-        with entry.open_binary() as src:
-            tmp.write(src.read())
-        tmp.flush(); tmp.close()
-        return sqlite3.connect(f"file:{tmp.name}?mode=ro", uri=True), tmp.name
-    except Exception:
-        try: tmp.close()
-        except Exception: pass
-        return None, None
+ES_VISIT_HISTORY = 'com.estrongs.android.pop/cache/visit_history'
+ES_APPINFO       = 'com.estrongs.android.pop/appinfo.db'
+ES_DATABASES     = (ES_VISIT_HISTORY, ES_APPINFO)
+WANTS = [{'suffix': ES_DATABASES + DB_SIDECARS}]
 
 def extract_es_history(src_dir, export_dir, skip_md5=None, **kwargs):
     visit_rows, app_rows = [], []
 
-    for entry in iter_entries(src_dir):
+    for entry in iter_entries(src_dir, suffix=ES_DATABASES):
         rel = entry.rel_path.replace('\\', '/')
 
-        if rel.endswith('com.estrongs.android.pop/cache/visit_history'):
-            conn, tmppath = _open_db_copy(entry)
+        if rel.endswith(ES_VISIT_HISTORY):
+            conn = open_db(entry)
             if not conn:
                 continue
             try:
@@ -59,14 +48,9 @@ def extract_es_history(src_dir, export_dir, skip_md5=None, **kwargs):
                         visit_rows.append([r[0], r[1], r[2] or '', r[3] or '', rel])
             except Exception as e:
                 logging.warning(f"visit_history read fail : {e}")
-            finally:
-                try: conn.close()
-                except Exception: pass
-                try: os.unlink(tmppath)
-                except Exception: pass
 
-        elif rel.endswith('com.estrongs.android.pop/appinfo.db'):
-            conn, tmppath = _open_db_copy(entry)
+        elif rel.endswith(ES_APPINFO):
+            conn = open_db(entry)
             if not conn:
                 continue
             try:
@@ -76,11 +60,6 @@ def extract_es_history(src_dir, export_dir, skip_md5=None, **kwargs):
                         app_rows.append([r[0] or '', r[1] or '', rel])
             except Exception as e:
                 logging.warning(f"appinfo.db read fail : {e}")
-            finally:
-                try: conn.close()
-                except Exception: pass
-                try: os.unlink(tmppath)
-                except Exception: pass
 
     if not visit_rows and not app_rows:
         return []
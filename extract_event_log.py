@@ -30,6 +30,8 @@ HEADER = ['filename', 'timestamp_ms', 'datetime_local', 'size_raw_chars',
           'size_decoded_bytes', 'preview_hex', 'preview_ascii',
           'source_path', 'exported_hex', 'exported_bin']
 
+WANTS = [{'under': '/Scan/EventLog/'}]
+
 def _printable(b):
     """Renvoie une string où les bytes non-printables sont remplacés par '.'."""
     return ''.join((chr(x) if 32 <= x < 127 else '.') for x in b)
@@ -38,10 +40,8 @@ def extract_event_log(src_dir, export_dir, skip_md5=None, **kwargs):
     rows = []
     out_dir = os.path.join(export_dir, 'event_log')
 
-    for entry in iter_entries(src_dir):
+    for entry in iter_entries(src_dir, under='/Scan/EventLog/'):
         rel = entry.rel_path.replace('\\', '/')
-        if '/Scan/EventLog/' not in '/' + rel:
-            continue
         name = os.path.basename(rel)
         if not name.isdigit():
             continue
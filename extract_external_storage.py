@@ -15,39 +15,25 @@
 
 import csv
 import logging
-import os
 import re
-import sqlite3
-import tempfile
 from collections import defaultdict
-from core_scanner import iter_entries, iter_text_lines_entry, open_csv
+from core_scanner import iter_entries, iter_text_lines_entry, open_csv, open_db, DB_SIDECARS
+from extract_es_history import ES_VISIT_HISTORY
 
 HEADER = ['volume_id', 'mount_path', 'nb_paths_seen', 'sample_paths', 'sources']
 
 # UUID FAT32/exFAT : 4 hex - 4 hex (DE56-731B)
 VOL_RE = re.compile(r'/storage/([0-9A-Fa-f]{4}-[0-9A-Fa-f]{4})(/[^"\s\\]*)?')
 
-def _open_db_copy(entry):
-    tmp = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
-    try:
-        with entry.open_binary() as src:
-            tmp.write(src.read())
-        tmp.flush(); tmp.close()
-        return sqlite3.connect(f"file:{tmp.name}?mode=ro", uri=True), tmp.name
-    except Exception:
-        try: tmp.close()
-        except Exception: pass
-        return None, None
+TEXT_EXT = ('.json', '.log', '.txt', '.ini')
+WANTS = [{'suffix': (ES_VISIT_HISTORY,) + DB_SIDECARS}, {'include_ext': TEXT_EXT}]
 
 def extract_external_storage(src_dir, export_dir, skip_md5=None, **kwargs):
     volumes = defaultdict(lambda: {'paths': set(), 'sources': set()})
 
     # 1. visit_history ES File Explorer
-    for entry in iter_entries(src_dir):
-        rel = entry.rel_path.replace('\\', '/')
-        if not rel.endswith('com.estrongs.android.pop/cache/visit_history'):
-            continue
-        conn, tmppath = _open_db_copy(entry)
+    for entry in iter_entries(src_dir, suffix=ES_VISIT_HISTORY):
+        conn = open_db(entry)
         if not conn: continue
         try:
             for r in conn.execute("SELECT path FROM visit_history"):
@@ -58,14 +44,9 @@ def extract_external_storage(src_dir, export_dir, skip_md5=None, **kwargs):
                     volumes[vid]['sources'].add('ES_visit_history')
         except Exception as e:
             logging.warning(f"visit_history scan fail : {e}")
-        finally:
-            try: conn.close()
-            except Exception: pass
-            try: os.unlink(tmppath)
-            except Exception: pass
 
     # 2. Update lists + autres .json
-    for entry in iter_entries(src_dir, include_ext=('.json', '.log', '.txt', '.ini')):
+    for entry in iter_entries(src_dir, include_ext=TEXT_EXT):
         rel = entry.rel_path.replace('\\', '/')
         try:
             for line in iter_text_lines_entry(entry):
@@ -23,6 +23,8 @@ from core_scanner import iter_entries, open_csv
 IMG_EXT = ('.jpg', '.jpeg', '.png')
 JWT_RE = re.compile(r'eyJ[A-Za-z0-9_\-]+\.(eyJ[A-Za-z0-9_\-]+)\.')
 
+WANTS = [{'include_ext': IMG_EXT}]
+
 
 def _decode_jwt(b64):
     b64 += "=" * (-len(b64) % 4)
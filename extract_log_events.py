@@ -25,6 +25,8 @@ PATTERNS = {
     "GENERIC_EXCEPTION": re.compile(r'(Exception:.*)')
 }
 
+WANTS = [{'include_ext': ('.log', '.txt')}]
+
 def extract_all_log_events(src_dir, export_dir, skip_md5=None, **kwargs):
     header = ['source_path','line_number','event_type','detail_1','detail_2','detail_3','detail_4','detail_5', 'date_modification']
     f_csv, writer = open_csv(export_dir, 'log_events_found.csv', header)
@@ -7,6 +7,8 @@ import logging
 import datetime
 from core_scanner import iter_entries, iter_text_lines_entry, open_csv, should_skip
 
+WANTS = [{'include_ext': ('.log', '.txt')}]
+
 def load_oui_db(csvfile):
     """Charge la base de données OUI pour mapper les MAC aux constructeurs."""
     oui_db = {}
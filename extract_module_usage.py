@@ -20,38 +20,24 @@
 import csv
 import json
 import logging
-import os
 import re
-import sqlite3
-import tempfile
 import datetime
-from core_scanner import iter_entries, open_csv
+from core_scanner import iter_entries, open_csv, open_db, DB_SIDECARS
 
 HEADER = [
     'module_id', 'car_name', 'version_installee', 'lib_size_MB',
     'freq_utilisation', 'app_use_num', 'app_all_use_num',
     'update_local_version', 'update_cloud_version', 'icon_url'
 ]
-
-def _open_db_copy(entry):
-    """Copie l'entry vers un fichier temp puis ouvre la DB en read-only."""
-    tmp = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
-    try:
-        with entry.open_binary() as src:
-            tmp.write(src.read())
-        tmp.flush(); tmp.close()
-        conn = sqlite3.connect(f"file:{tmp.name}?mode=ro", uri=True)
-        return conn, tmp.name
-    except Exception:
-        try: tmp.close()
-        except Exception: pass
-        return None, None
+SOURCE_FILES = ('/Update/.FREQUENCY', 'Scan/Update/.AllUpdateList',
+                'Scan/Update/.UpdateList', '/CopyInfos.db')
+WANTS = [{'suffix': SOURCE_FILES + DB_SIDECARS}]
 
 def extract_module_usage(src_dir, export_dir, skip_md5=None, **kwargs):
     freq, carbase, catalog = {}, {}, {}
 
     # 1. FREQUENCY
-    for entry in iter_entries(src_dir):
+    for entry in iter_entries(src_dir, suffix=SOURCE_FILES):
         rel = entry.rel_path.replace('\\', '/')
         if rel.endswith('Scan/Update/.FREQUENCY') or rel.endswith('/Update/.FREQUENCY'):
             try:
@@ -82,7 +68,7 @@ def extract_module_usage(src_dir, export_dir, skip_md5=None, **kwargs):
                 logging.debug(f"UpdateList parse fail {rel}: {e}")
 
         elif rel.endswith('copyData/CopyInfos.db') or rel.endswith('/CopyInfos.db'):
-            conn, tmppath = _open_db_copy(entry)
+            conn = open_db(entry)
             if not conn: continue
             try:
                 cur = conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
@@ -91,11 +77,6 @@ def extract_module_usage(src_dir, export_dir, skip_md5=None, **kwargs):
                         carbase[r[0]] = {'name': r[1] or '', 'version': r[2] or '', 'size': r[3] or 0}
             except Exception as e:
                 logging.warning(f"CARBASE_INFO read fail : {e}")
-            finally:
-                try: conn.close()
-                except Exception: pass
-                try: os.unlink(tmppath)
-                except Exception: pass
 
     if not freq and not carbase:
         return []
@@ -11,6 +11,8 @@ SN_RE = re.compile(r'(?:device_serialno|deviceSn|sn)\s*[:=]\s*([\w-]+)', re.IGNO
 PWD_RE = re.compile(r'(?:device_password|password|pwd)\s*[:=]\s*(\S+)', re.IGNORECASE)
 JSON_INLINE = re.compile(r'queryAppInfo\s+encrypt\s+strJson\s*=\s*(\{.*\})\s*$', re.IGNORECASE)
 
+WANTS = [{'include_ext': ('.log', '.txt')}]
+
 def extract_passwords(src_dir, export_dir, skip_md5=None, **kwargs):
     f_csv, w = open_csv(export_dir, 'pwd_sn_found.csv', ['source_path', 'serial', 'password', 'format_source', 'date_modification'])
     seen, results = set(), []
@@ -34,6 +34,9 @@ TARGETS = {
     '/.jpush/.jdevice_id_map.bat':       ('jpush_map',        'JPUSH_MAP'),
     '/.jpush/.jpush_uid.bat':            ('jpush_uid',        'JPUSH_UID'),
 }
+TARGET_DIRS = tuple(k for k in TARGETS if k.endswith('/'))
+TARGET_FILES = tuple(k for k in TARGETS if not k.endswith('/'))
+WANTS = [{'under': TARGET_DIRS, 'suffix': TARGET_FILES}]
 
 def _match(rel):
     """Retourne (label, type) si l'entry correspond à un target connu."""
@@ -60,7 +63,7 @@ def extract_secrets(src_dir, export_dir, skip_md5=None, **kwargs):
     rows = []
     out_dir = os.path.join(export_dir, 'secrets')
 
-    for entry in iter_entries(src_dir):
+    for entry in iter_entries(src_dir, under=TARGET_DIRS, suffix=TARGET_FILES):
         label, kind = _match(entry.rel_path)
         if not kind:
             continue
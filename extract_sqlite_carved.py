@@ -0,0 +1,116 @@
+# extract_sqlite_carved.py — AFAP
+# Auteur : Vincent Chapeau — Teel Technologies Canada (vincent.chapeau@teeltechcanada.com)
+#
+# Module 'carve' : récupération d'enregistrements SUPPRIMÉS dans les bases
+# SQLite de l'extraction (pages de la freelist, espace non alloué et freeblocks
+# des feuilles de table) — voir sqlite_carver.py pour la méthode et ses limites.
+#
+# Bases traitées : celles que localisent export_sqlite_tables (.db/.sqlite/.db3)
+# et extract_es_history (visit_history sans extension), matérialisées par le
+# service du run (core_scanner.db_local_path) : une base déjà copiée par un
+# autre module n'est pas recopiée. Les bases sont traitées UNE à la fois ; les
+# pages de chacune sont réparties par tranches sur un pool de processus (créé
+# une fois, à la première base assez grosse), chaque worker travaillant sur un
+# mmap du fichier (repli séquentiel en cas d'échec du multiprocessing).
+#
+# Sortie : sqlite_carved_records.csv (une ligne par enregistrement récupéré,
+# valeurs en JSON {colonne: valeur}, BLOB en hexadécimal).
+
+import os
+import json
+import logging
+import multiprocessing
+from core_scanner import iter_entries, open_csv, db_local_path, DB_SIDECARS
+from export_sqlite_tables import DB_EXT
+from extract_es_history import ES_DATABASES
+from sqlite_format import read_header
+from sqlite_carver import db_layout, carve_pages
+
+HEADER = ['chemin_base', 'table', 'origine', 'page', 'offset', 'rowid', 'valeurs']
+_PAGES_PER_TASK = 1024
+_MAX_PROCS = 8
+
+WANTS = [{'include_ext': DB_EXT}, {'suffix': ES_DATABASES + DB_SIDECARS}]
+
+def _is_sqlite(entry):
+    try:
+        with entry.open_binary() as f:
+            return read_header(f.read(100)) is not None
+    except Exception:
+        return False
+
+def _db_entries(src_dir):
+    seen = set()
+    for entry in iter_entries(src_dir, include_ext=DB_EXT):
+        seen.add(entry.rel_path)
+        yield entry
+    for entry in iter_entries(src_dir, suffix=ES_DATABASES):
+        if entry.rel_path not in seen:
+            yield entry
+
+def _json_value(v):
+    return v.hex() if isinstance(v, bytes) else v
+
+def _open_pool():
+    nproc = min(os.cpu_count() or 1, _MAX_PROCS)
+    if nproc < 2:
+        return None
+    try:
+        pool = multiprocessing.Pool(processes=nproc)
+    except Exception as e:
+        logging.warning(f"Carving SQLite : multiprocessing indisponible ({e}) -> séquentiel")
+        return None
+    logging.info(f"Carving SQLite : pool de {nproc} procs")
+    return pool
+
+def _run_tasks(tasks, pool):
+    """Résultats de carve_pages dans l'ordre des tâches (pool ou séquentiel)."""
+    if pool is not None and len(tasks) >= 2:
+        try:
+            return pool.map(carve_pages, tasks)
+        except Exception as e:
+            logging.warning(f"Carving SQLite : échec du pool ({e}) -> séquentiel")
+    return [carve_pages(t) for t in tasks]
+
+def extract_sqlite_carved(src_dir, export_dir, skip_md5=None, **kwargs):
+    rows = []
+    pool, pool_tried = None, False
+    try:
+        for entry in _db_entries(src_dir):
+            if not _is_sqlite(entry):
+                continue
+            path, immutable = db_local_path(entry)
+            if path is None:
+                continue
+            try:
+                layout = db_layout(path, immutable)
+            except Exception as e:
+                logging.warning(f"Carving SQLite : schéma illisible {entry.rel_path}: {e}")
+                continue
+            if layout is None:
+                continue
+            ctx, pages = layout
+            tasks = [(path, ctx, pages[i:i + _PAGES_PER_TASK])
+                     for i in range(0, len(pages), _PAGES_PER_TASK)]
+            if len(tasks) >= 2 and not pool_tried:
+                pool, pool_tried = _open_pool(), True
+            for found in _run_tasks(tasks, pool):
+                for tidx, origin, pgno, offset, rowid, values in found:
+                    name, _, cols, _, _ = ctx['tables'][tidx]
+                    rows.append([entry.rel_path, name, origin, pgno, offset, '' if rowid is None else rowid,
+                                 json.dumps({c: _json_value(v) for c, v in zip(cols, values)},
+                                            ensure_ascii=False)])
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    if not rows:
+        return []
+
+    f, w = open_csv(export_dir, 'sqlite_carved_records.csv', HEADER)
+    try:
+        w.writerows(rows)
+    finally:
+        f.close()
+    logging.info(f"Carving SQLite : {len(rows)} enregistrement(s) récupéré(s)")
+    return rows
@@ -9,6 +9,8 @@ from core_scanner import iter_entries, iter_text_lines_entry, should_skip, open_
 UID_RE = re.compile(r'\buserId\s*[:=]\s*(\d+)\b', re.IGNORECASE)
 URL_RE = re.compile(r'https?://[^\s\'"]+', re.IGNORECASE)
 
+WANTS = [{'include_ext': ('.log', '.txt')}]
+
 def extract_user_and_endpoints(src_dir, export_dir, skip_md5=None, **kwargs):
     fu, wu = open_csv(export_dir, 'userId_found.csv', ['source_path', 'userId', 'date_modification'])
     fe, we = open_csv(export_dir, 'endpoints_found.csv', ['source_path', 'endpoint', 'date_modification'])
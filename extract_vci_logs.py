@@ -49,6 +49,8 @@ PATTERNS = {
     'KEY_OP_RESULT':       re.compile(r'FuncResult[":=\s]+["\']?(success|fail|failed|ok)', re.I),
 }
 
+WANTS = [{'include_ext': ('.log',)}]
+
 def _parse_header(entry):
     """Lit l'en-tête (lignes en clair avant la première ligne timestampée)."""
     h = {'sn': '', 'product': '', 'os': '', 'vci_model': '', 'vci_fw': ''}
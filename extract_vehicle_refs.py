@@ -10,6 +10,8 @@ RE_MAIN_ITEM = re.compile(r'"mainItem"\s*:\s*"(?P<brand>\w+)\s+(?P<model>.*?)\s+
 RE_REF = re.compile(r'Reference\s+(OEM|FCCID)\s*[:=]\s*([^\s"]+)', re.IGNORECASE)
 JUNK = {'system','menu','path','read','code','all','obd','selection'}
 
+WANTS = [{'include_ext': ('.json', '.txt', '.log')}]
+
 def extract_vehicle_refs(src_dir, export_dir, skip_md5=None, **kwargs):
     header = ['source_path', 'type', 'marque', 'modele', 'annees', 'reference', 'date_modification']
     f_csv, w = open_csv(export_dir, 'vehicule_refs_found.csv', header)
@@ -1,8 +1,14 @@
 # extract_vins.py
 # Auteur : Vincent Chapeau — Teel Technologies Canada (vincent.chapeau@teeltechcanada.com)
-import csv, datetime, logging, re
+import os, csv, datetime, logging, re, mmap, multiprocessing
 from wmi_list import WMI_SET
-from core_scanner import iter_entries, iter_binary_chunks_entry, open_csv, should_skip
+from core_scanner import (iter_entries, iter_binary_chunks_entry, open_csv, should_skip, long_path_aware,
+                          logical_order, end_binary_scan, shares_buffer)
+try:
+    import numpy as np
+    _HAS_NUMPY = True
+except ImportError:
+    _HAS_NUMPY = False
 
 VIN_REGEX = re.compile(rb'(?=([A-HJ-NPR-Z0-9]{17}))')
 EXCLUDE_EXT = {'.apk', '.jpg', '.jpeg', '.png', '.gif', '.mp4', '.mov', '.avi', '.zip', '.7z', '.db'}
@@ -12,6 +18,8 @@ TRANSLIT.update({ord(c): v for c, v in zip('JKLMNPR', [1, 2, 3, 4, 5, 7, 9])})
 TRANSLIT.update({ord(c): v for c, v in zip('STUVWXYZ', [2, 3, 4, 5, 6, 7, 8, 9])})
 WEIGHTS = [8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2]
 
+WANTS = [{'exclude_ext': EXCLUDE_EXT}]   # scan binaire : tout sauf médias/archives
+
 def _check_digit(vin: str) -> bool:
     try:
         total = sum(TRANSLIT[ord(char)] * WEIGHTS[i] for i, char in enumerate(vin))
@@ -21,31 +29,197 @@ def _check_digit(vin: str) -> bool:
 
 def _valid_wmi(vin: str) -> bool: return vin[:3] in WMI_SET
 
+def _scan_regex(blob, found):
+    for m in VIN_REGEX.finditer(blob):
+        vin = m.group(1).decode('ascii', 'ignore').upper()
+        if _valid_wmi(vin): found.add(vin)
+
+# --- Moteur NumPy (optionnel) ---------------------------------------------------
+# Même résultat que VIN_REGEX + _valid_wmi, mais vectorisé : masque de l'alphabet
+# VIN par table de 256 octets, séries d'au moins 17 octets, WMI comparé sous forme
+# d'entier 3 octets empaqueté, dédoublonnage par vue 'S17', clé de contrôle
+# ISO 3779 calculée en lot. Blocs de 16 Mo (+16 octets de recouvrement) pour
+# borner la mémoire sur les gros fichiers / mmap ; les fenêtres d'un bloc sont
+# traitées par tranches de _NP_WINDOWS (une longue série alphanumérique, base64
+# ou hex, en produirait autant que d'octets).
+_NP_BLOCK = 16 * 1024 * 1024
+_NP_WINDOWS = 256 * 1024
+if _HAS_NUMPY:
+    _ALPHA_LUT = np.zeros(256, dtype=bool)
+    _ALPHA_LUT[list(b'ABCDEFGHJKLMNPRSTUVWXYZ0123456789')] = True
+    _TRANSLIT_LUT = np.zeros(256, dtype=np.int64)
+    for _code, _val in TRANSLIT.items(): _TRANSLIT_LUT[_code] = _val
+    _WEIGHTS_NP = np.array(WEIGHTS, dtype=np.int64)
+    _WMI_PACKED = np.array(sorted((ord(w[0]) << 16) | (ord(w[1]) << 8) | ord(w[2])
+                                  for w in WMI_SET if len(w) == 3), dtype=np.int32)
+    _OFFS17 = np.arange(17)
+
+def _scan_block_np(a, found):
+    ok = _ALPHA_LUT[a]
+    edges = np.diff(ok.view(np.int8), prepend=np.int8(0), append=np.int8(0))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    n_win = ends - starts - 16              # fenêtres de 17 par série
+    keep = n_win > 0
+    if not keep.any(): return
+    starts, n_win = starts[keep], n_win[keep]
+    # fenêtres numérotées globalement : la série r couvre [first[r], first[r] + n_win[r])
+    first = np.cumsum(n_win) - n_win
+    total = int(first[-1] + n_win[-1])
+    for g0 in range(0, total, _NP_WINDOWS):
+        g = np.arange(g0, min(g0 + _NP_WINDOWS, total))
+        r = np.searchsorted(first, g, side='right') - 1
+        idx = starts[r] + (g - first[r])     # position de départ de chaque fenêtre
+        wmi = (a[idx].astype(np.int32) << 16) | (a[idx + 1].astype(np.int32) << 8) | a[idx + 2]
+        idx = idx[np.isin(wmi, _WMI_PACKED)]
+        if not idx.size: continue
+        cands = np.ascontiguousarray(a[idx[:, None] + _OFFS17]).view('S17').ravel()
+        found.update(v.decode('ascii') for v in np.unique(cands))
+
+def _scan_numpy(blob, found):
+    a = np.frombuffer(blob, dtype=np.uint8)
+    try:
+        for off in range(0, len(a), _NP_BLOCK):
+            block = a[off:off + _NP_BLOCK + 16]
+            if len(block) >= 17: _scan_block_np(block, found)
+    finally:
+        del a   # libère la vue (le mmap pourra être fermé)
+
+def _check_digits(vins):
+    """{vin: clé valide} pour une liste de VIN (en lot si NumPy est présent)."""
+    if not _HAS_NUMPY or not vins: return {v: _check_digit(v) for v in vins}
+    arr = np.frombuffer(''.join(vins).encode('ascii'), dtype=np.uint8).reshape(-1, 17)
+    check = (_TRANSLIT_LUT[arr] @ _WEIGHTS_NP) % 11
+    expected = np.where(check == 10, ord('X'), ord('0') + check)
+    return dict(zip(vins, (arr[:, 8] == expected).tolist()))
+
+_scan_blob = _scan_numpy if _HAS_NUMPY else _scan_regex
+
+# --- Parallélisation (source DOSSIER) --------------------------------------
+# Les gros fichiers sont découpés en tranches de _SHARD_BYTES (+16 octets de
+# recouvrement : un VIN à cheval sur deux tranches est vu en entier par la
+# première) ; les petits fichiers sont regroupés par lots d'environ _SHARD_BYTES.
+# Chaque tâche rend {indice fichier: VIN} ; le parent fusionne par fichier et
+# écrit DANS L'ORDRE DES FICHIERS -> CSV identique au scan séquentiel. En cas
+# d'échec du multiprocessing : repli séquentiel (la correction prime).
+_SHARD_BYTES = 64 * 1024 * 1024
+_SHARD_OVERLAP = 16
+_PARALLEL_MIN_BYTES = 32 * 1024 * 1024   # en dessous, le séquentiel est plus rapide
+_MAX_PROCS = 8
+
+def _scan_segments(segments):
+    """Worker : segments [(indice, chemin, début, longueur)] -> {indice: set(VIN)}."""
+    out = {}
+    for fidx, path, start, length in segments:
+        found = out.setdefault(fidx, set())
+        try:
+            with open(long_path_aware(path), 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                view = memoryview(mm)[start:start + length]
+                try:
+                    _scan_blob(view, found)
+                finally:
+                    view.release()
+            finally:
+                mm.close()
+        except (OSError, ValueError) as e:
+            logging.warning(f"Erreur de scan VIN sur {path}: {e}")
+    return out
+
+def _build_tasks(files):
+    """files [(chemin, taille)] -> tâches = listes de segments, dans l'ordre des fichiers."""
+    tasks, batch, batch_bytes = [], [], 0
+    for fidx, (path, size) in enumerate(files):
+        if not size: continue
+        if size > _SHARD_BYTES:
+            if batch: tasks.append(batch); batch, batch_bytes = [], 0
+            for start in range(0, size, _SHARD_BYTES):
+                tasks.append([(fidx, path, start, _SHARD_BYTES + _SHARD_OVERLAP)])
+            continue
+        batch.append((fidx, path, 0, size)); batch_bytes += size
+        if batch_bytes >= _SHARD_BYTES:
+            tasks.append(batch); batch, batch_bytes = [], 0
+    if batch: tasks.append(batch)
+    return tasks
+
+def _scan_parallel(files):
+    """[set(VIN)] par fichier, ou None si le parallèle n'est pas pertinent / a échoué."""
+    total = sum(size for _, size in files)
+    if (os.cpu_count() or 1) < 2 or total < _PARALLEL_MIN_BYTES: return None
+    tasks = _build_tasks(files)
+    if len(tasks) < 2: return None
+    found = [set() for _ in files]
+    try:
+        nproc = min(os.cpu_count() or 1, _MAX_PROCS, len(tasks))
+        with multiprocessing.Pool(processes=nproc) as pool:
+            for res in pool.imap(_scan_segments, tasks):
+                for fidx, vins in res.items(): found[fidx] |= vins
+        logging.info(f"VIN : scan parallèle ({nproc} procs, {len(tasks)} tranches, {len(files)} fichiers)")
+        return found
+    except Exception as e:
+        logging.warning(f"VIN : multiprocessing indisponible ({e}) -> séquentiel")
+        return None
+
+def _entry_size(entry):
+    if entry.size is not None: return entry.size
+    try: return os.path.getsize(long_path_aware(entry.path))
+    except OSError: return 0
+
+def _scan_entry(entry):
+    found = set()
+    for blob in iter_binary_chunks_entry(entry, mmap_os=True):
+        _scan_blob(blob, found)
+    return found
+
+def _scan_entries(entries, found=None):
+    """(entry, set(VIN)) ; found[i] non None : résultat déjà calculé (parallèle)."""
+    for i, entry in enumerate(entries):
+        if found is not None and found[i] is not None:
+            yield entry, found[i]
+            continue
+        try:
+            yield entry, _scan_entry(entry)
+        except Exception as e:
+            logging.warning(f"Erreur de scan VIN sur {entry.rel_path}: {e}")
+
+def _write_rows(writer, rows, entry, found_in_file):
+    if not found_in_file: return
+    try: mtime = datetime.datetime.fromtimestamp(entry.mtime).strftime('%Y-%m-%d %H:%M:%S') if entry.mtime else "Date Inconnue"
+    except Exception: mtime = "Date Inconnue"
+
+    vins = sorted(found_in_file)
+    valid = _check_digits(vins)
+    for vin in vins:
+        statut = 'Valide' if valid[vin] else 'Check Digit Invalide'
+        row = [entry.rel_path, vin, mtime, statut]
+        rows.append(row); writer.writerow(row)
+
 def extract_all_vins(src_dir, export_dir, skip_md5=None, **kwargs):
     rows = []
     f_csv, writer = open_csv(export_dir, 'vins_extraits.csv', ['chemin_fichier','vin','date_modification','statut_validation'])
     try:
-        for entry in iter_entries(src_dir, exclude_ext=EXCLUDE_EXT):
-            if entry.is_os and should_skip(entry.path, skip_md5): continue
-            
-            found_in_file = set()
-            try:
-                for blob in iter_binary_chunks_entry(entry):
-                    for m in VIN_REGEX.finditer(blob):
-                        vin = m.group(1).decode('ascii', 'ignore').upper()
-                        if _valid_wmi(vin): found_in_file.add(vin)
-            except Exception as e:
-                logging.warning(f"Erreur de scan VIN sur {entry.rel_path}: {e}")
-                continue
-
-            if found_in_file:
-                try: mtime = datetime.datetime.fromtimestamp(entry.mtime).strftime('%Y-%m-%d %H:%M:%S') if entry.mtime else "Date Inconnue"
-                except Exception: mtime = "Date Inconnue"
-                
-                for vin in sorted(found_in_file):
-                    statut = 'Valide' if _check_digit(vin) else 'Check Digit Invalide'
-                    row = [entry.rel_path, vin, mtime, statut]
-                    rows.append(row); writer.writerow(row)
+        # Lecture dans l'ordre physique si --physical-order ; CSV dans l'ordre du listing.
+        found = None
+        if os.path.isdir(src_dir):
+            entries = [e for e in iter_entries(src_dir, exclude_ext=EXCLUDE_EXT, physical=True)
+                       if not (e.is_os and should_skip(e.path, skip_md5, e.size))]
+            # Fichiers texte du tampon partagé : hors workers, scannés ici via
+            # read_bytes_cached (lus UNE fois, brut réutilisé par les modules
+            # texte) ; les workers ne relisent que les autres fichiers.
+            shared = [shares_buffer(e) for e in entries]
+            found = _scan_parallel([(e.path, 0 if sh else _entry_size(e))
+                                    for e, sh in zip(entries, shared)])
+            if found is not None:
+                found = [None if sh else f for sh, f in zip(shared, found)]
+        else:
+            entries = (e for e in iter_entries(src_dir, exclude_ext=EXCLUDE_EXT, physical=True)
+                       if not (e.is_os and should_skip(e.path, skip_md5, e.size)))
+
+        results = _scan_entries(entries, found)
+        for entry, found_in_file in logical_order(results, entry_of=lambda r: r[0]):
+            _write_rows(writer, rows, entry, found_in_file)
     finally:
         f_csv.close()
+        end_binary_scan()   # le brut des fichiers texte n'est plus utile au run
     return rows
@@ -3,90 +3,103 @@
 # Contact : vincent.chapeau@teeltechcanada.com
 #
 # Détecte tous les WAL (.db-wal) et SHM (.db-shm) accompagnant les bases
-# SQLite trouvées dans la source. Mesure la taille du WAL et estime le
-# nombre de frames présentes (chaque frame = 24 octets header + page).
+# SQLite trouvées dans la source. Mesure la taille du WAL et compte les
+# frames présentes (chaque frame = 24 octets header + page).
 #
-# IMPORTANT : ce module N'EFFECTUE PAS de carving / récupération de
-# transactions effacées. Il signale uniquement la présence des WAL et
-# fournit assez d'info au rapport pour recommander l'utilisation d'un outil
-# forensique tiers spécialisé (Sanderson Forensics SQLite Recovery,
-# FQLite, Oxygen Forensic SQLite Viewer, BlackBag BlackLight, …).
+# Chaque WAL est lu UNE fois, par mmap (sqlite_format.wal_frames) : pour chaque
+# frame, numéro de page, marqueur de commit, sels et validité de la somme de
+# contrôle. wal_frames.csv en fait un index par page : les frames d'une même
+# page se suivent, avec leur rang de version et le nombre de versions de la
+# page présentes dans le WAL (versions historiques ; frames non commitées ou
+# d'une génération antérieure au dernier checkpoint : lu_par_sqlite = Non).
 #
-# Sortie : wal_indicators.csv
+# La récupération des enregistrements supprimés (freelist, espace non alloué,
+# freeblocks) est faite par le module 'carve' (extract_sqlite_carved) sur les
+# bases matérialisées avec leur WAL. Ce module-ci indexe les frames sans en
+# décoder les enregistrements : wal_frames.csv localise chaque version de page
+# (offset) pour un examen ciblé.
+#
+# Sorties : wal_indicators.csv, wal_frames.csv
 
-import csv
 import logging
-import os
 import struct
-from core_scanner import iter_entries, open_csv
+from collections import Counter
+from core_scanner import iter_entries, open_csv, map_entry
+from sqlite_format import wal_header, wal_frames
 
 HEADER = ['db_path', 'wal_path', 'wal_size_bytes', 'wal_magic',
           'wal_page_size', 'estimated_frames', 'shm_present', 'has_dash_journal']
+FRAMES_HEADER = ['wal_path', 'page', 'version_page', 'nb_versions_page', 'frame', 'offset',
+                 'commit_taille_base', 'salt1', 'salt2', 'salt_ok', 'checksum_ok', 'lu_par_sqlite']
 
 # WAL magic bytes (SQLite3 WAL format, big-endian "0x377f0682" or "0x377f0683")
 WAL_MAGIC = (b'\x37\x7f\x06\x82', b'\x37\x7f\x06\x83')
 
-def _read_wal_header(entry):
-    """Lit les 32 premiers octets d'un WAL et retourne (magic_hex, page_size)."""
+WANTS = [{'suffix': ('-wal', '-shm', '-journal')}]
+
+def _oui(flag):
+    return 'Oui' if flag else 'Non'
+
+def _index_wal(entry, rel, frames_writer):
+    """Un seul passage mmap -> (taille, magic_hex, page_size, nb de frames) ;
+    écrit les frames du WAL dans wal_frames.csv, groupées par page."""
     try:
-        with entry.open_binary() as f:
-            hdr = f.read(32)
-        if len(hdr) < 32:
-            return '', 0
-        magic = hdr[:4]
-        # WAL header: bytes 0-3 magic, 4-7 file format version, 8-11 page size (BE)
-        page_size = struct.unpack('>I', hdr[8:12])[0]
-        return magic.hex(), page_size
-    except Exception:
-        return '', 0
+        with map_entry(entry) as buf:
+            size = len(buf)
+            if size < 32:
+                return size, '', 0, 0
+            # WAL header: bytes 0-3 magic, 4-7 file format version, 8-11 page size (BE)
+            magic_hex = bytes(buf[:4]).hex()
+            page_size = struct.unpack_from('>I', buf, 8)[0]
+            hdr = wal_header(buf)
+            frames = wal_frames(buf, hdr) if hdr else []
+    except Exception as e:
+        logging.warning(f"WAL illisible {rel}: {e}")
+        return entry.size or 0, '', 0, 0
+
+    versions = Counter(fr['page'] for fr in frames)
+    seen = Counter()
+    for fr in sorted(frames, key=lambda x: (x['page'], x['index'])):
+        seen[fr['page']] += 1
+        frames_writer.writerow([rel, fr['page'], seen[fr['page']], versions[fr['page']],
+                                fr['index'], fr['offset'], fr['commit'], fr['salt1'], fr['salt2'],
+                                _oui(fr['salt_ok']), _oui(fr['checksum_ok']), _oui(fr['committed'])])
+    return size, magic_hex, page_size, len(frames)
 
 def extract_wal_indicators(src_dir, export_dir, skip_md5=None, **kwargs):
-    # On parcourt une 1ère fois pour indexer tous les fichiers par chemin
+    # WAL + fichiers compagnons (-shm / -journal), via l'index des chemins
     by_path = {}
-    for entry in iter_entries(src_dir):
+    for entry in iter_entries(src_dir, suffix=('-wal', '-shm', '-journal')):
         rel = entry.rel_path.replace('\\', '/')
         by_path[rel] = entry
 
+    wals = [(rel, entry) for rel, entry in by_path.items() if rel.endswith('-wal')]
+    if not wals:
+        return []
+
     rows = []
-    for rel, entry in by_path.items():
-        # On déclenche sur .db-wal présent
-        if not rel.endswith('-wal'):
-            continue
-        # Le -wal indique une base SQLite (peut-être absente si dump partiel)
-        if rel.endswith('.db-wal') or rel.endswith('.sqlite-wal') or rel.endswith('.db3-wal'):
+    ff, fw = open_csv(export_dir, 'wal_frames.csv', FRAMES_HEADER)
+    try:
+        for rel, entry in wals:
+            # Le -wal indique une base SQLite (peut-être absente si dump partiel) ;
+            # aussi WAL d'un nom sans extension (ex: visit_history-wal)
             db_rel = rel[:-4]   # retire "-wal"
-        else:
-            # WAL d'un nom sans extension (ex: visit_history-wal)
-            db_rel = rel[:-4]
-
-        # Taille WAL
-        try:
-            with entry.open_binary() as f:
-                f.seek(0, 2)
-                size = f.tell()
-        except Exception:
-            size = 0
-        magic_hex, page_size = _read_wal_header(entry)
-        magic_bytes = bytes.fromhex(magic_hex) if magic_hex else b''
-        is_wal = magic_bytes[:4] in WAL_MAGIC
-        # Estimation frames : (size - 32) / (24 + page_size)
-        frames = 0
-        if is_wal and page_size > 0 and size > 32:
-            frames = max(0, (size - 32) // (24 + page_size))
 
-        # SHM associé ?
-        shm_present = (db_rel + '-shm') in by_path
+            size, magic_hex, page_size, frames = _index_wal(entry, rel, fw)
+            is_wal = bytes.fromhex(magic_hex)[:4] in WAL_MAGIC if magic_hex else False
 
-        # -journal présent ? (rollback journal, ancien mode SQLite)
-        has_journal = (db_rel + '-journal') in by_path
+            # SHM associé ?
+            shm_present = (db_rel + '-shm') in by_path
 
-        rows.append([db_rel, rel, size, magic_hex,
-                     page_size if is_wal else 0, frames,
-                     'Oui' if shm_present else 'Non',
-                     'Oui' if has_journal else 'Non'])
+            # -journal présent ? (rollback journal, ancien mode SQLite)
+            has_journal = (db_rel + '-journal') in by_path
 
-    if not rows:
-        return []
+            rows.append([db_rel, rel, size, magic_hex,
+                         page_size if is_wal else 0, frames,
+                         'Oui' if shm_present else 'Non',
+                         'Oui' if has_journal else 'Non'])
+    finally:
+        ff.close()
 
     f, w = open_csv(export_dir, 'wal_indicators.csv', HEADER)
     try:
@@ -19,7 +19,7 @@ import re
 import csv
 import logging
 import datetime
-from core_scanner import iter_entries, iter_text_lines_entry, should_skip, open_csv, read_text_cached
+from core_scanner import iter_text_entries, iter_text_lines_entry, open_csv, read_text_cached
 
 SSID_RE = re.compile(r'(?:SSID[:=]?\s*|"ssid"\s*:\s*\\?")[\'"]?([^\'"\\\n]{1,32})')
 CONNECT_RE = re.compile(r'connectToNetwork\s*"?([^"\n]{1,32})|associate with SSID\s*[\'"]([^\'"\n]{1,32})', re.I)
@@ -28,6 +28,8 @@ GW_RE = re.compile(r'\b(172\.20\.10\.\d{1,3}|192\.168\.\d{1,3}\.\d{1,3}|10\.\d{1
 RSSI_RE = re.compile(r'SignalStrength[:=]?\s*(-?\d{1,3})')
 TS_RE = re.compile(r'(?:^|\s)(\d{2})-(\d{2})\s+(\d{2}:\d{2}:\d{2})')  # log Android MM-DD HH:MM:SS
 
+WANTS = [{'include_ext': ('.log', '.txt')}]
+
 
 class WifiConsumer:
     """Consommateur "passe unique" pour les réseaux WiFi / tethering."""
@@ -165,9 +167,7 @@ def extract_wifi(src_dir, export_dir, skip_md5=None, **kwargs):
     identique à l'orchestrateur, mais pour ce seul module)."""
     c = WifiConsumer()
     try:
-        for entry in iter_entries(src_dir, include_ext=('.log', '.txt')):
-            if entry.is_os and should_skip(entry.path, skip_md5):
-                continue
+        for entry in iter_text_entries(src_dir, skip_md5=skip_md5):
             c.feed(entry, read_text_cached(entry))
     except Exception as e:
         logging.warning(f"extract_wifi: {e}")
@@ -50,6 +50,8 @@ tablette. La colonne date_corrigee de la chronologie contient l'heure recalée
 si un décalage a été renseigné à l'extraction.
 """
 
+WANTS = ()
+
 
 def finalize_export(src_dir, export_dir, skip_md5=None, **kwargs):
     try:
@@ -0,0 +1,603 @@
+# fs_image.py — AFAP
+# Auteur : Vincent Chapeau — Teel Technologies Canada (vincent.chapeau@teeltechcanada.com)
+#
+# Lecture SEULE, en pur Python, des images de partition (userdata.img, carte SD
+# .dd) sans montage ni droits root : ext4 (ext2/3 compris), FAT12/16/32, exFAT.
+#   - Image brute d'un système de fichiers, ou disque entier : table MBR / GPT
+#     lue, chaque partition reconnue exposée sous 'pN/' (ou à la racine s'il
+#     n'y en a qu'une).
+#   - Métadonnées (superbloc, tables d'inodes, répertoires, FAT) lues via un
+#     cache LRU de pages de 64 Ko ; le contenu des fichiers est décrit par ses
+#     EXTENTS (plages physiques) et lu à la demande par un RangeReader
+#     seekable : rien n'est extrait sur disque.
+#   - Seuls les fichiers réguliers sont listés (pas de liens symboliques, ni
+#     de fichiers supprimés). Les noms chiffrés (FBE Android) restent tels
+#     quels. Images Android « sparse » (simg) : convertir d'abord (simg2img).
+
+import io
+import os
+import bisect
+import struct
+import logging
+import datetime
+import threading
+from collections import OrderedDict
+
+_PAGE = 64 * 1024
+_CACHE_BYTES = 64 * 1024 * 1024
+_DIRECT_READ = 256 * 1024          # lectures plus grandes : hors cache (données)
+_SPARSE_MAGIC = 0xED26FF3A
+
+class BlockDevice:
+    """Image ouverte en lecture, cache LRU de pages (thread-safe)."""
+    def __init__(self, path, cache_bytes=_CACHE_BYTES):
+        self.path = path
+        self._f = open(path, 'rb')
+        self.size = os.fstat(self._f.fileno()).st_size
+        self._max_pages = max(1, cache_bytes // _PAGE)
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+        self._pread = getattr(os, 'pread', None)
+        self.stats = {'hit': 0, 'miss': 0}
+
+    def _raw(self, off, n):
+        if self._pread is not None:
+            return self._pread(self._f.fileno(), n, off)
+        with self._lock:
+            self._f.seek(off)
+            return self._f.read(n)
+
+    def _page(self, idx):
+        with self._lock:
+            data = self._pages.get(idx)
+            if data is not None:
+                self._pages.move_to_end(idx)
+                self.stats['hit'] += 1
+                return data
+        data = self._raw(idx * _PAGE, _PAGE)
+        with self._lock:
+            self.stats['miss'] += 1
+            self._pages[idx] = data
+            if len(self._pages) > self._max_pages:
+                self._pages.popitem(last=False)
+        return data
+
+    def read(self, off, n):
+        """n octets à l'offset off (moins en fin d'image)."""
+        if n >= _DIRECT_READ:
+            return self._raw(off, n)
+        out = []
+        while n > 0:
+            idx, start = divmod(off, _PAGE)
+            page = self._page(idx)
+            chunk = page[start:start + n]
+            if not chunk:
+                break
+            out.append(chunk)
+            off += len(chunk)
+            n -= len(chunk)
+        return b''.join(out)
+
+    def close(self):
+        with self._lock:
+            self._pages.clear()
+        self._f.close()
+
+class RangeReader(io.RawIOBase):
+    """Contenu d'un fichier : extents [(offset logique, longueur, offset
+    physique ou None = zéros)] triés ; seekable, lecture à la demande."""
+    def __init__(self, dev, extents, size):
+        self._dev = dev
+        self._ext = extents
+        self._starts = [e[0] for e in extents]
+        self._size = size
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, pos, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            pos += self._pos
+        elif whence == io.SEEK_END:
+            pos += self._size
+        if pos < 0:
+            raise ValueError("position négative")
+        self._pos = pos
+        return pos
+
+    def readinto(self, b):
+        want = min(len(b), self._size - self._pos)
+        if want <= 0:
+            return 0
+        done = 0
+        while done < want:
+            pos = self._pos + done
+            i = bisect.bisect_right(self._starts, pos) - 1
+            lstart, length, phys = self._ext[i] if i >= 0 else (0, 0, None)
+            if lstart <= pos < lstart + length and phys is not None:
+                n = min(want - done, lstart + length - pos)
+                data = self._dev.read(phys + pos - lstart, n)
+                b[done:done + len(data)] = data
+                if len(data) < n:              # image tronquée
+                    done += len(data)
+                    break
+            else:
+                # trou (fichier creux, extent non initialisé, au-delà des
+                # données valides) : zéros jusqu'à l'extent suivant
+                if lstart <= pos < lstart + length:
+                    end = lstart + length
+                else:
+                    end = self._starts[i + 1] if i + 1 < len(self._starts) else self._size
+                n = min(want - done, end - pos)
+                b[done:done + n] = bytes(n)
+            done += n
+        self._pos += done
+        return done
+
+def _runs(items, unit, phys_of):
+    """Unités logiques consécutives [(n° logique, n° physique)] -> extents en
+    octets, les unités physiquement contiguës fusionnées."""
+    ext = []
+    for lno, pno in items:
+        if ext and ext[-1][2] is not None and ext[-1][0] + ext[-1][1] == lno * unit \
+                and ext[-1][2] + ext[-1][1] == phys_of(pno):
+            ext[-1][1] += unit
+        else:
+            ext.append([lno * unit, unit, phys_of(pno)])
+    return ext
+
+def _clip(extents, size):
+    """Extents bornés à `size` octets (la dernière unité est partielle)."""
+    out = []
+    for lstart, length, phys in extents:
+        if lstart >= size:
+            break
+        out.append((lstart, min(length, size - lstart), phys))
+    return out
+
+def _dos_time(date, time_):
+    try:
+        return datetime.datetime(1980 + (date >> 9), (date >> 5) & 0xF, date & 0x1F,
+                                 time_ >> 11, (time_ >> 5) & 0x3F, (time_ & 0x1F) * 2).timestamp()
+    except (ValueError, OverflowError, OSError):
+        return 0.0
+
+# --- ext4 -----------------------------------------------------------------
+_EXT4_MAGIC = 0xEF53
+_EXT4_64BIT = 0x80
+_EXT4_EXTENTS_FL = 0x80000
+_EXT4_INLINE_FL = 0x10000000
+_EXT4_EXT_MAGIC = 0xF30A
+_S_IFMT, _S_IFREG, _S_IFDIR = 0xF000, 0x8000, 0x4000
+
+class Ext4Volume:
+    def __init__(self, dev, offset=0):
+        self.dev, self.offset = dev, offset
+        sb = dev.read(offset + 1024, 1024)
+        if len(sb) < 1024 or struct.unpack_from('<H', sb, 0x38)[0] != _EXT4_MAGIC:
+            raise ValueError("superbloc ext4 absent")
+        self.bs = 1024 << struct.unpack_from('<I', sb, 0x18)[0]
+        self.ipg = struct.unpack_from('<I', sb, 0x28)[0]
+        rev = struct.unpack_from('<I', sb, 0x4C)[0]
+        self.inode_size = struct.unpack_from('<H', sb, 0x58)[0] if rev else 128
+        incompat = struct.unpack_from('<I', sb, 0x60)[0]
+        self.desc_size = (struct.unpack_from('<H', sb, 0xFE)[0] or 64) if incompat & _EXT4_64BIT else 32
+        self.gdt = offset + (struct.unpack_from('<I', sb, 0x14)[0] + 1) * self.bs
+        self._tables = {}
+
+    def _block(self, n):
+        return self.offset + n * self.bs
+
+    def _inode_table(self, group):
+        t = self._tables.get(group)
+        if t is None:
+            d = self.dev.read(self.gdt + group * self.desc_size, self.desc_size)
+            t = struct.unpack_from('<I', d, 0x8)[0]
+            if self.desc_size >= 64:
+                t |= struct.unpack_from('<I', d, 0x28)[0] << 32
+            t = self._tables[group] = self._block(t)
+        return t
+
+    def _inode(self, ino):
+        """(mode, taille, mtime, flags, i_block, offset physique de i_block)."""
+        group, idx = divmod(ino - 1, self.ipg)
+        off = self._inode_table(group) + idx * self.inode_size
+        raw = self.dev.read(off, 0x70)
+        mode, size_lo = struct.unpack_from('<HxxI', raw, 0)
+        mtime = struct.unpack_from('<I', raw, 0x10)[0]
+        flags = struct.unpack_from('<I', raw, 0x20)[0]
+        size = size_lo | (struct.unpack_from('<I', raw, 0x6C)[0] << 32)
+        return mode, size, float(mtime), flags, raw[0x28:0x28 + 60], off + 0x28
+
+    def _extent_tree(self, node, out, depth_left=8):
+        magic, entries, _max, depth = struct.unpack_from('<HHHH', node, 0)
+        if magic != _EXT4_EXT_MAGIC or depth_left <= 0:
+            return
+        for i in range(entries):
+            e = 12 + 12 * i
+            if depth == 0:
+                lblk, length, hi, lo = struct.unpack_from('<IHHI', node, e)
+                uninit = length > 32768
+                length = length - 32768 if uninit else length
+                phys = None if uninit else self._block(lo | (hi << 32))
+                out.append((lblk * self.bs, length * self.bs, phys))
+            else:
+                _lblk, lo, hi = struct.unpack_from('<IIH', node, e)
+                self._extent_tree(self.dev.read(self._block(lo | (hi << 32)), self.bs), out, depth_left - 1)
+
+    def _block_map(self, i_block, nblocks):
+        """ext2/3 : 12 blocs directs + indirects simple/double/triple."""
+        ptrs = struct.unpack('<15I', i_block)
+        per = self.bs // 4
+        items = [(l, p) for l, p in enumerate(ptrs[:12]) if p and l < nblocks]
+        base = 12
+
+        def walk(blk, level, first):
+            if not blk or first >= nblocks:
+                return
+            sub = struct.unpack(f'<{per}I', self.dev.read(self._block(blk), self.bs))
+            span = per ** (level - 1)
+            for k, p in enumerate(sub):
+                lno = first + k * span
+                if lno >= nblocks:
+                    break
+                if level == 1:
+                    if p:
+                        items.append((lno, p))
+                else:
+                    walk(p, level - 1, lno)
+        for level, blk in enumerate(ptrs[12:], start=1):
+            walk(blk, level, base)
+            base += per ** level
+        return [tuple(e) for e in _runs(items, self.bs, self._block)]
+
+    def _extents(self, size, flags, i_block, i_block_off):
+        if flags & _EXT4_INLINE_FL:
+            return [(0, min(size, 60), i_block_off)]
+        if flags & _EXT4_EXTENTS_FL:
+            out = []
+            self._extent_tree(i_block, out)
+            return _clip(sorted(out, key=lambda e: e[0]), size)
+        return _clip(self._block_map(i_block, -(-size // self.bs)), size)
+
+    def _dir_entries(self, data):
+        pos = 0
+        while pos + 8 <= len(data):
+            ino, rec_len, name_len, _ftype = struct.unpack_from('<IHBB', data, pos)
+            if rec_len < 8:
+                # enregistrement corrompu : bloc suivant
+                pos = (pos // self.bs + 1) * self.bs
+                continue
+            if ino and name_len:
+                name = data[pos + 8:pos + 8 + name_len].decode('utf-8', 'replace')
+                if name not in ('.', '..'):
+                    yield name, ino
+            pos += rec_len
+
+    def iter_files(self):
+        """(chemin, taille, mtime, extents) des fichiers réguliers, ordre os.walk."""
+        stack, seen = [('', 2)], {2}
+        while stack:
+            prefix, dino = stack.pop()
+            _mode, size, _mt, flags, i_block, i_off = self._inode(dino)
+            ext = self._extents(size, flags, i_block, i_off)
+            data = RangeReader(self.dev, ext, size).read()
+            if flags & _EXT4_INLINE_FL:
+                data = data[4:]   # répertoire inline : n° d'inode parent en tête
+            subdirs = []
+            for name, ino in self._dir_entries(data):
+                try:
+                    mode, fsize, mtime, fflags, fblock, foff = self._inode(ino)
+                except (struct.error, ValueError):
+                    continue
+                kind = mode & _S_IFMT
+                if kind == _S_IFREG:
+                    yield prefix + name, fsize, mtime, self._extents(fsize, fflags, fblock, foff)
+                elif kind == _S_IFDIR and ino not in seen:
+                    seen.add(ino)
+                    subdirs.append((prefix + name + '/', ino))
+            stack.extend(reversed(subdirs))
+
+# --- FAT12/16/32 ----------------------------------------------------------
+def _fat_bpb(bs):
+    """Paramètres d'un secteur de boot FAT plausible, sinon None."""
+    if len(bs) < 512 or bs[510:512] != b'\x55\xaa':
+        return None
+    bps, spc, rsvd, nfats, root_ent, tot16, _media, fatsz16 = struct.unpack_from('<HBHBHHBH', bs, 0x0B)
+    tot32, fatsz32 = struct.unpack_from('<II', bs, 0x20)
+    if bps not in (512, 1024, 2048, 4096) or not spc or spc & (spc - 1) or not rsvd or not nfats:
+        return None
+    fatsz, tot = fatsz16 or fatsz32, tot16 or tot32
+    if not fatsz or not tot:
+        return None
+    return bps, spc, rsvd, nfats, root_ent, tot, fatsz
+
+def _lfn_checksum(short):
+    s = 0
+    for c in short:
+        s = (((s & 1) << 7) + (s >> 1) + c) & 0xFF
+    return s
+
+class FatVolume:
+    def __init__(self, dev, offset=0):
+        self.dev, self.offset = dev, offset
+        bs = dev.read(offset, 512)
+        bpb = _fat_bpb(bs)
+        if bpb is None:
+            raise ValueError("secteur de boot FAT invalide")
+        bps, spc, rsvd, nfats, root_ent, tot, fatsz = bpb
+        self.cs = bps * spc
+        root_secs = (root_ent * 32 + bps - 1) // bps
+        self.fat = offset + rsvd * bps
+        first_data = rsvd + nfats * fatsz + root_secs
+        self.heap = offset + first_data * bps
+        self.clusters = (tot - first_data) // spc
+        self.bits = 12 if self.clusters < 4085 else 16 if self.clusters < 65525 else 32
+        self.eoc = {12: 0xFF8, 16: 0xFFF8, 32: 0x0FFFFFF8}[self.bits]
+        # racine : chaîne de clusters (FAT32) ou zone fixe (FAT12/16)
+        if self.bits == 32:
+            self.root, self.root_area = struct.unpack_from('<I', bs, 0x2C)[0], None
+        else:
+            self.root, self.root_area = None, (offset + (rsvd + nfats * fatsz) * bps, root_ent * 32)
+
+    def _next(self, c):
+        if self.bits == 32:
+            return struct.unpack('<I', self.dev.read(self.fat + c * 4, 4))[0] & 0x0FFFFFFF
+        if self.bits == 16:
+            return struct.unpack('<H', self.dev.read(self.fat + c * 2, 2))[0]
+        v = struct.unpack('<H', self.dev.read(self.fat + c + c // 2, 2))[0]
+        return v >> 4 if c & 1 else v & 0xFFF
+
+    def _chain(self, first, limit=None):
+        out, c = [], first
+        while 2 <= c < self.clusters + 2 and c < self.eoc and len(out) <= self.clusters:
+            out.append(c)
+            if limit is not None and len(out) >= limit:
+                break
+            c = self._next(c)
+        return out
+
+    def _cluster_off(self, c):
+        return self.heap + (c - 2) * self.cs
+
+    def _extents(self, first, size):
+        chain = self._chain(first, -(-size // self.cs)) if size else []
+        return _clip([tuple(e) for e in _runs(enumerate(chain), self.cs, self._cluster_off)], size)
+
+    def _dir_data(self, first):
+        if first is None:
+            return self.dev.read(*self.root_area)
+        chain = self._chain(first)
+        ext = [tuple(e) for e in _runs(enumerate(chain), self.cs, self._cluster_off)]
+        return RangeReader(self.dev, ext, len(chain) * self.cs).read()
+
+    def _entries(self, data):
+        lfn, lfn_sum = {}, None
+        for pos in range(0, len(data) - 31, 32):
+            e = data[pos:pos + 32]
+            if e[0] == 0x00:
+                break
+            if e[0] == 0xE5:
+                lfn = {}
+                continue
+            attr = e[11]
+            if attr == 0x0F:
+                if e[0] & 0x40:
+                    lfn, lfn_sum = {}, e[13]
+                lfn[e[0] & 0x1F] = e[1:11] + e[14:26] + e[28:32]
+                continue
+            short = e[:11]
+            if attr & 0x08:
+                lfn = {}
+                continue
+            name = None
+            if lfn and lfn_sum == _lfn_checksum(short):
+                raw = b''.join(lfn[k] for k in sorted(lfn)).decode('utf-16-le', 'replace')
+                name = raw.split('\x00', 1)[0].rstrip('￿')
+            lfn = {}
+            if not name:
+                base = bytes([0xE5]) + short[1:8] if short[0] == 0x05 else short[:8]
+                base = base.decode('cp437').rstrip()
+                ext = short[8:11].decode('cp437').rstrip()
+                if e[12] & 0x08: base = base.lower()
+                if e[12] & 0x10: ext = ext.lower()
+                name = base + ('.' + ext if ext else '')
+            if name in ('.', '..'):
+                continue
+            hi, t, d, lo, size = struct.unpack_from('<HHHHI', e, 0x14)
+            yield name, bool(attr & 0x10), (hi << 16) | lo, size, _dos_time(d, t)
+
+    def iter_files(self):
+        stack, seen = [('', self.root)], {self.root}
+        while stack:
+            prefix, first = stack.pop()
+            subdirs = []
+            for name, is_dir, cluster, size, mtime in self._entries(self._dir_data(first)):
+                if is_dir:
+                    if cluster >= 2 and cluster not in seen:
+                        seen.add(cluster)
+                        subdirs.append((prefix + name + '/', cluster))
+                else:
+                    yield prefix + name, size, mtime, self._extents(cluster, size)
+            stack.extend(reversed(subdirs))
+
+# --- exFAT ----------------------------------------------------------------
+class ExFatVolume:
+    def __init__(self, dev, offset=0):
+        self.dev, self.offset = dev, offset
+        bs = dev.read(offset, 512)
+        if bs[3:11] != b'EXFAT   ':
+            raise ValueError("secteur de boot exFAT absent")
+        fat_off, _fat_len, heap_off, self.clusters, self.root = struct.unpack_from('<IIIII', bs, 0x50)
+        sec_shift, spc_shift = bs[0x6C], bs[0x6D]
+        self.cs = 1 << (sec_shift + spc_shift)
+        self.fat = offset + (fat_off << sec_shift)
+        self.heap = offset + (heap_off << sec_shift)
+
+    def _cluster_off(self, c):
+        return self.heap + (c - 2) * self.cs
+
+    def _chain(self, first, limit=None, contiguous=False):
+        if contiguous:
+            return list(range(first, first + (limit or 0)))
+        out, c = [], first
+        while 2 <= c < self.clusters + 2 and len(out) <= self.clusters:
+            out.append(c)
+            if limit is not None and len(out) >= limit:
+                break
+            c = struct.unpack('<I', self.dev.read(self.fat + c * 4, 4))[0]
+        return out
+
+    def _extents(self, first, valid, size, contiguous):
+        """Extents jusqu'à la longueur valide ; au-delà, zéros (RangeReader)."""
+        n = -(-size // self.cs) if size else 0
+        chain = self._chain(first, n, contiguous) if n and first else []
+        return _clip([tuple(e) for e in _runs(enumerate(chain), self.cs, self._cluster_off)],
+                     min(valid, size))
+
+    def _dir_data(self, first, size=None, contiguous=False):
+        n = -(-size // self.cs) if size else None
+        chain = self._chain(first, n, contiguous and bool(n))
+        ext = [tuple(e) for e in _runs(enumerate(chain), self.cs, self._cluster_off)]
+        return RangeReader(self.dev, ext, len(chain) * self.cs).read()
+
+    def _entries(self, data):
+        pos = 0
+        while pos + 32 <= len(data):
+            etype = data[pos]
+            if etype == 0x00:
+                break
+            if etype != 0x85:
+                pos += 32
+                continue
+            count = data[pos + 1]
+            attrs = struct.unpack_from('<H', data, pos + 4)[0]
+            stamp = struct.unpack_from('<I', data, pos + 12)[0]
+            st = data[pos + 32:pos + 64]
+            if len(st) < 32 or st[0] != 0xC0:
+                pos += 32
+                continue
+            flags, name_len = st[1], st[3]
+            valid, = struct.unpack_from('<Q', st, 8)
+            first, size = struct.unpack_from('<IQ', st, 20)
+            parts = [data[pos + 32 * k + 2:pos + 32 * k + 32] for k in range(2, count + 1)
+                     if pos + 32 * k + 32 <= len(data) and data[pos + 32 * k] == 0xC1]
+            name = b''.join(parts).decode('utf-16-le', 'replace')[:name_len]
+            pos += 32 * (count + 1)
+            if name:
+                yield (name, bool(attrs & 0x10), first, valid, size, bool(flags & 0x02),
+                       _dos_time(stamp >> 16, stamp & 0xFFFF))
+
+    def iter_files(self):
+        stack, seen = [('', self.root, None, False)], {self.root}
+        while stack:
+            prefix, first, dsize, contiguous = stack.pop()
+            subdirs = []
+            for name, is_dir, cl, valid, size, contig, mtime in self._entries(
+                    self._dir_data(first, dsize, contiguous)):
+                if is_dir:
+                    if cl >= 2 and cl not in seen:
+                        seen.add(cl)
+                        subdirs.append((prefix + name + '/', cl, size, contig))
+                else:
+                    yield prefix + name, size, mtime, self._extents(cl, valid, size, contig)
+            stack.extend(reversed(subdirs))
+
+# --- Détection et tables de partitions ------------------------------------
+def open_volume(dev, offset=0):
+    """Volume reconnu à l'offset donné (ext4 / exFAT / FAT), ou None."""
+    head = dev.read(offset, 512)
+    if head[3:11] == b'EXFAT   ':
+        return ExFatVolume(dev, offset)
+    sb = dev.read(offset + 1024 + 0x38, 2)
+    if len(sb) == 2 and struct.unpack('<H', sb)[0] == _EXT4_MAGIC:
+        return Ext4Volume(dev, offset)
+    if _fat_bpb(head) is not None and (b'FAT' in head[0x36:0x3E] or b'FAT' in head[0x52:0x5A]):
+        return FatVolume(dev, offset)
+    return None
+
+def partitions(dev):
+    """[(n°, nom, offset)] d'une table GPT ou MBR (partitions primaires)."""
+    for sector in (512, 4096):
+        hdr = dev.read(sector, 92)
+        if hdr[:8] == b'EFI PART':
+            lba, count, esize = struct.unpack_from('<QII', hdr, 0x48)
+            table = dev.read(lba * sector, count * esize)
+            out = []
+            for i in range(count):
+                e = table[i * esize:(i + 1) * esize]
+                if len(e) < 128 or e[:16] == bytes(16):
+                    continue
+                first = struct.unpack_from('<Q', e, 0x20)[0]
+                name = e[0x38:0x80].decode('utf-16-le', 'replace').split('\x00', 1)[0]
+                out.append((i + 1, name, first * sector))
+            return out
+    mbr = dev.read(0, 512)
+    if len(mbr) < 512 or mbr[510:512] != b'\x55\xaa':
+        return []
+    out = []
+    for i in range(4):
+        ptype = mbr[446 + 16 * i + 4]
+        start, = struct.unpack_from('<I', mbr, 446 + 16 * i + 8)
+        if ptype and ptype not in (0x05, 0x0F, 0x85, 0xEE) and start:
+            out.append((i + 1, '', start * 512))
+    return out
+
+class FsImage:
+    """Image disque/partition : volumes reconnus et index des fichiers."""
+    def __init__(self, path, cache_bytes=_CACHE_BYTES):
+        self.dev = BlockDevice(path, cache_bytes)
+        try:
+            if struct.unpack('<I', self.dev.read(0, 4).ljust(4, b'\0'))[0] == _SPARSE_MAGIC:
+                raise ValueError("image Android sparse : convertir d'abord avec simg2img")
+            vol = open_volume(self.dev, 0)
+            if vol is not None:
+                self.volumes = [('', vol)]
+            else:
+                self.volumes = []
+                for num, name, off in partitions(self.dev):
+                    try:
+                        v = open_volume(self.dev, off)
+                    except Exception as e:
+                        logging.warning(f"Image {os.path.basename(path)} : partition {num} illisible ({e})")
+                        continue
+                    if v is None:
+                        logging.info(f"Image {os.path.basename(path)} : partition {num} "
+                                     f"{name} non reconnue (ext4/FAT/exFAT seulement)")
+                        continue
+                    self.volumes.append((f"p{num}", v))
+                if len(self.volumes) == 1:
+                    self.volumes = [('', self.volumes[0][1])]
+            if not self.volumes:
+                raise ValueError("aucun système de fichiers ext4/FAT/exFAT reconnu")
+        except Exception:
+            self.dev.close()
+            raise
+        self._files = None
+
+    def files(self):
+        """{chemin: (taille, mtime, extents)} dans l'ordre du parcours."""
+        if self._files is None:
+            files = {}
+            for prefix, vol in self.volumes:
+                base = prefix + '/' if prefix else ''
+                for path, size, mtime, extents in vol.iter_files():
+                    files[base + path] = (size, mtime, extents)
+            self._files = files
+        return self._files
+
+    def open(self, name):
+        size, _mtime, extents = self.files()[name]
+        return io.BufferedReader(RangeReader(self.dev, extents, size), buffer_size=_PAGE)
+
+    def close(self):
+        if self.dev.stats['miss']:
+            logging.info(f"Image {os.path.basename(self.dev.path)} : cache de blocs {self.dev.stats}")
+        self.dev.close()
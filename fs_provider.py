@@ -6,16 +6,46 @@
 
 import os
 import io
+import bz2
+import errno
+import gzip
 import time
+import queue
+import struct
+import shutil
+import logging
+import tarfile
 import zipfile
+import tempfile
+import threading
+import weakref
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Iterable, Iterator, Optional, Tuple
+from fs_image import FsImage
 
 try:
     import py7zr
     _HAS_PY7ZR = True
 except Exception:
     _HAS_PY7ZR = False
+try:
+    import lzma
+    _HAS_LZMA = True
+except Exception:
+    _HAS_LZMA = False
+try:
+    import fcntl
+    _HAS_FCNTL = True
+except Exception:
+    _HAS_FCNTL = False
+try:
+    from py7zr.io import Py7zIO, WriterFactory  # py7zr >= 1.0 (extraction vers flux)
+    _HAS_PY7ZR_IO = True
+except Exception:
+    _HAS_PY7ZR_IO = False
 
 @dataclass
 class VFile:
@@ -29,30 +59,142 @@ class BaseSource:
     def iter_files(self) -> Iterator[VFile]:
         raise NotImplementedError
 
+# --- Parcours de dossier parallèle (os.scandir) ------------------------------
+# os.walk + un stat séparé par fichier = 2 appels système par fichier, en série.
+# Ici chaque dossier est lu par os.scandir dans un pool de threads (la latence
+# d'un SSD USB bloqué en écriture ou d'un partage NAS se recouvre) et les
+# métadonnées (taille, mtime, inode, device) sont relevées en UNE passe.
+# L'ordre rendu est exactement celui d'os.walk (descendant, fichiers d'abord).
+
+_WALK_THREADS = 16
+
+def _scan_dir(dirpath):
+    """(fichiers, sous-dossiers) d'UN dossier ; fichiers = (nom, size, mtime, ino, dev),
+    sous-dossiers = (nom, mtime)."""
+    files, subdirs = [], []
+    try:
+        it = os.scandir(dirpath)
+    except OSError:
+        return files, subdirs   # comme os.walk : dossier illisible ignoré
+    with it:
+        for de in it:
+            try:
+                is_dir = de.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                # os.walk(followlinks=False) : lien vers dossier ni suivi ni listé
+                try:
+                    if not de.is_symlink():
+                        subdirs.append((de.name, de.stat().st_mtime))
+                except OSError:
+                    pass
+                continue
+            try:
+                st = de.stat()
+                files.append((de.name, st.st_size, st.st_mtime, st.st_ino, st.st_dev))
+            except OSError:
+                files.append((de.name, 0, None, 0, 0))
+    return files, subdirs
+
+def scan_tree(root: str, threads: int = _WALK_THREADS, dir_mtimes: Optional[dict] = None):
+    """Liste [(chemin, rel, size, mtime, ino, dev)] de tout l'arbre `root`,
+    dans l'ordre d'os.walk. mtime vaut None si le stat a échoué.
+    Si `dir_mtimes` est fourni, il reçoit {rel_dossier: mtime} ('' = racine)."""
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, threads)) as ex:
+        futures = {root: ex.submit(_scan_dir, root)}
+        todo = [root]
+        while todo:
+            d = todo.pop()
+            files, subdirs = results[d] = futures.pop(d).result()
+            for name, _ in subdirs:
+                sub = os.path.join(d, name)
+                futures[sub] = ex.submit(_scan_dir, sub)
+                todo.append(sub)
+    if dir_mtimes is not None:
+        try:
+            dir_mtimes[''] = os.stat(root).st_mtime
+        except OSError:
+            pass
+    out = []
+    stack = [(root, '')]
+    while stack:
+        d, rel_dir = stack.pop()
+        files, subdirs = results[d]
+        for name, size, mtime, ino, dev in files:
+            out.append((os.path.join(d, name), os.path.join(rel_dir, name) if rel_dir else name,
+                        size, mtime, ino, dev))
+        subs = []
+        for name, mtime in subdirs:
+            rel_sub = os.path.join(rel_dir, name) if rel_dir else name
+            if dir_mtimes is not None:
+                dir_mtimes[rel_sub] = mtime
+            subs.append((os.path.join(d, name), rel_sub))
+        stack.extend(reversed(subs))
+    return out
+
+# --- Ordre PHYSIQUE (disque rotatif / USB) -----------------------------------
+# Clé de tri d'un fichier : offset physique de son premier extent (ioctl
+# FIEMAP, Linux), sinon numéro d'inode (allocation généralement croissante sur
+# le disque). Lire dans cet ordre remplace les sauts de tête aléatoires de
+# l'ordre os.walk par un balayage quasi séquentiel du plateau.
+_FS_IOC_FIEMAP = 0xC020660B
+_FIEMAP_HDR = struct.Struct('=QQIIII')          # struct fiemap (32 octets)
+_FIEMAP_EXTENT = 56                             # struct fiemap_extent
+_FIEMAP_EXTENT_NOT_PHYS = 0x2 | 0x4 | 0x200     # UNKNOWN | DELALLOC | DATA_INLINE
+_NO_FIEMAP_DEVS = set()                         # volumes sans FIEMAP (tmpfs, NTFS-3G…)
+
+def first_physical_offset(path: str, dev=None) -> Optional[int]:
+    """Offset physique (octets) du premier extent de `path` via FIEMAP, ou None
+    (ioctl non géré, fichier vide ou inline, erreur)."""
+    if not _HAS_FCNTL or dev in _NO_FIEMAP_DEVS:
+        return None
+    buf = bytearray(_FIEMAP_HDR.size + _FIEMAP_EXTENT)
+    _FIEMAP_HDR.pack_into(buf, 0, 0, 0xFFFFFFFFFFFFFFFF, 0, 0, 1, 0)
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            fcntl.ioctl(fd, _FS_IOC_FIEMAP, buf, True)
+        finally:
+            os.close(fd)
+    except OSError as e:
+        if dev is not None and e.errno in (errno.ENOTTY, errno.EOPNOTSUPP, errno.EINVAL):
+            _NO_FIEMAP_DEVS.add(dev)
+        return None
+    if not _FIEMAP_HDR.unpack_from(buf, 0)[3]:
+        return None
+    physical, = struct.unpack_from('=Q', buf, _FIEMAP_HDR.size + 8)
+    flags, = struct.unpack_from('=I', buf, _FIEMAP_HDR.size + 40)
+    return None if flags & _FIEMAP_EXTENT_NOT_PHYS else physical
+
+def physical_sort_keys(files, threads: int = _WALK_THREADS):
+    """files [(chemin, inode, device)] -> clés de tri physique, dans l'ordre.
+    (device, 0, offset) si FIEMAP répond, sinon (device, 1, inode) ; les
+    ioctl sont émis depuis un pool de threads (file de commandes du disque)."""
+    def _key(item):
+        path, ino, dev = item
+        phys = first_physical_offset(path, dev)
+        return (dev or 0, 0, phys) if phys is not None else (dev or 0, 1, ino or 0)
+    with ThreadPoolExecutor(max_workers=max(1, threads)) as ex:
+        return list(ex.map(_key, files, chunksize=256))
+
 class OSPathSource(BaseSource):
     def __init__(self, root_dir: str):
         self.root_dir = root_dir
 
     def iter_files(self) -> Iterator[VFile]:
-        base = self.root_dir
-        for dp, _, files in os.walk(base):
-            for f in files:
-                full = os.path.join(dp, f)
-                rel = os.path.relpath(full, base)
-                try:
-                    st = os.stat(full)
-                    size = st.st_size
-                    mtime = st.st_mtime
-                except Exception:
-                    size = 0; mtime = 0.0
+        for full, rel, size, mtime, _ino, _dev in scan_tree(self.root_dir):
+            if mtime is None:
+                mtime = 0.0
 
-                def _open_bin(p=full):
-                    return open(p, 'rb')
+            def _open_bin(p=full):
+                return open(p, 'rb')
 
-                def _open_txt(p=full, encoding='utf-8', errors='ignore'):
-                    return open(p, 'r', encoding=encoding, errors=errors)
+            def _open_txt(p=full, encoding='utf-8', errors='ignore'):
+                return open(p, 'r', encoding=encoding, errors=errors)
 
-                yield VFile(rel, size, mtime, _open_bin, _open_txt)
+            yield VFile(rel, size, mtime, _open_bin, _open_txt)
 
 class ZipSource(BaseSource):
     def __init__(self, zip_path: str):
@@ -65,23 +207,30 @@ class ZipSource(BaseSource):
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
-    def iter_files(self) -> Iterator[VFile]:
+    def members(self):
+        """Liste [(nom, taille, mtime)] des fichiers (répertoire central)."""
+        out = []
         for zinfo in self._zip.infolist():
             if zinfo.is_dir():
                 continue
-            rel = zinfo.filename
-            size = zinfo.file_size
             # Convert DOS date to epoch
             try:
                 mtime = time.mktime((*zinfo.date_time, 0, 0, -1))
             except Exception:
                 mtime = 0.0
+            out.append((zinfo.filename, zinfo.file_size, mtime))
+        return out
 
+    def open_member(self, name):
+        return self._zip.open(name, 'r')
+
+    def iter_files(self) -> Iterator[VFile]:
+        for rel, size, mtime in self.members():
             def _open_bin(zi=rel):
-                return self._zip.open(zi, 'r')
+                return self.open_member(zi)
 
             def _open_txt(zi=rel, encoding='utf-8', errors='ignore'):
-                raw = self._zip.open(zi, 'r')
+                raw = self.open_member(zi)
                 return io.TextIOWrapper(raw, encoding=encoding, errors=errors)
 
             yield VFile(rel, size, mtime, _open_bin, _open_txt)
@@ -92,6 +241,38 @@ class ZipSource(BaseSource):
         except Exception:
             pass
 
+if _HAS_PY7ZR and _HAS_PY7ZR_IO:
+    class _SpooledMember(Py7zIO):
+        """Cible d'extraction py7zr : mémoire jusqu'à 32 Mo, disque au-delà."""
+        def __init__(self):
+            self.fp = tempfile.SpooledTemporaryFile(max_size=32 * 1024 * 1024)
+
+        def write(self, s):
+            return self.fp.write(s)
+
+        def read(self, size=None):
+            return self.fp.read(size)
+
+        def seek(self, offset, whence=0):
+            return self.fp.seek(offset, whence)
+
+        def flush(self):
+            self.fp.flush()
+
+        def size(self):
+            pos = self.fp.tell()
+            end = self.fp.seek(0, io.SEEK_END)
+            self.fp.seek(pos)
+            return end
+
+    class _SpooledMemberFactory(WriterFactory):
+        def __init__(self):
+            self.products = {}
+
+        def create(self, filename):
+            product = self.products[filename] = _SpooledMember()
+            return product
+
 class SevenZipSource(BaseSource):
     def __init__(self, seven_zip_path: str):
         if not _HAS_PY7ZR:
@@ -105,28 +286,37 @@ class SevenZipSource(BaseSource):
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
-    def iter_files(self) -> Iterator[VFile]:
-        # py7zr ne permet pas l'accès random; on lit fichier par fichier en streaming.
-        # On utilise readall() par lots de noms (permet d'avoir un dict {name: bytes-like}).
-        # Pour limiter la mémoire, on itère par chunks de N fichiers.
-        # py7zr ne permet pas l'accès random; on lit fichier par fichier en streaming.
-        # On utilise readall() par lots de noms (permet d'avoir un dict {name: bytes-like}).
-        # Pour limiter la mémoire, on itère par chunks de N fichiers.
-        # Correction: py7zr.SevenZipFile.read() ne prend pas de liste de noms.
-        # Il faut ouvrir chaque fichier individuellement.
+    def members(self):
+        """Liste [(nom, taille, mtime)] des fichiers (en-tête 7z)."""
+        out = []
         for m in self._z.list():
             if m.is_directory:
                 continue
-            name = m.filename
-            size = m.uncompressed
             mtime = m.creationtime.timestamp() if m.creationtime else 0.0
+            out.append((m.filename, m.uncompressed, mtime))
+        return out
+
+    def open_member(self, name):
+        # py7zr n'a pas d'accès random : on extrait le membre seul (mémoire puis
+        # disque au-delà de 32 Mo) et on « rembobine » le handle pour le réutiliser.
+        try:
+            if _HAS_PY7ZR_IO:
+                factory = _SpooledMemberFactory()
+                self._z.extract(targets=[name], factory=factory)
+                fp = factory.products[name].fp
+                fp.seek(0)
+                return fp
+            return self._z.read([name])[name]
+        finally:
+            self._z.reset()
 
+    def iter_files(self) -> Iterator[VFile]:
+        for name, size, mtime in self.members():
             def _open_bin(file_name=name):
-                # py7zr.open() returns a file-like object
-                return self._z.open(file_name)
+                return self.open_member(file_name)
 
             def _open_txt(file_name=name, encoding='utf-8', errors='ignore'):
-                raw = self._z.open(file_name)
+                raw = self.open_member(file_name)
                 return io.TextIOWrapper(raw, encoding=encoding, errors=errors)
 
             yield VFile(name, size, mtime, _open_bin, _open_txt)
@@ -137,7 +327,646 @@ class SevenZipSource(BaseSource):
         except Exception:
             pass
 
-def open_source(path: str) -> BaseSource:
+# --- Pool de handles d'archive ---------------------------------------------
+# Chaque module rouvrait l'archive (répertoire central ZIP / en-tête 7z relu à
+# chaque fois). Le pool garde quelques sources ouvertes PAR archive, prêtes à
+# être réutilisées ; au-delà de `max_handles` simultanés, les handles sont
+# temporaires. Tout est fermé de façon déterministe par close_all() (fin de run).
+
+class _PooledStream:
+    """Flux d'un membre : rend son handle au pool à la fermeture, dès la fin
+    des données lue (at_eof), ou au plus tard quand le flux est collecté
+    (appelant sans `with` ni close(), ex. open_binary().read())."""
+    def __init__(self, raw, release, at_eof=True):
+        self._raw = raw
+        self._release = weakref.finalize(self, release)   # exécuté une seule fois
+        self._at_eof = at_eof
+
+    def read(self, size=-1):
+        data = self._raw.read(size)
+        if self._at_eof and (size is None or size < 0 or (size and not data)):
+            self._release()
+        return data
+
+    def read1(self, size=-1):
+        data = self._raw.read1(size)
+        if self._at_eof and size and not data:
+            self._release()
+        return data
+
+    def readinto(self, b):
+        n = self._raw.readinto(b)
+        if self._at_eof and len(b) and not n:
+            self._release()
+        return n
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        try:
+            self._raw.close()
+        finally:
+            self._release()
+
+class ArchivePool:
+    def __init__(self, max_handles: int = 4):
+        self.max_handles = max_handles
+        self._idle = {}      # chemin -> [sources libres]
+        self._handles = {}   # chemin -> [sources gérées (libres + prêtées)]
+        self._lock = threading.Lock()
+
+    def acquire(self, path: str) -> BaseSource:
+        key = os.path.abspath(path)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop()
+            managed = self._handles.setdefault(key, [])
+            pooled = len(managed) < self.max_handles
+        src = open_source(path)
+        if pooled:
+            with self._lock:
+                managed.append(src)
+        return src
+
+    def release(self, path: str, source: BaseSource):
+        key = os.path.abspath(path)
+        with self._lock:
+            if any(s is source for s in self._handles.get(key, ())):
+                self._idle.setdefault(key, []).append(source)
+                return
+        source.close()  # handle temporaire (pool plein)
+
+    def members(self, path: str):
+        src = self.acquire(path)
+        try:
+            return src.members()
+        finally:
+            self.release(path, src)
+
+    def open_member(self, path: str, name: str):
+        src = self.acquire(path)
+        try:
+            raw = src.open_member(name)
+        except Exception:
+            self.release(path, src)
+            raise
+        if isinstance(src, ZipSource):
+            # Le flux ZIP lit via le handle : rendu à la fermeture du flux.
+            return _PooledStream(raw, lambda: self.release(path, src))
+        self.release(path, src)
+        return raw
+
+    def close_all(self):
+        """Ferme TOUS les handles gérés, y compris ceux encore prêtés."""
+        with self._lock:
+            handles, self._idle, self._handles = self._handles, {}, {}
+        for sources in handles.values():
+            for src in sources:
+                src.close()
+
+ARCHIVE_POOL = ArchivePool()
+
+# --- Archives imbriquées (ZIP dans la source) -------------------------------
+# Un .zip contenu dans la source (ex. DataLogging/Toyota/x.zip dans un .7z) est
+# exposé comme un dossier : ses membres ont pour chemin  'x.zip' + NESTED_SEP +
+# 'membre'. Le répertoire central de chaque ZIP interne n'est lu qu'UNE fois
+# par run ; les ZipFile ouverts sont gardés dans un LRU borné. Le ZIP interne
+# n'est recopié (spool : mémoire jusqu'à 32 Mo, disque au-delà) que si son flux
+# n'est pas un vrai fichier (membre d'archive ZIP : seek émulé, très lent).
+NESTED_SEP = '!/'
+_NESTED_SPOOL_MEM = 32 * 1024 * 1024
+
+def _is_seekable_file(raw):
+    return isinstance(raw, (io.BufferedReader, io.FileIO, io.BytesIO, tempfile.SpooledTemporaryFile))
+
+class _NestedZip:
+    """ZIP interne ouvert : source, support (fichier ou spool) et nombre de
+    flux de membres encore ouverts dessus."""
+    __slots__ = ('src', 'backing', 'streams', 'evicted')
+
+    def __init__(self, src, backing):
+        self.src, self.backing = src, backing
+        self.streams, self.evicted = 0, False
+
+    def close(self):
+        self.src.close()
+        try:
+            self.backing.close()
+        except Exception:
+            pass
+
+class NestedArchivePool:
+    def __init__(self, max_open: int = 8):
+        self.max_open = max_open
+        self.spool_dir = None
+        self._members = {}               # clé -> [(nom, taille, mtime)]
+        self._open = OrderedDict()       # clé -> _NestedZip
+        self._evicted = set()            # _NestedZip sortis du LRU, flux encore ouverts
+        self._lock = threading.RLock()
+
+    def _source(self, key, opener):
+        with self._lock:
+            hit = self._open.get(key)
+            if hit is not None:
+                self._open.move_to_end(key)
+                return hit
+            raw = opener()
+            if _is_seekable_file(raw):
+                backing = raw
+            else:
+                backing = tempfile.SpooledTemporaryFile(max_size=_NESTED_SPOOL_MEM, dir=self.spool_dir)
+                try:
+                    shutil.copyfileobj(raw, backing, 1024 * 1024)
+                finally:
+                    raw.close()
+                backing.seek(0)
+            try:
+                src = ZipSource(backing)
+            except Exception:
+                backing.close()
+                raise
+            nz = self._open[key] = _NestedZip(src, backing)
+            while len(self._open) > self.max_open:
+                # Support fermé à l'éviction ; si des flux de membres sont
+                # encore ouverts dessus, à la fermeture du dernier.
+                _, old = self._open.popitem(last=False)
+                if old.streams:
+                    old.evicted = True
+                    self._evicted.add(old)
+                else:
+                    old.close()
+            return nz
+
+    def _stream_closed(self, nz):
+        with self._lock:
+            nz.streams -= 1
+            if nz.evicted and not nz.streams:
+                self._evicted.discard(nz)
+                nz.close()
+
+    def members(self, key, opener):
+        """Membres [(nom, taille, mtime)] du ZIP interne `key` (mis en cache)."""
+        with self._lock:
+            cached = self._members.get(key)
+            if cached is None:
+                cached = self._members[key] = self._source(key, opener).src.members()
+            return cached
+
+    def open_member(self, key, opener, name):
+        with self._lock:
+            nz = self._source(key, opener)
+            raw = nz.src.open_member(name)
+            nz.streams += 1
+        # pas de libération en fin de données : le flux peut encore être rembobiné
+        return _PooledStream(raw, lambda: self._stream_closed(nz), at_eof=False)
+
+    def close_all(self):
+        with self._lock:
+            opened, self._open = self._open, OrderedDict()
+            evicted, self._evicted = self._evicted, set()
+            self._members.clear()
+        for nz in list(opened.values()) + list(evicted):
+            nz.close()
+
+NESTED_POOL = NestedArchivePool()
+
+# --- Journaux compressés (logcat.txt.1.gz, *.log.gz, .bz2, .xz) --------------
+# Un fichier compressé est exposé sous son NOM LOGIQUE (suffixe de compression
+# retiré) : 'logs/logcat.txt.1.gz' + NESTED_SEP + 'logcat.txt.1'. Son extension
+# logique ignore un numéro de rotation ('.txt.1' -> '.txt'). La décompression
+# est faite EN FLUX par un thread (file bornée de blocs) : elle avance pendant
+# que l'appelant traite les blocs précédents (zlib/bz2/lzma libèrent le GIL).
+_DECOMPRESSORS = {'.gz': gzip.open, '.bz2': bz2.open}
+if _HAS_LZMA:
+    _DECOMPRESSORS['.xz'] = lzma.open
+COMPRESSED_EXT = tuple(_DECOMPRESSORS)
+_DECOMP_CHUNK = 1024 * 1024
+_DECOMP_QUEUE = 8
+
+def compressed_logical_name(name: str) -> Optional[str]:
+    """'a/logcat.txt.1.gz' -> 'logcat.txt.1' ; None si non compressé."""
+    base, ext = os.path.splitext(os.path.basename(name.replace('\\', '/')))
+    return base if ext.lower() in _DECOMPRESSORS and base else None
+
+def logical_ext(name: str) -> str:
+    """Extension logique : '.txt' pour 'logcat.txt' comme pour 'logcat.txt.3'."""
+    root, ext = os.path.splitext(name)
+    if ext[1:].isdigit():
+        ext = os.path.splitext(root)[1]
+    return ext.lower()
+
+class _DecompressStream(io.RawIOBase):
+    """Flux brut des données décompressées, produites par un thread. Un flux
+    tronqué (log copié pendant l'écriture, carte SD arrachée) rend ce qui a pu
+    être décompressé, avec un avertissement, au lieu de tout perdre."""
+    def __init__(self, fileobj, ext, name=''):
+        self._name = name
+        self._q = queue.Queue(maxsize=_DECOMP_QUEUE)
+        self._stop = threading.Event()
+        self._buf = memoryview(b'')
+        self._eof = False
+        self._thread = threading.Thread(target=self._pump, args=(fileobj, ext), daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _pump(self, fileobj, ext):
+        try:
+            with fileobj, _DECOMPRESSORS[ext](fileobj) as dec:
+                while not self._stop.is_set():
+                    data = dec.read1(_DECOMP_CHUNK)   # read1 : rien de perdu si tronqué
+                    if not data:
+                        break
+                    self._put(data)
+        except EOFError as e:
+            logging.warning(f"Fichier compressé tronqué, contenu partiel : {self._name} ({e})")
+        except Exception as e:
+            self._put(e)
+        self._put(None)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buf:
+            if self._eof:
+                return 0
+            item = self._q.get()
+            if item is None or isinstance(item, Exception):
+                self._eof = True
+                if item is not None:
+                    raise OSError(f"décompression interrompue : {item}")
+                return 0
+            self._buf = memoryview(item)
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._stop.set()          # le thread sort au plus tard après un bloc
+            self._thread.join()
+        super().close()
+
+def open_decompressed(opener, name: str):
+    """Ouvre la vue décompressée (binaire, en flux) d'un fichier compressé ;
+    opener() rend le flux compressé."""
+    ext = os.path.splitext(name)[1].lower()
+    return io.BufferedReader(_DecompressStream(opener(), ext, name), buffer_size=_DECOMP_CHUNK)
+
+# --- Moteur « bloc solide » pour les .7z ---------------------------------
+# Sur une archive LZMA2 SOLIDE, chaque ouverture d'un membre redécompresse son
+# bloc depuis le début : lire N membres coûte ~N²/2. Ici, chaque bloc (folder
+# 7z) est décompressé UNE seule fois, dans l'ordre de l'archive, vers un SPOOL
+# local ; les blocs indépendants sont répartis sur un pool de processus. Les
+# membres sont diffusés au fil de l'eau au premier parcours, puis relus depuis
+# le spool par tous les modules suivants (l'instance est partagée par run).
+
+_SOLID_MAX_PROCS = 8
+_SOLID_TASK_BYTES = 64 * 1024 * 1024  # regroupe les petits blocs par tâche
+
+def _solid_extract_task(task):
+    """Worker : décompresse les blocs d'UNE tâche (cibles = leurs membres).
+    py7zr saute les blocs sans cible : seul(s) le(s) bloc(s) visé(s) est lu."""
+    archive_path, spool_dir, names = task
+    with py7zr.SevenZipFile(archive_path, mode='r') as z:
+        z.extract(path=spool_dir, targets=names)
+    return names
+
+class SolidSevenZipSource(BaseSource):
+    def __init__(self, seven_zip_path: str, spool_dir: str, want=None, processes=None):
+        if not _HAS_PY7ZR:
+            raise RuntimeError("py7zr n'est pas installé. Installez-le pour le support .7z.")
+        self.path = seven_zip_path
+        self.spool_dir = spool_dir
+        self.want = want            # (name, size) -> bool ; None = tout
+        self.processes = processes
+        self._blocks = None         # [[(name, size, mtime), ...], ...] ordre archive
+        self._spooled = set()       # noms matérialisés dans le spool
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # Le spool survit : il sert aux modules suivants (voir discard()).
+        pass
+
+    def blocks(self):
+        """Membres groupés par bloc solide, dans l'ordre de l'archive."""
+        if self._blocks is not None:
+            return self._blocks
+        with py7zr.SevenZipFile(self.path, mode='r') as z:
+            meta = {}
+            for m in z.list():
+                if m.is_directory:
+                    continue
+                mtime = m.creationtime.timestamp() if m.creationtime else 0.0
+                meta[m.filename] = (m.uncompressed, mtime)
+            blocks = []
+            streams = getattr(z.header, 'main_streams', None)
+            folders = streams.unpackinfo.folders if streams is not None else []
+            seen = set()
+            for folder in folders:
+                blk = []
+                for f in getattr(folder, 'files', None) or []:
+                    if f.filename in meta and f.filename not in seen:
+                        seen.add(f.filename)
+                        blk.append((f.filename, *meta[f.filename]))
+                if blk:
+                    blocks.append(blk)
+            # Membres vides (emptystream) ou non rattachés : bloc « virtuel » final
+            rest = [(n, *meta[n]) for n in meta if n not in seen]
+            if rest:
+                blocks.append(rest)
+        self._blocks = blocks
+        return blocks
+
+    def _spool_path(self, name):
+        return os.path.join(self.spool_dir, *name.split('/'))
+
+    def _vfile(self, name, size, mtime):
+        def _open_bin(file_name=name):
+            return open(self._spool_member(file_name), 'rb')
+
+        def _open_txt(file_name=name, encoding='utf-8', errors='ignore'):
+            return open(self._spool_member(file_name), 'r', encoding=encoding, errors=errors)
+
+        return VFile(name, size, mtime, _open_bin, _open_txt)
+
+    def _spool_member(self, name):
+        """Chemin spoolé d'un membre ; extrait à la demande s'il a été écarté
+        par le filtre `want` (cas rare : coût d'une décompression de bloc)."""
+        if name not in self._spooled:
+            _solid_extract_task((self.path, self.spool_dir, [name]))
+            self._spooled.add(name)
+        return self._spool_path(name)
+
+    def _tasks(self):
+        """Tâches [(indices de blocs, noms)], petits blocs regroupés, ordre archive."""
+        tasks, idx, names, size = [], [], [], 0
+        for bi, blk in enumerate(self.blocks()):
+            todo = [(n, s) for n, s, _ in blk
+                    if n not in self._spooled and (self.want is None or self.want(n, s))]
+            if not todo:
+                continue
+            idx.append(bi)
+            names.extend(n for n, _ in todo)
+            size += sum(s for _, s in todo)
+            if size >= _SOLID_TASK_BYTES:
+                tasks.append((idx, names)); idx, names, size = [], [], 0
+        if idx:
+            tasks.append((idx, names))
+        return tasks
+
+    def _run_tasks(self, tasks):
+        """Décompresse les tâches ; rend chaque tâche terminée DANS L'ORDRE."""
+        payload = [(self.path, self.spool_dir, names) for _, names in tasks]
+        nproc = self.processes or min(os.cpu_count() or 1, _SOLID_MAX_PROCS)
+        done = 0
+        if nproc > 1 and len(payload) > 1:
+            try:
+                with multiprocessing.Pool(processes=min(nproc, len(payload))) as pool:
+                    # imap conserve l'ORDRE des tâches = ordre de l'archive.
+                    for _ in pool.imap(_solid_extract_task, payload):
+                        yield tasks[done]
+                        done += 1
+                return
+            except Exception as e:
+                logging.warning(f"7z solide : multiprocessing indisponible ({e}) -> séquentiel")
+        for task, p in zip(tasks[done:], payload[done:]):
+            _solid_extract_task(p)
+            yield task
+
+    def iter_files(self) -> Iterator[VFile]:
+        os.makedirs(self.spool_dir, exist_ok=True)
+        tasks = self._tasks()
+        pending = {bi: t for t in tasks for bi in t[0]}
+        running = self._run_tasks(tasks) if tasks else iter(())
+        for bi, blk in enumerate(self.blocks()):
+            # Attend la tâche qui couvre ce bloc (les tâches arrivent dans l'ordre)
+            while bi in pending:
+                idx, names = next(running)
+                self._spooled.update(names)
+                for i in idx:
+                    pending.pop(i, None)
+            for name, size, mtime in blk:
+                yield self._vfile(name, size, mtime)
+
+    def close(self):
+        pass
+
+    def discard(self):
+        """Supprime le spool (fin de run)."""
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+        self._spooled.clear()
+
+# Une instance (et donc un spool) par archive et par run.
+_SOLID_SOURCES = {}
+
+def solid_source(path: str, spool_root: Optional[str] = None, processes=None,
+                 want=None) -> SolidSevenZipSource:
+    """Source .7z « bloc solide » partagée par tous les modules du run ; comme
+    pour tar_source, `want` n'est pris en compte qu'à la création : les membres
+    écartés ne sont pas spoolés (extraits à la demande s'ils sont ouverts)."""
+    key = os.path.abspath(path)
+    src = _SOLID_SOURCES.get(key)
+    if src is None:
+        spool = tempfile.mkdtemp(prefix='afap_7z_', dir=spool_root)
+        src = _SOLID_SOURCES[key] = SolidSevenZipSource(path, spool, want=want, processes=processes)
+    return src
+
+def release_solid_sources():
+    """Supprime les spools .7z du run (appelé en fin d'analyse)."""
+    for src in _SOLID_SOURCES.values():
+        src.discard()
+    _SOLID_SOURCES.clear()
+
+# --- Archives tar (.tar, .tar.gz/.tgz, .tar.bz2, .tar.xz) -------------------
+# Un tar n'a pas d'index : tout accès aléatoire relit le flux depuis le début.
+# La source est donc lue UNE SEULE FOIS, en flux (décompression par un thread,
+# voir open_decompressed), au premier accès ; chaque membre est confronté au
+# filtre `want` (union des besoins déclarés par les modules du run, WANTS) et
+# matérialisé dans un spool local s'il est voulu. Tous les modules lisent
+# ensuite le spool (instance partagée par run, comme le 7z solide).
+TAR_EXT = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+_TAR_CODEC = {'.tgz': '.gz', '.tbz2': '.bz2', '.txz': '.xz'}
+_TAR_COPY_BUF = 1024 * 1024
+
+def is_tar_path(path: str) -> bool:
+    return path.lower().endswith(TAR_EXT)
+
+def _tar_member_name(name: str) -> Optional[str]:
+    """Nom normalisé d'un membre ('./a/b' -> 'a/b'), None si hors arborescence."""
+    parts = [p for p in name.replace('\\', '/').split('/') if p not in ('', '.')]
+    if not parts or '..' in parts:
+        return None
+    return '/'.join(parts)
+
+class TarSource(BaseSource):
+    def __init__(self, tar_path: str, spool_dir: str, want=None):
+        self.path = tar_path
+        self.spool_dir = spool_dir
+        self.want = want            # (name, size) -> bool ; None = tout
+        self._members = None        # {nom: (taille, mtime)} ordre de l'archive
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # Le spool survit : il sert aux modules suivants (voir discard()).
+        pass
+
+    def _open_stream(self):
+        ext = os.path.splitext(self.path)[1].lower()
+        ext = _TAR_CODEC.get(ext, ext)
+        if ext in _DECOMPRESSORS:
+            return open_decompressed(lambda: open(self.path, 'rb'), os.path.splitext(self.path)[0] + ext)
+        return open(self.path, 'rb')
+
+    def spool_path(self, name):
+        return os.path.join(self.spool_dir, *name.split('/'))
+
+    def members(self):
+        """{nom: (taille, mtime)} des membres spoolés ; la passe unique est faite
+        au premier appel (un membre répété dans l'archive : dernière version)."""
+        if self._members is not None:
+            return self._members
+        members, skipped, t0 = {}, 0, time.time()
+        with self._open_stream() as stream, tarfile.open(fileobj=stream, mode='r|') as tf:
+            for ti in tf:
+                if not ti.isfile():
+                    continue
+                name = _tar_member_name(ti.name)
+                if name is None or (self.want is not None and not self.want(name, ti.size)):
+                    skipped += 1
+                    continue
+                dst = self.spool_path(name)
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                with tf.extractfile(ti) as fi, open(dst, 'wb') as fo:
+                    shutil.copyfileobj(fi, fo, _TAR_COPY_BUF)
+                members.pop(name, None)
+                members[name] = (ti.size, float(ti.mtime))
+        logging.info(f"tar : passe unique {os.path.basename(self.path)} — {len(members)} membre(s) "
+                     f"spoolé(s), {skipped} écarté(s), {time.time() - t0:.1f} s")
+        self._members = members
+        return members
+
+    def iter_files(self) -> Iterator[VFile]:
+        for name, (size, mtime) in self.members().items():
+            def _open_bin(file_name=name):
+                return open(self.spool_path(file_name), 'rb')
+            def _open_txt(file_name=name, encoding='utf-8', errors='ignore'):
+                return open(self.spool_path(file_name), 'r', encoding=encoding, errors=errors)
+            yield VFile(vfs_path=name, size=size, mtime=mtime,
+                        open_binary=_open_bin, open_text=_open_txt)
+
+    def discard(self):
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+        self._members = None
+
+_TAR_SOURCES = {}
+
+def tar_source(path: str, spool_root: Optional[str] = None, want=None) -> TarSource:
+    """Source tar partagée par tous les modules du run ; `want` n'est pris en
+    compte qu'à la création (avant la passe unique)."""
+    key = os.path.abspath(path)
+    src = _TAR_SOURCES.get(key)
+    if src is None:
+        spool = tempfile.mkdtemp(prefix='afap_tar_', dir=spool_root)
+        src = _TAR_SOURCES[key] = TarSource(path, spool, want=want)
+    return src
+
+def release_tar_sources():
+    """Supprime les spools tar du run (appelé en fin d'analyse)."""
+    for src in _TAR_SOURCES.values():
+        src.discard()
+    _TAR_SOURCES.clear()
+
+# --- Images de partition / disque (.img, .dd, .raw) -------------------------
+# Lues EN PLACE, sans montage ni droits root (fs_image : ext4, FAT, exFAT,
+# tables MBR/GPT). Chaque image n'est analysée qu'UNE fois par run : index des
+# fichiers et cache de blocs sont partagés par tous les handles de l'ARCHIVE_POOL
+# ; le contenu d'un membre est lu à la demande par plages (seekable).
+IMAGE_EXT = ('.img', '.dd', '.raw')
+_IMAGES = {}
+_IMAGES_LOCK = threading.Lock()
+
+def _fs_image(path):
+    key = os.path.abspath(path)
+    with _IMAGES_LOCK:
+        img = _IMAGES.get(key)
+        if img is None:
+            img = _IMAGES[key] = FsImage(path)
+            img.files()
+    return img
+
+class ImageSource(BaseSource):
+    def __init__(self, image_path: str):
+        self.path = image_path
+        self.image = _fs_image(image_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def members(self):
+        """Liste [(nom, taille, mtime)] des fichiers réguliers de l'image."""
+        return [(name, size, mtime) for name, (size, mtime, _ext) in self.image.files().items()]
+
+    def open_member(self, name):
+        return self.image.open(name)
+
+    def iter_files(self) -> Iterator[VFile]:
+        for rel, size, mtime in self.members():
+            def _open_bin(name=rel):
+                return self.open_member(name)
+
+            def _open_txt(name=rel, encoding='utf-8', errors='ignore'):
+                return io.TextIOWrapper(self.open_member(name), encoding=encoding, errors=errors)
+
+            yield VFile(rel, size, mtime, _open_bin, _open_txt)
+
+    def close(self):
+        # Image partagée : fermée par release_image_sources() en fin de run.
+        pass
+
+def image_physical_keys(path):
+    """{membre: offset physique de son premier extent dans l'image} (0 pour un
+    fichier vide ou aux données inline)."""
+    return {name: (extents[0][2] or 0) if extents else 0
+            for name, (_size, _mtime, extents) in _fs_image(path).files().items()}
+
+def release_image_sources():
+    """Ferme les images du run (caches de blocs compris)."""
+    with _IMAGES_LOCK:
+        images = list(_IMAGES.values())
+        _IMAGES.clear()
+    for img in images:
+        img.close()
+
+def open_source(path: str, spool_root: Optional[str] = None, want=None) -> BaseSource:
+    """Source d'un chemin ; spool_root / want : réglages du run pour un tar
+    (voir tar_source), fournis par l'appelant (core_scanner.RUN_OPTIONS)."""
     lower = path.lower()
     if os.path.isdir(path):
         return OSPathSource(path)
@@ -145,5 +974,9 @@ def open_source(path: str) -> BaseSource:
         return ZipSource(path)
     if lower.endswith('.7z'):
         return SevenZipSource(path)
+    if lower.endswith(TAR_EXT):
+        return tar_source(path, spool_root=spool_root, want=want)
+    if lower.endswith(IMAGE_EXT):
+        return ImageSource(path)
     # Default: folder
     return OSPathSource(path)
@@ -0,0 +1,278 @@
+# hash_index.py — AFAP
+# Auteur : Vincent Chapeau — Teel Technologies Canada (vincent.chapeau@teeltechcanada.com)
+#
+# Index de hachés MD5 COMPACT pour les grandes listes de fichiers connus (sous-
+# ensembles NSRL, firmwares constructeur : plusieurs millions d'entrées).
+#
+# Fichier binaire, lu par mmap, JAMAIS chargé en objets Python :
+#   en-tête (48 o) | filtre de Bloom | tailles triées (int64) | MD5 triés (16 o)
+# Recherche : Bloom (rejette presque tous les absents sans toucher aux MD5),
+# puis recherche dichotomique dans les enregistrements triés.
+# Les tailles (si toutes connues) servent au pré-filtre de should_skip, comme
+# pour la skiplist texte étendue.
+#
+# Un HashIndex se sérialise par son CHEMIN (__reduce__) : les workers de
+# scan_text rouvrent le fichier au lieu de recevoir un énorme set picklé.
+#
+# Import (flux + tri externe, mémoire bornée) :
+#   python hash_index.py LISTE.txt [NSRLFile.txt ...] -o known.afaphix
+# Formats acceptés : un MD5 par ligne (skiplist AFAP, éventuellement md5,taille),
+# CSV avec en-tête contenant une colonne MD5 (NSRL RDS : "MD5", "FileSize").
+
+import os
+import re
+import csv
+import sys
+import mmap
+import heapq
+import struct
+import bisect
+import logging
+import argparse
+import tempfile
+
+MAGIC = b'AFAPHIX1'
+_HEADER = struct.Struct('<8sIIQQQQ')   # magic, version, k, count, bloom_bytes, n_sizes, réservé
+_VERSION = 1
+_BLOOM_K = 5
+_BLOOM_BITS_PER_ENTRY = 10             # ~1 % de faux positifs
+_RUN_ENTRIES = 2000000                 # MD5 par passe triée en mémoire (~32 Mo)
+_MD5_RE = re.compile(r'(?<![0-9a-fA-F])([0-9a-fA-F]{32})(?![0-9a-fA-F])')
+
+
+def is_hash_index(path):
+    """True si le fichier est un index binaire (sinon : skiplist texte)."""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _bloom_bits(digest, nbits):
+    # Le MD5 est uniforme : double hachage sur ses deux moitiés de 64 bits.
+    v = int.from_bytes(digest, 'little')
+    h2 = (v >> 64) | 1
+    return [((v + i * h2) & 0xFFFFFFFFFFFFFFFF) % nbits for i in range(_BLOOM_K)]
+
+
+class HashIndex:
+    """Ensemble de MD5 en lecture seule, adossé à un fichier mmap."""
+
+    def __init__(self, path):
+        self.path = path
+        self._f = open(path, 'rb')
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, k, count, bloom_bytes, n_sizes, _ = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != _VERSION or k != _BLOOM_K:
+            raise ValueError(f"Index de hachés invalide : {path}")
+        self.count = count
+        self._bloom_off = _HEADER.size
+        self._nbits = bloom_bytes * 8
+        self._sizes_off = self._bloom_off + bloom_bytes
+        self._rec_off = self._sizes_off + n_sizes * 8
+        self._sizes = memoryview(self._mm)[self._sizes_off:self._rec_off].cast('q')
+        self.unsized = n_sizes == 0
+
+    def __reduce__(self):
+        return (HashIndex, (self.path,))
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+    def __contains__(self, md5_hex):
+        try:
+            digest = bytes.fromhex(md5_hex)
+        except (TypeError, ValueError):
+            return False
+        if len(digest) != 16:
+            return False
+        mm, boff = self._mm, self._bloom_off
+        for bit in _bloom_bits(digest, self._nbits):
+            if not mm[boff + (bit >> 3)] & (1 << (bit & 7)):
+                return False
+        lo, hi, off = 0, self.count, self._rec_off
+        while lo < hi:
+            mid = (lo + hi) // 2
+            rec = mm[off + mid * 16:off + mid * 16 + 16]
+            if rec < digest:
+                lo = mid + 1
+            elif rec > digest:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def has_size(self, size):
+        if self.unsized:
+            return True
+        i = bisect.bisect_left(self._sizes, size)
+        return i < len(self._sizes) and self._sizes[i] == size
+
+    def may_contain(self, path, size=None):
+        """False si le fichier ne PEUT PAS être dans l'index (taille)."""
+        if self.unsized:
+            return True
+        if size is None:
+            try:
+                size = os.stat(path).st_size
+            except OSError:
+                return False
+        return self.has_size(size)
+
+    def close(self):
+        try:
+            self._sizes.release()
+            self._mm.close()
+        except (BufferError, ValueError):
+            pass
+        self._f.close()
+
+
+# --- Import ------------------------------------------------------------------
+def _iter_hashes(path):
+    """(md5 binaire, taille ou None) pour chaque entrée d'une liste texte / CSV."""
+    with open(path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+        first = f.readline()
+        if not first:
+            return
+        header = next(csv.reader([first]))
+        cols = [c.strip().strip('"').lower() for c in header]
+        if 'md5' in cols:
+            i_md5 = cols.index('md5')
+            i_size = next((cols.index(c) for c in ('filesize', 'size', 'file_size') if c in cols), None)
+            for row in csv.reader(f):
+                if len(row) <= i_md5:
+                    continue
+                md5 = row[i_md5].strip().strip('"')
+                if len(md5) != 32:
+                    continue
+                size = None
+                if i_size is not None and len(row) > i_size:
+                    try:
+                        size = int(row[i_size])
+                    except ValueError:
+                        pass
+                try:
+                    yield bytes.fromhex(md5), size
+                except ValueError:
+                    continue
+            return
+        f.seek(0)
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            m = _MD5_RE.search(line)
+            if not m:
+                continue
+            parts = line.split(',')
+            size = None
+            if len(parts) > 1 and parts[0].strip().lower() == m.group(1).lower():
+                try:
+                    size = int(parts[1])
+                except ValueError:
+                    pass
+            yield bytes.fromhex(m.group(1)), size
+
+
+def _write_run(records, tmp_dir):
+    records.sort()
+    fd, path = tempfile.mkstemp(prefix='afap_hix_', suffix='.run', dir=tmp_dir)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(b''.join(records))
+    return path
+
+
+def _read_run(path):
+    with open(path, 'rb') as f:
+        while True:
+            buf = f.read(16 * 65536)
+            if not buf:
+                return
+            for i in range(0, len(buf), 16):
+                yield buf[i:i + 16]
+
+
+def build_index(sources, out_path, tmp_dir=None):
+    """Construit un index à partir de listes texte / CSV (tri externe par passes
+    de _RUN_ENTRIES, fusion, dédoublonnage). Renvoie le nombre de MD5 distincts."""
+    runs, records, sizes, unsized, total = [], [], set(), False, 0
+    try:
+        for src in sources:
+            for digest, size in _iter_hashes(src):
+                records.append(digest)
+                total += 1
+                if size is None:
+                    unsized = True
+                elif not unsized:
+                    sizes.add(size)
+                if len(records) >= _RUN_ENTRIES:
+                    runs.append(_write_run(records, tmp_dir))
+                    records = []
+        if records:
+            runs.append(_write_run(records, tmp_dir))
+            records = []
+
+        bloom_bytes = max(8, ((total * _BLOOM_BITS_PER_ENTRY + 63) // 64) * 8)
+        bloom = bytearray(bloom_bytes)
+        nbits = bloom_bytes * 8
+        count, last = 0, None
+        fd, rec_path = tempfile.mkstemp(prefix='afap_hix_', suffix='.rec', dir=tmp_dir)
+        runs.append(rec_path)
+        with os.fdopen(fd, 'wb') as rec:
+            for digest in heapq.merge(*[_read_run(r) for r in runs[:-1]]):
+                if digest == last:
+                    continue
+                last = digest
+                rec.write(digest)
+                count += 1
+                for bit in _bloom_bits(digest, nbits):
+                    bloom[bit >> 3] |= 1 << (bit & 7)
+
+        size_list = [] if unsized else sorted(sizes)
+        tmp_out = out_path + '.tmp'
+        with open(tmp_out, 'wb') as out:
+            out.write(_HEADER.pack(MAGIC, _VERSION, _BLOOM_K, count, bloom_bytes, len(size_list), 0))
+            out.write(bloom)
+            out.write(struct.pack(f'<{len(size_list)}q', *size_list))
+            with open(rec_path, 'rb') as rec:
+                while True:
+                    buf = rec.read(1048576)
+                    if not buf:
+                        break
+                    out.write(buf)
+        os.replace(tmp_out, out_path)
+        return count
+    finally:
+        for r in runs:
+            try:
+                os.unlink(r)
+            except OSError:
+                pass
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="AFAP — import de listes de hachés en index binaire (mmap)")
+    p.add_argument('sources', nargs='+', help="Listes texte / CSV (skiplist AFAP, NSRLFile.txt…)")
+    p.add_argument('--out', '-o', required=True, help="Index à écrire (ex. known.afaphix)")
+    p.add_argument('--tmp-dir', help="Dossier des fichiers de tri temporaires")
+    args = p.parse_args(argv)
+    for s in args.sources:
+        if not os.path.isfile(s):
+            print(f"ERREUR : fichier introuvable : {s}", file=sys.stderr)
+            return 2
+    count = build_index(args.sources, args.out, args.tmp_dir)
+    idx = HashIndex(args.out)
+    print(f"{count} MD5 distincts -> {args.out}"
+          + (" (sans pré-filtre taille)" if idx.unsized else f" ({len(idx._sizes)} tailles)"))
+    idx.close()
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -47,7 +47,7 @@ except ImportError:
 
 # --- Imports des modules historiques ---
 from utils import setup_logging, get_tablet_info, export_tablet_info_csv
-from core_scanner import should_skip
+from core_scanner import should_skip, end_run, load_skiplist, prime_skip_hashes, configure
 from extract_vins import extract_all_vins
 from extract_log_events import extract_all_log_events
 from extract_mac import extract_mac
@@ -124,7 +124,7 @@ class AutelApp(tk.Tk):
         self._check_dependencies()
 
     def _build_ui(self):
-        frm_src = ttk.LabelFrame(self, text='Source de Données (Dossier ou Archive .zip/.7z)')
+        frm_src = ttk.LabelFrame(self, text='Source de Données (Dossier ou Archive .zip/.7z/.tar)')
         frm_src.pack(fill='x', padx=10, pady=(10, 5))
         self.source_path = tk.StringVar()
         ttk.Entry(frm_src, textvariable=self.source_path).pack(side='left', fill='x', expand=True, padx=5, pady=2)
@@ -170,6 +170,18 @@ class AutelApp(tk.Tk):
         ttk.Entry(row3, textvariable=self.offset_sec, width=22).pack(side='left', padx=4)
         ttk.Label(row3, text='(tablette − réel, en secondes)').pack(side='left')
 
+        # Performance : budget mémoire du cache texte (au-delà : zlib puis disque)
+        frm_perf = ttk.LabelFrame(self, text="Performance (optionnel)")
+        frm_perf.pack(fill='x', padx=10, pady=5)
+        self.cache_mb = tk.StringVar(value='800')
+        rowp = ttk.Frame(frm_perf); rowp.pack(fill='x', padx=5, pady=2)
+        ttk.Label(rowp, text='Cache texte (Mo) :', width=16).pack(side='left')
+        ttk.Entry(rowp, textvariable=self.cache_mb, width=22).pack(side='left', padx=4)
+        ttk.Label(rowp, text='(au-delà : compressé, puis déversé sur disque)').pack(side='left')
+        self.physical_order = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frm_perf, text="Lire dans l'ordre physique du disque (scellé sur disque dur / USB)",
+                        variable=self.physical_order).pack(anchor='w', padx=5, pady=2)
+
         dep_frame = ttk.LabelFrame(self, text="Statut des Dépendances Optionnelles")
         dep_frame.pack(fill='x', padx=10, pady=5)
         ttk.Label(dep_frame, textvariable=self.dep_py7zr).pack(anchor='w', padx=5)
@@ -201,7 +213,7 @@ class AutelApp(tk.Tk):
     def select_source(self):
         is_file = messagebox.askyesno("Sélection de la source", "La source est-elle un fichier archive (Oui) ou un dossier (Non) ?")
         
-        supported_patterns = ["*.zip"]
+        supported_patterns = ["*.zip", "*.tar", "*.tar.gz", "*.tgz", "*.tar.bz2", "*.tar.xz", "*.img", "*.dd", "*.raw"]
         if PY7ZR_AVAILABLE:
             supported_patterns.append("*.7z")
         all_patterns_str = " ".join(supported_patterns)
@@ -296,9 +308,12 @@ class AutelApp(tk.Tk):
 
             script_dir = os.path.dirname(os.path.abspath(__file__))
             skiplist_file = os.path.join(script_dir, 'hash_skiplist.txt')
-            skip_md5 = {line.strip().lower() for line in open(skiplist_file, 'r', encoding='utf-8') if line.strip()} if os.path.isfile(skiplist_file) else set()
+            skip_md5 = load_skiplist(skiplist_file)
             
             _set_lang(self.lang_var.get())  # bascule i18n FR/EN pour le rapport
+            try: configure(cache_mb=max(16, int(self.cache_mb.get().strip())))
+            except ValueError: configure(cache_mb=800)
+            configure(physical_order=bool(self.physical_order.get()))
 
             # --- Décalage horloge : heure tablette (champ, sinon RTC du log UART) ---
             bootlog = self.bootlog_path.get().strip() or None
@@ -346,6 +361,7 @@ class AutelApp(tk.Tk):
                 ("Rangement de l'export",                  finalize_export),
             ]
             results = {}; total_modules = len(modules_to_run); base_progress = 10.0
+            prime_skip_hashes(source_to_scan, skip_md5)  # MD5 des seuls candidats (taille/tête)
             for i, (name, func) in enumerate(modules_to_run, 1):
                 module_weight = 90.0 / total_modules
                 self.progress_message.set(f"Module ({i}/{total_modules}): {name}...")
@@ -379,6 +395,7 @@ class AutelApp(tk.Tk):
             messagebox.showerror("Erreur Fatale", f"L'analyse a échoué.\n\nErreur: {e}")
             self.btn_start.config(text='Analyser', state='normal')
         finally:
+            end_run()  # spools / handles d'archives du run
             self.analysis_is_running = False
 
 
@@ -49,6 +49,8 @@ NV_FAIL_RX = re.compile(r'read_nv:\s*check fail|autel_nv_fixup[^\n]*read_nv fail
 SHUTDOWN_RX = re.compile(r"Reboot start, reason:\s*([^\n\r]+)")
 POWERCTL_RX = re.compile(r"sys\.powerctl='([^']+)'[^\n]*pid:\s*\d+\s*\((\w+)\)")
 
+WANTS = ()   # log fourni (--bootlog) ou cherché dans un dossier source
+
 
 def find_bootlog(src_dir, bootlog=None):
     """Chemin du log : explicite, sinon détecté dans src_dir (nom bootlog/uart)."""
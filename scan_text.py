@@ -34,8 +34,13 @@ _MAX_PROCS = 8
 
 _SKIP = set()  # skiplist MD5, injectée dans chaque worker via l'initializer
 
+WANTS = [{'include_ext': ('.log', '.txt')}]
+
 
 def _winit(skip):
+    # `skip` arrive déjà prêt : un HashIndex (hash_index.py) n'est picklé que
+    # par son CHEMIN et re-mappé par HashIndex.__reduce__ au dépicklage des
+    # arguments de l'initializer ; une skiplist texte arrive sous forme de set.
     global _SKIP
     _SKIP = skip or set()
 
@@ -49,7 +54,8 @@ def _process_file(task):
             raw = f.read()
     except Exception:
         return None
-    if _SKIP and hashlib.md5(raw).hexdigest().lower() in _SKIP:
+    if _SKIP and (not hasattr(_SKIP, 'has_size') or _SKIP.has_size(len(raw))) \
+            and hashlib.md5(raw).hexdigest().lower() in _SKIP:
         return None
     text = raw.decode('utf-8', 'ignore')
     return (AccountConsumer.build_bundle(rel_path, mtime, text),
@@ -0,0 +1,214 @@
+# source_manifest.py — AFAP
+# Auteur : Vincent Chapeau — Teel Technologies Canada (vincent.chapeau@teeltechcanada.com)
+#
+# Manifeste SQLite PERSISTANT d'une source, réutilisé d'un run à l'autre sur le
+# même scellé (relance en --lang en, nouveaux modules, skiplist corrigée…).
+#
+# Contenu : listing complet (chemin, rel, taille, mtime, inode, device) + MD5 /
+# SHA-256 déjà calculés, et, pour un dossier, le mtime de CHAQUE sous-dossier.
+#
+# Validation (bon marché) :
+#   - dossier : un stat par SOUS-DOSSIER (pas par fichier). Tout ajout, retrait
+#     ou renommage de fichier modifie le mtime du dossier parent -> listing
+#     rejeté et reconstruit. Un fichier RÉÉCRIT sur place ne touche pas son
+#     dossier : chaque fichier est donc re-stat-é (en parallèle, sans lecture)
+#     et sa taille / son mtime actualisés dans le listing repris. Les empreintes
+#     ne sont réutilisées que si taille + mtime sont identiques : aucun re-hachage.
+#   - archive : taille + mtime de l'archive.
+#
+# Emplacement : dossier de cache (défaut ~/.cache/afap/manifests, ou
+# --manifest-dir, par ex. à côté de la source), fichier <scellé>_<empreinte du
+# chemin>.sqlite. La source elle-même n'est JAMAIS modifiée.
+
+import os
+import sqlite3
+import hashlib
+import logging
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+SCHEMA_VERSION = '1'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta  (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS dirs  (rel TEXT PRIMARY KEY, mtime REAL);
+CREATE TABLE IF NOT EXISTS files (seq INTEGER PRIMARY KEY, path TEXT, rel TEXT,
+                                  size INTEGER, mtime REAL, ino INTEGER, dev INTEGER,
+                                  md5 TEXT, sha256 TEXT);
+"""
+
+
+def default_dir():
+    """Dossier de cache par défaut des manifestes."""
+    base = os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME') \
+        or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'afap', 'manifests')
+
+
+def manifest_path(src, manifest_dir=None):
+    """Chemin du manifeste d'une source : <scellé>_<sha1(chemin absolu)[:12]>.sqlite."""
+    abs_src = os.path.abspath(src)
+    seal = os.path.basename(abs_src.rstrip('/\\')) or 'source'
+    digest = hashlib.sha1(abs_src.encode('utf-8', 'surrogateescape')).hexdigest()[:12]
+    return os.path.join(manifest_dir or default_dir(), f"{seal}_{digest}.sqlite")
+
+
+def _stat_dir(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def _stat_file(path):
+    try:
+        st = os.stat(path)
+        return st.st_mtime, st.st_size, st.st_ino, st.st_dev
+    except OSError:
+        return None
+
+
+class SourceManifest:
+    def __init__(self, src, manifest_dir=None):
+        self.src = src
+        self.path = manifest_path(src, manifest_dir)
+        self.hashes = {}    # chemin -> (size, mtime, md5, sha256) du run précédent
+        self.refreshed = 0  # fichiers dont le stat a changé depuis l'écriture
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def _meta(self, conn):
+        return dict(conn.execute("SELECT key, value FROM meta"))
+
+    # --- lecture ---------------------------------------------------------
+    def load_listing(self, root=None, threads=16):
+        """Listing [(chemin, rel, mtime, size, ino, dev)] d'un DOSSIER si le
+        manifeste est encore valide, sinon None. Remplit self.hashes. Les
+        chemins sont reconstruits sous `root` (la source peut avoir été donnée
+        sous une autre forme, relative ou absolue, au run précédent)."""
+        if not os.path.isfile(self.path):
+            return None
+        try:
+            conn = self._connect()
+            try:
+                meta = self._meta(conn)
+                if meta.get('schema') != SCHEMA_VERSION or meta.get('kind') != 'dir':
+                    return None
+                dirs = conn.execute("SELECT rel, mtime FROM dirs").fetchall()
+                if not dirs:
+                    return None
+                root = root or self.src
+                with ThreadPoolExecutor(max_workers=max(1, threads)) as ex:
+                    now = list(ex.map(_stat_dir, [os.path.join(root, r) if r else root
+                                                  for r, _ in dirs]))
+                if any(cur != old for cur, (_, old) in zip(now, dirs)):
+                    logging.info("Manifeste : arborescence modifiée -> nouveau listing")
+                    return None
+                listing = []
+                for path, rel, size, mtime, ino, dev, md5, sha in conn.execute(
+                        "SELECT path, rel, size, mtime, ino, dev, md5, sha256 FROM files ORDER BY seq"):
+                    if root:
+                        path = os.path.join(root, rel)
+                    listing.append((path, rel, mtime, size, ino, dev))
+                    if md5:
+                        self.hashes[path] = (size, mtime, md5, sha)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logging.warning(f"Manifeste illisible {self.path}: {e}")
+            return None
+        # Fichiers réécrits sur place (dossier parent inchangé) : stat actualisé.
+        with ThreadPoolExecutor(max_workers=max(1, threads)) as ex:
+            stats = list(ex.map(_stat_file, [row[0] for row in listing]))
+        for i, (row, st) in enumerate(zip(listing, stats)):
+            if st is None:
+                logging.info(f"Manifeste : fichier disparu ({row[1]}) -> nouveau listing")
+                self.hashes.clear()
+                return None
+            if st[:2] != row[2:4]:
+                listing[i] = row[:2] + st
+                self.hashes.pop(row[0], None)
+                self.refreshed += 1
+        logging.info(f"Manifeste réutilisé : {len(listing)} fichiers, {len(self.hashes)} empreintes"
+                     + (f", {self.refreshed} fichiers modifiés sur place" if self.refreshed else ""))
+        return listing
+
+    def unchanged(self, hashes):
+        """Vrai si le listing repris n'a pas bougé et que `hashes` (chemin ->
+        (md5, sha256)) ne contient rien de plus que le manifeste : pas de réécriture."""
+        return not self.refreshed and hashes == {p: h[2:] for p, h in self.hashes.items()}
+
+    def load_dir_mtimes(self):
+        """{rel_dossier: mtime} enregistrés (listing repris tel quel)."""
+        try:
+            conn = self._connect()
+            try:
+                return dict(conn.execute("SELECT rel, mtime FROM dirs"))
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return {}
+
+    def load_members(self):
+        """Membres [(nom, taille, mtime)] d'une ARCHIVE si taille + mtime de
+        l'archive sont inchangés, sinon None."""
+        if not os.path.isfile(self.path):
+            return None
+        try:
+            st = os.stat(self.src)
+            conn = self._connect()
+            try:
+                meta = self._meta(conn)
+                if meta.get('schema') != SCHEMA_VERSION or meta.get('kind') != 'archive' \
+                        or meta.get('size') != str(st.st_size) or meta.get('mtime') != repr(st.st_mtime):
+                    return None
+                return [(rel, size, mtime) for rel, size, mtime in
+                        conn.execute("SELECT rel, size, mtime FROM files ORDER BY seq")]
+            finally:
+                conn.close()
+        except (OSError, sqlite3.Error):
+            return None
+
+    # --- écriture --------------------------------------------------------
+    def _write(self, meta, rows, dirs=()):
+        tmp = self.path + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            conn = sqlite3.connect(tmp)
+            try:
+                conn.executescript(_SCHEMA)
+                meta = dict(meta, schema=SCHEMA_VERSION, source=os.path.abspath(self.src),
+                            written=datetime.datetime.now().isoformat(timespec='seconds'))
+                conn.executemany("INSERT INTO meta VALUES (?, ?)", meta.items())
+                conn.executemany("INSERT INTO dirs VALUES (?, ?)", dirs)
+                conn.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                conn.commit()
+            finally:
+                conn.close()
+            os.replace(tmp, self.path)   # remplacement atomique
+        except (OSError, sqlite3.Error) as e:
+            logging.warning(f"Manifeste non écrit {self.path}: {e}")
+
+    def save_listing(self, listing, dir_mtimes, hashes):
+        """Écrit le manifeste d'un DOSSIER. `hashes` : chemin -> (md5, sha256)."""
+        rows = []
+        for seq, (path, rel, mtime, size, ino, dev) in enumerate(listing):
+            md5, sha = hashes.get(path, (None, None))
+            rows.append((seq, path, rel, size, mtime, ino, dev, md5, sha))
+        self._write({'kind': 'dir'}, rows, sorted(dir_mtimes.items()))
+
+    def save_members(self, members):
+        """Écrit le manifeste d'une ARCHIVE (listing des membres)."""
+        try:
+            st = os.stat(self.src)
+        except OSError:
+            return
+        rows = [(seq, None, rel, size, mtime, None, None, None, None)
+                for seq, (rel, size, mtime) in enumerate(members)]
+        self._write({'kind': 'archive', 'size': str(st.st_size), 'mtime': repr(st.st_mtime)}, rows)
@@ -0,0 +1,391 @@
+# sqlite_carver.py — AFAP
+# Auteur : Vincent Chapeau — Teel Technologies Canada (vincent.chapeau@teeltechcanada.com)
+#
+# Moteur de CARVING SQLite au niveau page (utilisé par extract_sqlite_carved) :
+# récupère des enregistrements supprimés dans
+#   - les pages de la freelist (troncs : au-delà de la liste des feuilles ;
+#     feuilles : page entière, cellules encore intactes comprises) ;
+#   - l'espace NON ALLOUÉ des feuilles de table vivantes (entre le tableau des
+#     pointeurs de cellules et la zone de contenu) et leurs freeblocks.
+#
+# Un enregistrement candidat est un en-tête de record SQLite (longueur + types
+# de série en varint) suivi de son corps. Il n'est retenu que s'il correspond
+# EXACTEMENT au schéma d'une table : même nombre de colonnes, aucune valeur
+# incompatible avec l'affinité déclarée (texte numérique, BLOB ou réel entier
+# dans une colonne INTEGER, BLOB dans une colonne REAL / NUMERIC, nombre dans
+# une colonne TEXT, alias de rowid non NULL), texte décodable et imprimable.
+# Freeblocks : les 4 premiers octets (suivant + taille) recouvrent longueur +
+# rowid, parfois la longueur d'en-tête et le 1er type de série ; le record est
+# alors relu SANS en-tête (_try_headerless), types de série pris à la suite du
+# freeblock et validés contre le schéma de la même façon.
+#
+# db_layout() (processus parent) lit le schéma et classe les pages ;
+# carve_pages() (worker) traite une tranche de pages sur un mmap du fichier.
+
+import mmap
+import struct
+from sqlite_format import read_header, _varint, _serial_len
+from sqlite_store import connect_readonly
+
+_PAGE_TABLE_INTERIOR = 0x05
+_PAGE_TABLE_LEAF = 0x0D
+_MASTER = ('sqlite_master', 1, ['type', 'name', 'tbl_name', 'rootpage', 'sql'],
+           ['TEXT', 'TEXT', 'TEXT', 'INTEGER', 'TEXT'], None)
+_PRINTABLE_CTRL = {'\t', '\n', '\r'}
+
+# Origine d'un enregistrement récupéré (colonne 'origine' du CSV)
+ORIGIN_UNALLOCATED = 'non_alloue'
+ORIGIN_FREEBLOCK = 'freeblock'
+ORIGIN_FREE_PAGE = 'page_libre'
+ORIGIN_TRUNK = 'freelist_tronc'
+
+
+def _affinity(decl):
+    d = (decl or '').upper()
+    if 'INT' in d:
+        return 'INTEGER'
+    if 'CHAR' in d or 'CLOB' in d or 'TEXT' in d:
+        return 'TEXT'
+    if not d or 'BLOB' in d:
+        return 'BLOB'
+    if 'REAL' in d or 'FLOA' in d or 'DOUB' in d:
+        return 'REAL'
+    return 'NUMERIC'
+
+
+def _quote_ident(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _read_schema(path, immutable):
+    """[(nom, page racine, colonnes, affinités, indice alias rowid)], sqlite_master inclus."""
+    conn = connect_readonly(path, immutable)
+    try:
+        tables = [_MASTER]
+        for name, root in conn.execute(
+                "SELECT name, rootpage FROM sqlite_master WHERE type='table' AND rootpage > 0"):
+            info = conn.execute(f"PRAGMA table_info({_quote_ident(name)})").fetchall()
+            if not info:
+                continue
+            pks = [r for r in info if r[5]]
+            alias = pks[0][0] if len(pks) == 1 and (pks[0][2] or '').upper() == 'INTEGER' else None
+            tables.append((name, root, [r[1] for r in info], [_affinity(r[2]) for r in info], alias))
+        return tables
+    finally:
+        conn.close()
+
+
+def _page_base(pgno, page_size):
+    return (pgno - 1) * page_size + (100 if pgno == 1 else 0)
+
+
+def _table_leaves(mm, page_size, npages, root):
+    """Feuilles du b-tree de table de racine `root` ([] si ce n'est pas un b-tree de table)."""
+    leaves, stack, seen = [], [root], set()
+    while stack:
+        pgno = stack.pop()
+        if pgno < 1 or pgno > npages or pgno in seen:
+            continue
+        seen.add(pgno)
+        base = _page_base(pgno, page_size)
+        kind = mm[base]
+        if kind == _PAGE_TABLE_INTERIOR:
+            ncells = struct.unpack_from('>H', mm, base + 3)[0]
+            page_off = (pgno - 1) * page_size
+            for i in range(ncells):
+                ptr = struct.unpack_from('>H', mm, base + 12 + 2 * i)[0]
+                if ptr + 4 <= page_size:
+                    stack.append(struct.unpack_from('>I', mm, page_off + ptr)[0])
+            stack.append(struct.unpack_from('>I', mm, base + 8)[0])
+        elif kind == _PAGE_TABLE_LEAF:
+            leaves.append(pgno)
+    return leaves
+
+
+def _freelist(mm, page_size, usable, npages):
+    """[(page, 'trunk' | 'free')] de la freelist (chaîne de troncs + feuilles)."""
+    out, seen = [], set()
+    trunk = struct.unpack_from('>I', mm, 32)[0]
+    while 1 <= trunk <= npages and trunk not in seen:
+        seen.add(trunk)
+        off = (trunk - 1) * page_size
+        nxt, n = struct.unpack_from('>II', mm, off)
+        out.append((trunk, 'trunk'))
+        for i in range(min(n, usable // 4 - 2)):
+            leaf = struct.unpack_from('>I', mm, off + 8 + 4 * i)[0]
+            if 1 <= leaf <= npages and leaf not in seen:
+                seen.add(leaf)
+                out.append((leaf, 'free'))
+        trunk = nxt
+    return out
+
+
+def db_layout(path, immutable=False):
+    """(ctx, pages) d'une base locale, ou None si ce n'est pas une base lisible.
+    ctx : page_size, usable, encoding, tables ; pages : [(page, type, table)]
+    avec type 'leaf' (feuille vivante, table = indice), 'trunk' ou 'free' (-1)."""
+    with open(path, 'rb') as f:
+        hdr = read_header(f.read(100))
+    if hdr is None:
+        return None
+    tables = _read_schema(path, immutable)
+    page_size = hdr['page_size']
+    usable = page_size - hdr['reserved']
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        npages = len(mm) // page_size
+        pages = {}
+        for tidx, (_, root, _, _, _) in enumerate(tables):
+            for leaf in _table_leaves(mm, page_size, npages, root):
+                pages[leaf] = ('leaf', tidx)
+        for pgno, kind in _freelist(mm, page_size, usable, npages):
+            pages.setdefault(pgno, (kind, -1))
+    finally:
+        mm.close()
+    ctx = {'page_size': page_size, 'usable': usable, 'encoding': hdr['encoding'], 'tables': tables}
+    return ctx, [(pgno, kind, owner) for pgno, (kind, owner) in sorted(pages.items())]
+
+
+# --- Worker ------------------------------------------------------------------
+def _decode(page, pos, t, encoding):
+    n = _serial_len(t)
+    raw = page[pos:pos + n]
+    if t == 0:
+        return None
+    if 1 <= t <= 6:
+        return int.from_bytes(raw, 'big', signed=True)
+    if t == 7:
+        return struct.unpack('>d', raw)[0]
+    if t in (8, 9):
+        return t - 8
+    if t % 2:
+        txt = raw.decode(encoding)                       # strict : UnicodeDecodeError
+        if any(c < ' ' and c not in _PRINTABLE_CTRL for c in txt):
+            raise ValueError('texte non imprimable')
+        return txt
+    return bytes(raw)
+
+
+def _looks_numeric(txt):
+    try:
+        float(txt)
+        return True
+    except ValueError:
+        return False
+
+
+def _conflicts(table, types, values):
+    _, _, _, affs, alias = table
+    if alias is not None and types[alias] != 0:
+        return True
+    for aff, t, v in zip(affs, types, values):
+        if t == 0:
+            continue
+        if aff == 'TEXT' and 1 <= t <= 9:
+            return True
+        if aff in ('INTEGER', 'REAL', 'NUMERIC'):
+            if isinstance(v, bytes):
+                return True                      # SQLite n'y range jamais d'octets d'un littéral
+            if isinstance(v, str) and _looks_numeric(v):
+                return True
+            if t == 7 and aff != 'REAL' and v.is_integer():
+                return True                      # converti en entier par l'affinité
+    return False
+
+
+def _try_record(page, pos, end, cands, ctx):
+    """(indice table, types, valeurs, fin) du record commençant à `pos`, ou None."""
+    hlen, q = _varint(page, pos)
+    hend = pos + hlen
+    if hlen < 2 or hend > end or hlen > ctx['max_header']:
+        return None
+    types = []
+    while q < hend:
+        t, q = _varint(page, q)
+        if t in (10, 11):
+            return None
+        types.append(t)
+    if q != hend:
+        return None
+    rec = _values_for(page, types, hend, end, cands, ctx)
+    return rec and (rec[0], types, rec[1], rec[2])
+
+
+def _values_for(page, types, body_start, end, cands, ctx):
+    """(indice table, valeurs, fin) pour des types de série donnés, ou None."""
+    tables = ctx['tables']
+    matching = [i for i in cands if len(tables[i][2]) == len(types)]
+    if not matching:
+        return None
+    body = sum(_serial_len(t) for t in types)
+    if body == 0 or body_start + body > end:
+        return None
+    values, p = [], body_start
+    try:
+        for t in types:
+            values.append(_decode(page, p, t, ctx['encoding']))
+            p += _serial_len(t)
+    except (UnicodeDecodeError, ValueError, struct.error):
+        return None
+    for i in matching:
+        if not _conflicts(tables[i], types, values):
+            return i, values, p
+    return None
+
+
+def _try_headerless(page, start, end, cands, ctx):
+    """Record d'une cellule supprimée dont le freeblock (4 octets : suivant +
+    taille) a écrasé la longueur d'en-tête, voire le 1er type de série (rowid
+    < 128 et charge < 128 : alias de rowid en 1re colonne, donc NULL). Les types
+    restants commencent à `start`. -> (indice table, valeurs, fin) ou None."""
+    tables = ctx['tables']
+    for i in cands:
+        ncols, alias = len(tables[i][2]), tables[i][4]
+        for lost_first in ((False, True) if alias == 0 else (False,)):
+            types, q = ([0] if lost_first else []), start
+            try:
+                while len(types) < ncols:
+                    t, q = _varint(page, q)
+                    if t in (10, 11):
+                        break
+                    types.append(t)
+            except IndexError:
+                continue
+            if len(types) != ncols:
+                continue
+            rec = _values_for(page, types, q, end, [i], ctx)
+            if rec:
+                return rec
+    return None
+
+
+def _scan_region(page, start, end, cands, ctx, origin, hits):
+    """Records à en-tête intact dans [start, end)."""
+    pos = start
+    while pos < end - 1:
+        b = page[pos]
+        if b < 2 or (b < 0x80 and b > ctx['max_header']):
+            pos += 1
+            continue
+        try:
+            rec = _try_record(page, pos, end, cands, ctx)
+        except IndexError:
+            rec = None
+        if rec is None:
+            pos += 1
+            continue
+        tidx, _, values, rec_end = rec
+        hits.append((pos, rec_end, tidx, origin, None, values))
+        pos = rec_end
+
+
+def _scan_orphan_freeblocks(page, start, end, cands, ctx, origin, hits):
+    """Freeblocks dont la chaîne est perdue (page devenue tronc de freelist,
+    en-tête de page écrasé) : repérés à leur propre en-tête (suivant, taille)
+    cohérent, puis record sans en-tête (_try_headerless)."""
+    usable = ctx['usable']
+    for pos in range(start, end - 6):
+        nxt, size = struct.unpack_from('>HH', page, pos)
+        if size < 6 or pos + size > end or (nxt and not pos + size <= nxt < usable):
+            continue
+        rec = _try_headerless(page, pos + 4, pos + size, cands, ctx)
+        if rec:
+            tidx, values, rec_end = rec
+            hits.append((pos + 4, rec_end, tidx, origin, None, values))
+
+
+def _leaf_regions(page, base, usable):
+    """(zone non allouée, [freeblocks], [pointeurs de cellules]) d'une feuille de table."""
+    ncells, content = struct.unpack_from('>HH', page, base + 3)
+    content = content or 65536
+    ptr_end = base + 8 + 2 * ncells
+    gap = (ptr_end, min(content, usable)) if ptr_end < min(content, usable) else None
+    fbs, off, guard = [], struct.unpack_from('>H', page, base + 1)[0], 0
+    while off and off + 4 <= usable and guard < usable // 4:
+        nxt, size = struct.unpack_from('>HH', page, off)
+        fbs.append((off + 4, min(off + size, usable)))
+        off, guard = nxt, guard + 1
+    ptrs = [p for p in struct.unpack_from(f'>{ncells}H', page, base + 8) if p < usable] \
+        if ptr_end <= usable else []
+    return gap, fbs, ptrs
+
+
+def _carve_leaf(page, base, kind, cands, ctx, hits):
+    usable = ctx['usable']
+    gap, fbs, ptrs = _leaf_regions(page, base, usable)
+    if kind == 'free':
+        # Feuille libérée : ses cellules sont souvent encore intactes (rowid connu).
+        for ptr in ptrs:
+            try:
+                size, q = _varint(page, ptr)
+                rowid, q = _varint(page, q)
+                rec = _try_record(page, q, min(q + size, usable), cands, ctx)
+            except IndexError:
+                rec = None
+            if rec:
+                tidx, _, values, rec_end = rec
+                alias = ctx['tables'][tidx][4]
+                if alias is not None:
+                    values[alias] = rowid
+                hits.append((ptr, rec_end, tidx, ORIGIN_FREE_PAGE, rowid, values))
+        origin_gap = origin_fb = ORIGIN_FREE_PAGE
+    else:
+        origin_gap, origin_fb = ORIGIN_UNALLOCATED, ORIGIN_FREEBLOCK
+    if gap:
+        _scan_region(page, gap[0], gap[1], cands, ctx, origin_gap, hits)
+    for start, end in fbs:
+        rec = _try_headerless(page, start, end, cands, ctx)
+        if rec:
+            tidx, values, rec_end = rec
+            hits.append((start, rec_end, tidx, origin_fb, None, values))
+        _scan_region(page, start, end, cands, ctx, origin_fb, hits)
+
+
+def _carve_page(mm, pgno, kind, owner, ctx, out):
+    page_size, usable = ctx['page_size'], ctx['usable']
+    page = mm[(pgno - 1) * page_size:(pgno - 1) * page_size + usable]
+    if len(page) < usable:
+        return
+    base = 100 if pgno == 1 else 0
+    cands = [owner] if owner >= 0 else ctx['all_tables']
+    hits = []
+    try:
+        if kind == 'trunk':
+            n = min(struct.unpack_from('>I', page, 4)[0], usable // 4 - 2)
+            _scan_region(page, 8 + 4 * n, usable, cands, ctx, ORIGIN_TRUNK, hits)
+            _scan_orphan_freeblocks(page, 8 + 4 * n, usable, cands, ctx, ORIGIN_TRUNK, hits)
+        elif page[base] == _PAGE_TABLE_LEAF:
+            _carve_leaf(page, base, kind, cands, ctx, hits)
+        elif kind == 'free':
+            _scan_region(page, 0, usable, cands, ctx, ORIGIN_FREE_PAGE, hits)
+            _scan_orphan_freeblocks(page, 0, usable, cands, ctx, ORIGIN_FREE_PAGE, hits)
+    except struct.error:
+        pass
+    # Un même record peut être vu par deux passes : dédoublonnage par position
+    # de fin (la première passe, la plus fiable, l'emporte), puis ordre de la page.
+    by_end = {}
+    for hit in hits:
+        by_end.setdefault(hit[1], hit)
+    page_off = (pgno - 1) * page_size
+    for start, _, tidx, origin, rowid, values in sorted(by_end.values(), key=lambda h: h[0]):
+        out.append((tidx, origin, pgno, page_off + start, rowid, values))
+
+
+def carve_pages(task):
+    """Worker : task = (chemin, ctx, [(page, type, table)]) ->
+    [(indice table, origine, page, offset fichier, rowid ou None, valeurs)]."""
+    path, ctx, pages = task
+    ctx = dict(ctx)
+    ctx['all_tables'] = list(range(len(ctx['tables'])))
+    max_cols = max((len(t[2]) for t in ctx['tables']), default=1)
+    ctx['max_header'] = min(1 + 9 * max_cols, ctx['usable'])
+    out = []
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        for pgno, kind, owner in pages:
+            _carve_page(mm, pgno, kind, owner, ctx, out)
+    finally:
+        mm.close()
+    return out
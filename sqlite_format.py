@@ -0,0 +1,322 @@
+# sqlite_format.py — AFAP
+# Auteur : Vincent Chapeau — Teel Technologies Canada (vincent.chapeau@teeltechcanada.com)
+#
+# Lecture MINIMALE du format de fichier SQLite, sans sqlite3 ni copie de la base :
+# en-tête (100 o) puis b-tree de sqlite_master (racine = page 1), en général les
+# premiers Ko du fichier. Sert à savoir QUELLES TABLES contient une base avant
+# de la matérialiser (export_sqlite_tables : la plupart des .db de l'extraction
+# n'ont aucune des tables recherchées).
+#
+# Prudent par construction : toute incohérence (page hors fichier, cycle, type
+# de page inattendu, lecture au-delà de _PROBE_MAX_BYTES sur un flux non
+# positionnable) renvoie None = « indécidable », et l'appelant ouvre alors la
+# base normalement. Le contenu d'un -wal n'est PAS lu : l'appelant s'en charge.
+#
+# Journal WAL (-wal) : wal_header() / wal_frames() parcourent les frames sur un
+# tampon (mmap) sans copie intégrale : numéro de page, marqueur de commit, sels,
+# validité de la somme de contrôle. Sommes calculées en lot avec NumPy (la
+# récurrence s0/s1 de SQLite est linéaire : puissances de [[1,1],[1,2]]
+# modulo 2^32), repli Python pur sinon.
+
+import struct
+try:
+    import numpy as np
+    _HAS_NUMPY = True
+except ImportError:
+    _HAS_NUMPY = False
+
+MAGIC = b'SQLite format 3\x00'
+HEADER_SIZE = 100
+_PROBE_MAX_BYTES = 4 * 1024 * 1024    # flux non positionnable : lecture avant bornée
+_MAX_PAGES = 4096                     # garde-fou (sqlite_master ne fait que quelques pages)
+
+_PAGE_TABLE_INTERIOR = 0x05
+_PAGE_TABLE_LEAF = 0x0D
+_ENCODINGS = {1: 'utf-8', 2: 'utf-16-le', 3: 'utf-16-be'}
+
+
+class _Undecidable(Exception):
+    pass
+
+
+def read_header(data):
+    """En-tête SQLite -> dict (page_size, reserved, encoding, page_count, wal),
+    ou None si `data` ne commence pas par l'en-tête d'une base SQLite 3."""
+    if len(data) < HEADER_SIZE or data[:16] != MAGIC:
+        return None
+    page_size = struct.unpack_from('>H', data, 16)[0]
+    if page_size == 1:
+        page_size = 65536
+    if page_size < 512 or page_size & (page_size - 1):
+        return None
+    return {
+        'page_size': page_size,
+        'reserved': data[20],
+        'wal': data[18] == 2 or data[19] == 2,          # journal_mode=WAL
+        'page_count': struct.unpack_from('>I', data, 28)[0],
+        'encoding': _ENCODINGS.get(struct.unpack_from('>I', data, 56)[0], 'utf-8'),
+    }
+
+
+def _varint(buf, pos):
+    v = 0
+    for i in range(8):
+        b = buf[pos + i]
+        v = (v << 7) | (b & 0x7F)
+        if not b & 0x80:
+            return v, pos + i + 1
+    return (v << 8) | buf[pos + 8], pos + 9
+
+
+def _serial_len(t):
+    if t < 12:
+        return (0, 1, 2, 3, 4, 6, 8, 8, 0, 0, 0, 0)[t]
+    return (t - 12) // 2 if t % 2 == 0 else (t - 13) // 2
+
+
+class _PageReader:
+    """Pages d'un flux binaire : seek si possible, sinon lecture avant bornée."""
+
+    def __init__(self, fobj, page_size):
+        self.f = fobj
+        self.page_size = page_size
+        try:
+            self.seekable = fobj.seekable()
+        except Exception:
+            self.seekable = False
+        self.buf = bytearray()
+
+    def page(self, pgno):
+        off, n = (pgno - 1) * self.page_size, self.page_size
+        if self.seekable:
+            self.f.seek(off)
+            data = self.f.read(n)
+        else:
+            if off + n > _PROBE_MAX_BYTES:
+                raise _Undecidable('lecture avant trop longue')
+            while len(self.buf) < off + n:
+                chunk = self.f.read(off + n - len(self.buf))
+                if not chunk:
+                    break
+                self.buf += chunk
+            data = bytes(self.buf[off:off + n])
+        if len(data) != n:
+            raise _Undecidable(f'page {pgno} hors fichier')
+        return data
+
+
+def _cell_payload(reader, page, pos, usable):
+    """Charge utile complète d'une cellule de feuille de table (débordement suivi)."""
+    size, pos = _varint(page, pos)
+    _, pos = _varint(page, pos)                          # rowid
+    max_local = usable - 35
+    if size <= max_local:
+        return page[pos:pos + size]
+    min_local = ((usable - 12) * 32 // 255) - 23
+    local = min_local + (size - min_local) % (usable - 4)
+    if local > max_local:
+        local = min_local
+    out = bytearray(page[pos:pos + local])
+    ovfl = struct.unpack_from('>I', page, pos + local)[0]
+    seen = set()
+    while len(out) < size:
+        if not ovfl or ovfl in seen or len(seen) > _MAX_PAGES:
+            raise _Undecidable('chaîne de débordement invalide')
+        seen.add(ovfl)
+        data = reader.page(ovfl)
+        ovfl = struct.unpack_from('>I', data, 0)[0]
+        out += data[4:usable][:size - len(out)]
+    return bytes(out)
+
+
+def _record_columns(payload, count, encoding):
+    """Les `count` premières colonnes d'un enregistrement (texte décodé)."""
+    hdr_len, pos = _varint(payload, 0)
+    types = []
+    while pos < hdr_len and len(types) < count:
+        t, pos = _varint(payload, pos)
+        types.append(t)
+    off, cols = hdr_len, []
+    for t in types:
+        n = _serial_len(t)
+        raw = payload[off:off + n]
+        if t >= 13 and t % 2:
+            cols.append(bytes(raw).decode(encoding, 'replace'))
+        elif 1 <= t <= 6:
+            cols.append(int.from_bytes(raw, 'big', signed=True))
+        elif t in (8, 9):
+            cols.append(t - 8)
+        else:
+            cols.append(None if t == 0 else bytes(raw))
+        off += n
+    return cols
+
+
+def schema_entries(fobj):
+    """[(type, name, tbl_name)] de sqlite_master lus depuis le flux `fobj`
+    (positionné au début de la base) ; [] si ce n'est pas une base SQLite 3
+    (sqlite3 la refuserait aussi). None si la structure n'est pas décidable :
+    l'appelant ouvre alors la base normalement."""
+    first = fobj.read(HEADER_SIZE)
+    hdr = read_header(first)
+    if hdr is None:
+        return []
+    page_size = hdr['page_size']
+    usable = page_size - hdr['reserved']
+    reader = _PageReader(fobj, page_size)
+    if not reader.seekable:
+        reader.buf += first
+    out, stack, seen = [], [1], set()
+    try:
+        while stack:
+            pgno = stack.pop()
+            if pgno in seen or len(seen) > _MAX_PAGES:
+                raise _Undecidable('cycle dans le b-tree')
+            seen.add(pgno)
+            page = reader.page(pgno)
+            base = HEADER_SIZE if pgno == 1 else 0
+            kind = page[base]
+            ncells = struct.unpack_from('>H', page, base + 3)[0]
+            if kind == _PAGE_TABLE_INTERIOR:
+                ptrs = struct.unpack_from(f'>{ncells}H', page, base + 12)
+                children = [struct.unpack_from('>I', page, p)[0] for p in ptrs]
+                children.append(struct.unpack_from('>I', page, base + 8)[0])
+                stack.extend(reversed(children))          # ordre des rowid
+            elif kind == _PAGE_TABLE_LEAF:
+                for p in struct.unpack_from(f'>{ncells}H', page, base + 8):
+                    payload = _cell_payload(reader, page, p, usable)
+                    cols = _record_columns(payload, 3, hdr['encoding'])
+                    if len(cols) == 3:
+                        out.append(tuple(cols))
+            else:
+                raise _Undecidable(f'type de page {kind:#x}')
+    except (_Undecidable, struct.error, IndexError, ValueError, OSError):
+        return None
+    return out
+
+
+def table_names(fobj):
+    """Noms des tables d'une base (set), ou None si indécidable."""
+    entries = schema_entries(fobj)
+    if entries is None:
+        return None
+    return {name for kind, name, _ in entries if kind == 'table'}
+
+
+# --- Journal WAL -------------------------------------------------------------
+WAL_MAGIC = (0x377F0682, 0x377F0683)     # sommes en mots little / big-endian
+WAL_HEADER_SIZE = 32
+WAL_FRAME_HEADER = 24
+_WAL_HDR = struct.Struct('>8I')
+_WAL_FRAME_HDR = struct.Struct('>6I')
+_MASK32 = 0xFFFFFFFF
+_WAL_BATCH_BYTES = 8 * 1024 * 1024       # frames par lot NumPy (~8 Mo)
+
+
+def wal_checksum(data, s0=0, s1=0, big_endian=False):
+    """Somme de contrôle WAL de SQLite (mots de 32 bits par paires), Python pur."""
+    words = struct.unpack(('>' if big_endian else '<') + f'{len(data) // 4}I', data)
+    for i in range(0, len(words) - 1, 2):
+        s0 = (s0 + words[i] + s1) & _MASK32
+        s1 = (s1 + words[i + 1] + s0) & _MASK32
+    return s0, s1
+
+
+def wal_header(buf):
+    """En-tête d'un WAL -> dict, ou None si ce n'est pas un WAL SQLite."""
+    if len(buf) < WAL_HEADER_SIZE:
+        return None
+    magic, version, page_size, ckpt, salt1, salt2, ck1, ck2 = _WAL_HDR.unpack_from(buf, 0)
+    if magic not in WAL_MAGIC or page_size < 512 or page_size > 65536 or page_size & (page_size - 1):
+        return None
+    big_endian = magic == WAL_MAGIC[1]
+    return {
+        'magic': magic, 'version': version, 'page_size': page_size,
+        'checkpoint_seq': ckpt, 'salt1': salt1, 'salt2': salt2,
+        'checksum': (ck1, ck2), 'big_endian': big_endian,
+        'header_ok': wal_checksum(bytes(buf[:24]), big_endian=big_endian) == (ck1, ck2),
+    }
+
+
+def _wal_powers(n):
+    """M^k (k = 0..n) modulo 2^64 pour M = [[1,1],[1,2]] (uint64, débordement voulu)."""
+    P = np.empty((n + 1, 2, 2), dtype=np.uint64)
+    P[0] = np.eye(2, dtype=np.uint64)
+    M = np.array([[1, 1], [1, 2]], dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for k in range(1, n + 1):
+            P[k] = P[k - 1] @ M
+    return P
+
+
+def _wal_checksums_np(buf, first, count, frame_size, seeds, big_endian, powers):
+    """Sommes de `count` frames consécutives (à partir de l'indice `first`),
+    chacune initialisée par `seeds` (tableau (count, 2))."""
+    off = WAL_HEADER_SIZE + first * frame_size
+    raw = np.frombuffer(buf, dtype=np.uint8, count=count * frame_size, offset=off)
+    try:
+        raw = raw.reshape(count, frame_size)
+        data = np.concatenate((raw[:, :8], raw[:, WAL_FRAME_HEADER:]), axis=1)
+    finally:
+        del raw                                           # libère la vue sur le mmap
+    words = data.view('>u4' if big_endian else '<u4').astype(np.uint64)
+    a, b = words[:, 0::2], words[:, 1::2]
+    n = a.shape[1]
+    Q = powers[n - 1::-1]                                 # M^(n-1-i), i = 0..n-1
+    with np.errstate(over='ignore'):
+        u = (a, a + b)
+        acc = [sum(u[j] @ Q[:, r, j] for j in (0, 1)) for r in (0, 1)]
+        Mn = powers[n]
+        s0 = Mn[0, 0] * seeds[:, 0] + Mn[0, 1] * seeds[:, 1] + acc[0]
+        s1 = Mn[1, 0] * seeds[:, 0] + Mn[1, 1] * seeds[:, 1] + acc[1]
+    return (s0 & _MASK32).tolist(), (s1 & _MASK32).tolist()
+
+
+def wal_frames(buf, hdr=None):
+    """Frames d'un WAL (tampon / mmap) : liste de dict
+    index, offset, page, commit (taille de la base si frame de commit, sinon 0),
+    salt1, salt2, salt_ok, checksum_ok (somme de la frame chaînée sur la somme
+    STOCKÉE de la précédente), valid (chaîne intacte depuis le début, comme
+    SQLite) et committed (valide et couverte par un commit : ce que SQLite lit).
+    Les frames invalides/anciennes restent listées : ce sont les versions
+    historiques des pages."""
+    hdr = hdr or wal_header(buf)
+    if hdr is None:
+        return []
+    page_size, be = hdr['page_size'], hdr['big_endian']
+    frame_size = WAL_FRAME_HEADER + page_size
+    count = (len(buf) - WAL_HEADER_SIZE) // frame_size
+    frames, stored = [], [hdr['checksum']]
+    for i in range(count):
+        off = WAL_HEADER_SIZE + i * frame_size
+        page, commit, salt1, salt2, ck1, ck2 = _WAL_FRAME_HDR.unpack_from(buf, off)
+        frames.append({'index': i, 'offset': off, 'page': page, 'commit': commit,
+                       'salt1': salt1, 'salt2': salt2,
+                       'salt_ok': (salt1, salt2) == (hdr['salt1'], hdr['salt2'])})
+        stored.append((ck1, ck2))
+
+    if _HAS_NUMPY and count:
+        powers = _wal_powers(2 + page_size // 8)
+        batch = max(1, _WAL_BATCH_BYTES // frame_size)
+        for first in range(0, count, batch):
+            n = min(batch, count - first)
+            seeds = np.array(stored[first:first + n], dtype=np.uint64)
+            s0, s1 = _wal_checksums_np(buf, first, n, frame_size, seeds, be, powers)
+            for k in range(n):
+                frames[first + k]['checksum_ok'] = (s0[k], s1[k]) == stored[first + k + 1]
+    else:
+        for i, fr in enumerate(frames):
+            off = fr['offset']
+            s0, s1 = wal_checksum(bytes(buf[off:off + 8]), *stored[i], big_endian=be)
+            s0, s1 = wal_checksum(bytes(buf[off + WAL_FRAME_HEADER:off + frame_size]), s0, s1, be)
+            fr['checksum_ok'] = (s0, s1) == stored[i + 1]
+
+    chain, last_commit = hdr['header_ok'], -1
+    for fr in frames:
+        chain = chain and fr['salt_ok'] and fr['checksum_ok']
+        fr['valid'] = chain
+        if chain and fr['commit']:
+            last_commit = fr['index']
+    for fr in frames:
+        fr['committed'] = fr['valid'] and fr['index'] <= last_commit
+    return frames
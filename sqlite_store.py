@@ -0,0 +1,124 @@
+# sqlite_store.py — AFAP
+# Auteur : Vincent Chapeau — Teel Technologies Canada (vincent.chapeau@teeltechcanada.com)
+#
+# Service de MATÉRIALISATION des bases SQLite du run, partagé par tous les
+# modules qui lisent des .db (usage, ES, stockage externe, export des tables…).
+#
+#   - Base du disque SANS WAL : ouverte EN PLACE, URI  mode=ro&immutable=1
+#     (aucune écriture, aucun verrou, aucun -shm créé à côté de la preuve).
+#   - Base du disque AVEC un -wal non vide, ou membre d'archive : copiée UNE
+#     fois (copie en flux, pas de lecture intégrale en mémoire) dans un dossier
+#     temporaire, avec ses compagnons -wal / -shm, puis ouverte en lecture seule.
+#     Le contenu du WAL est donc pris en compte, quelle que soit la source.
+#   - Une connexion par base, mise en cache et partagée entre les modules
+#     (les modules ne la ferment PAS) ; close_all() ferme tout et supprime le
+#     dossier temporaire (core_scanner.end_run()).
+
+import os
+import shutil
+import sqlite3
+import logging
+import tempfile
+import threading
+from urllib.parse import quote
+
+_COPY_CHUNK = 1024 * 1024
+_SIDECARS = ('-wal', '-shm')
+
+
+def _uri(path, immutable=False):
+    p = quote(os.path.abspath(path).replace('\\', '/'))
+    return f"file:{p}?mode=ro" + ("&immutable=1" if immutable else "")
+
+
+def connect_readonly(path, immutable=False):
+    """Connexion lecture seule à une base locale (aussi utilisée par les workers
+    qui reçoivent un chemin de local_path())."""
+    return sqlite3.connect(_uri(path, immutable), uri=True, check_same_thread=False)
+
+
+def _copy_stream(opener, dest):
+    with opener() as src, open(dest, 'wb') as out:
+        shutil.copyfileobj(src, out, _COPY_CHUNK)
+
+
+class DbStore:
+    def __init__(self, spool_root=None):
+        self.spool_root = spool_root
+        self._conns = {}     # clé -> sqlite3.Connection (ou None si illisible)
+        self._paths = {}     # clé -> chemin local de la base
+        self._tmp = None
+        self._lock = threading.RLock()
+
+    def _tmp_dir(self):
+        if self._tmp is None:
+            if self.spool_root:
+                os.makedirs(self.spool_root, exist_ok=True)
+            self._tmp = tempfile.mkdtemp(prefix='afap_db_', dir=self.spool_root)
+        return self._tmp
+
+    def _materialize(self, key, name, opener, sidecars):
+        slot = os.path.join(self._tmp_dir(), f"{len(self._paths):06d}")
+        os.makedirs(slot)
+        dest = os.path.join(slot, os.path.basename(name) or 'base.db')
+        _copy_stream(opener, dest)
+        for suffix, side_opener in sidecars:
+            try:
+                _copy_stream(side_opener, dest + suffix)
+            except Exception as e:
+                logging.debug(f"Compagnon {suffix} non copié pour {name}: {e}")
+        return dest
+
+    def local_path(self, key, os_path=None, name=None, opener=None, sidecars=()):
+        """Chemin local lisible de la base (en place ou matérialisée), ou None.
+        `sidecars` : [(suffixe, ouvreur)] des -wal / -shm d'un membre d'archive."""
+        with self._lock:
+            if key in self._paths:
+                return self._paths[key]
+            path = None
+            try:
+                if os_path is not None:
+                    wal = os_path + '-wal'
+                    if os.path.isfile(wal) and os.path.getsize(wal) > 0:
+                        sidecars = [(s, (lambda p=os_path + s: open(p, 'rb')))
+                                    for s in _SIDECARS if os.path.isfile(os_path + s)]
+                        path = self._materialize(key, os_path, lambda: open(os_path, 'rb'), sidecars)
+                    else:
+                        path = os_path
+                else:
+                    path = self._materialize(key, name, opener, sidecars)
+            except Exception as e:
+                logging.warning(f"Base SQLite non matérialisée {name or os_path}: {e}")
+            self._paths[key] = path
+            return path
+
+    def connect(self, key, os_path=None, name=None, opener=None, sidecars=()):
+        """Connexion partagée (lecture seule) à la base, ou None si illisible."""
+        with self._lock:
+            if key in self._conns:
+                return self._conns[key]
+            path = self.local_path(key, os_path, name, opener, sidecars)
+            conn = None
+            if path:
+                try:
+                    conn = connect_readonly(path, immutable=(path == os_path))
+                except sqlite3.Error as e:
+                    logging.warning(f"Base SQLite illisible {name or os_path}: {e}")
+            self._conns[key] = conn
+            return conn
+
+    def close_all(self):
+        with self._lock:
+            conns, self._conns, self._paths = self._conns, {}, {}
+            tmp, self._tmp = self._tmp, None
+        for conn in conns.values():
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+DB_STORE = DbStore()
@@ -156,6 +156,389 @@ def main():
             for _d in (src2, oP, oS):
                 shutil.rmtree(_d, ignore_errors=True)
 
+        # 8) 7z SOLIDE (v2.4) : membres et contenus identiques au dossier
+        try:
+            import py7zr
+        except ImportError:
+            py7zr = None
+        if py7zr is not None:
+            import core_scanner as _cs
+            arc_dir = tempfile.mkdtemp(prefix="afap_7z_")
+            try:
+                arc = os.path.join(arc_dir, "src.7z")
+                with py7zr.SevenZipFile(arc, 'w') as z:
+                    z.writeall(src, '')
+                _cs.configure(solid_7z=True)
+                got = {e.rel_path.replace('\\', '/'): e.open_binary().read()
+                       for e in _cs.iter_entries(arc, include_ext=('.log',))}
+                ref = {e.rel_path.replace('\\', '/'): e.open_binary().read()
+                       for e in _cs.iter_entries(src, include_ext=('.log',))}
+                check("7z solide == dossier", got == ref, f"{sorted(got)} vs {sorted(ref)}")
+            finally:
+                _cs.configure(solid_7z=False)
+                _cs.end_run()
+                shutil.rmtree(arc_dir, ignore_errors=True)
+
+        # 9) JOURNAUX COMPRESSES : x.log.gz -> x.log.gz!/x.log ; tronque -> partiel
+        import gzip
+        import core_scanner as _cs
+        gz_dir = tempfile.mkdtemp(prefix="afap_gz_")
+        try:
+            big = "".join(f"ligne {i} {APPLOG[:60]}\n" for i in range(20000))
+            with gzip.open(os.path.join(gz_dir, "x.log.gz"), "wt", encoding="utf-8") as f:
+                f.write(big)
+            blob = gzip.compress(big.encode("utf-8"))
+            with open(os.path.join(gz_dir, "cut.log.gz"), "wb") as f:
+                f.write(blob[:len(blob) // 2])
+            got = {e.rel_path.replace('\\', '/'): e for e in _cs.iter_entries(gz_dir, include_ext=('.log',))}
+            check("log .gz nomme x.log.gz!/x.log", "x.log.gz!/x.log" in got, str(sorted(got)))
+            check("log .gz decompresse",
+                  "x.log.gz!/x.log" in got and _cs.read_text_cached(got["x.log.gz!/x.log"]) == big)
+            cut = _cs.read_text_cached(got["cut.log.gz!/cut.log"]) if "cut.log.gz!/cut.log" in got else ""
+            check("log .gz tronque -> contenu partiel", cut and big.startswith(cut), f"{len(cut)} car.")
+            gz = got.get("x.log.gz!/x.log")
+            check("log .gz (taille inconnue) hors tampon partage",
+                  gz is not None and gz.size is None and not _cs.shares_buffer(gz))
+        finally:
+            _cs.end_run()
+            shutil.rmtree(gz_dir, ignore_errors=True)
+
+        # 10) TAMPON PARTAGE : brut libere apres decodage hors scan binaire
+        try:
+            e = next(_cs.iter_entries(src, include_ext=('.log',)))
+            k = 'bytes:' + _cs._cache_key(e)
+            _cs.configure(binary_scan=False)
+            _cs.read_text_cached(e)
+            check("brut libere sans scan VIN", k not in _cs._text_cache())
+            _cs.end_run()
+            _cs.configure(binary_scan=True)
+            _cs.read_text_cached(e)
+            kept = k in _cs._text_cache()
+            _cs.end_binary_scan()
+            check("brut garde jusqu'au scan VIN", kept and k not in _cs._text_cache())
+        finally:
+            _cs.end_run()
+
+        # 11) CARVING SQLITE : lignes supprimees (secure_delete=0) recuperees
+        import sqlite3
+        from extract_sqlite_carved import extract_sqlite_carved
+        db_dir = tempfile.mkdtemp(prefix="afap_carve_")
+        db_out = tempfile.mkdtemp(prefix="afap_carve_out_")
+        try:
+            conn = sqlite3.connect(os.path.join(db_dir, "demo.db"))
+            conn.execute("PRAGMA secure_delete=0")
+            conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, vin TEXT, km INTEGER)")
+            conn.executemany("INSERT INTO t (vin, km) VALUES (?, ?)",
+                             [(f"WVWZZZ1JZXW{i:06d}", 1000 + i) for i in range(200)])
+            conn.commit()
+            conn.execute("DELETE FROM t WHERE id % 10 = 0")
+            conn.commit()
+            conn.close()
+            carved = extract_sqlite_carved(db_dir, db_out)
+            got = {r[6] for r in carved if r[1] == 't'}
+            inserted = {f'{{"id": null, "vin": "WVWZZZ1JZXW{i:06d}", "km": {1000 + i}}}' for i in range(200)}
+            deleted = {f'{{"id": null, "vin": "WVWZZZ1JZXW{i:06d}", "km": {1000 + i}}}' for i in range(9, 200, 10)}
+            check("carving lignes supprimees", len(deleted & got) * 2 >= len(deleted),
+                  f"{len(deleted & got)}/{len(deleted)}")
+            # residus de pages reequilibrees admis, mais aucune ligne inventee
+            check("carving sans faux positif", got and got <= inserted, str(sorted(got - inserted)[:3]))
+        finally:
+            _cs.end_run()
+            shutil.rmtree(db_dir, ignore_errors=True)
+            shutil.rmtree(db_out, ignore_errors=True)
+
+        # 12) WAL : checksum_ok de chaque frame (NumPy et Python pur identiques)
+        import sqlite_format
+        wal_dir = tempfile.mkdtemp(prefix="afap_wal_")
+        try:
+            db = os.path.join(wal_dir, "w.db")
+            conn = sqlite3.connect(db)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA wal_autocheckpoint=0")
+            conn.execute("CREATE TABLE t (x TEXT)")
+            for i in range(30):
+                conn.execute("INSERT INTO t VALUES (?)", (APPLOG[:200] * (i % 5 + 1),))
+                conn.commit()
+            with open(db + "-wal", "rb") as f:
+                buf = bytearray(f.read())
+            conn.close()
+            frames = sqlite_format.wal_frames(buf)
+            check("wal frames valides", frames and all(fr['checksum_ok'] and fr['committed'] for fr in frames),
+                  f"{len(frames)} frames")
+            bad = frames[len(frames) // 2]
+            buf[bad['offset'] + 24 + 100] ^= 0xFF          # octet de la page de la frame
+            frames = sqlite_format.wal_frames(buf)
+            check("wal frame alteree detectee",
+                  [fr['index'] for fr in frames if not fr['checksum_ok']] == [bad['index']])
+            _np = sqlite_format._HAS_NUMPY
+            sqlite_format._HAS_NUMPY = False
+            try:
+                pure = sqlite_format.wal_frames(buf)
+            finally:
+                sqlite_format._HAS_NUMPY = _np
+            check("wal checksum numpy == python", pure == frames)
+        finally:
+            shutil.rmtree(wal_dir, ignore_errors=True)
+
+        # 13) IMAGE EXT4 (mke2fs -d) : membres et contenus identiques au dossier
+        import subprocess
+        mke2fs = shutil.which("mke2fs") or shutil.which("mkfs.ext4")
+        if mke2fs:
+            img_dir = tempfile.mkdtemp(prefix="afap_img_")
+            try:
+                tree = os.path.join(img_dir, "tree")
+                shutil.copytree(src, tree)
+                with open(os.path.join(tree, "AppLog", "gros.bin"), "wb") as f:
+                    f.write(bytes(range(256)) * 3000 + b"fin")          # plusieurs blocs
+                img = os.path.join(img_dir, "src.img")
+                subprocess.run([mke2fs, "-q", "-F", "-t", "ext4", "-d", tree, img, "8M"],
+                               check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                got = {e.rel_path.replace('\\', '/'): e.open_binary().read()
+                       for e in _cs.iter_entries(img) if not e.rel_path.startswith('lost+found')}
+                ref = {e.rel_path.replace('\\', '/'): e.open_binary().read()
+                       for e in _cs.iter_entries(tree)}
+                check("image ext4 == dossier", got == ref, f"{sorted(got)} vs {sorted(ref)}")
+            finally:
+                _cs.end_run()
+                shutil.rmtree(img_dir, ignore_errors=True)
+
+        # 14) TAR + WANTS : seuls les membres voulus sont spooles
+        import tarfile
+        import fs_provider
+        tar_dir = tempfile.mkdtemp(prefix="afap_tar_")
+        try:
+            tree = os.path.join(tar_dir, "tree")
+            shutil.copytree(src, tree)
+            os.makedirs(os.path.join(tree, "DCIM"))
+            with open(os.path.join(tree, "DCIM", "photo.jpg"), "wb") as f:
+                f.write(b"\xff\xd8" + bytes(50000))
+            arc = os.path.join(tar_dir, "src.tar.gz")
+            with tarfile.open(arc, "w:gz") as tf:
+                tf.add(tree, arcname="")
+            _cs.configure(source_wants=[{'include_ext': ('.log',)}])
+            got = {e.rel_path.replace('\\', '/'): e.open_binary().read()
+                   for e in _cs.iter_entries(arc, include_ext=('.log',))}
+            ref = {e.rel_path.replace('\\', '/'): e.open_binary().read()
+                   for e in _cs.iter_entries(src, include_ext=('.log',))}
+            check("tar.gz == dossier", got == ref, f"{sorted(got)} vs {sorted(ref)}")
+            spool = fs_provider.tar_source(arc).spool_dir
+            spooled = [f for _r, _d, fs in os.walk(spool) for f in fs]
+            check("tar : membres voulus seuls spooles", spooled == ["2026-01-28 224951-1.log"], str(spooled))
+        finally:
+            _cs.configure(source_wants=None)
+            _cs.end_run()
+            shutil.rmtree(tar_dir, ignore_errors=True)
+
+        # 15) ORDRE PHYSIQUE : CSV des VIN identique avec et sans --physical-order
+        from extract_vins import extract_all_vins
+        vin_dir = tempfile.mkdtemp(prefix="afap_vin_")
+        try:
+            tree = os.path.join(vin_dir, "tree")
+            for i in range(12):
+                d = os.path.join(tree, f"d{i % 3}")
+                os.makedirs(d, exist_ok=True)
+                with open(os.path.join(d, f"f{i}.bin"), "wb") as f:
+                    f.write(bytes(i * 997 % 4096) + f"VIN=WVWZZZ1JZXW{i:06d};".encode() + bytes(64))
+            csvs = []
+            for phys in (False, True):
+                o = os.path.join(vin_dir, f"out{int(phys)}")
+                os.makedirs(o)
+                _cs.configure(physical_order=phys)
+                extract_all_vins(tree, o)
+                _cs.end_run()
+                with open(os.path.join(o, "vins_extraits.csv"), encoding="utf-8-sig") as f:
+                    csvs.append(f.read())
+            check("VIN ordre physique == ordre listing", csvs[0] == csvs[1] and csvs[0].count("WVWZZZ") == 12)
+        finally:
+            _cs.configure(physical_order=False)
+            shutil.rmtree(vin_dir, ignore_errors=True)
+
+        # 16) CACHE TEXTE : spill disque sans collision, comptage du niveau zlib
+        import sys as _sys
+        from text_cache import TextCache
+        spill_dir = tempfile.mkdtemp(prefix="afap_spill_")
+        try:
+            vals = {f"k{i}": (APPLOG * (i % 4 + 1)) + str(i) for i in range(40)}
+            tc = TextCache(8 * 1024, compress=True, spill=True, spill_root=spill_dir)
+            for k, v in vals.items():
+                tc.put(k, v)
+            for k in list(vals)[:10]:                     # remontes puis re-evinces
+                tc.get(k)
+            for k, v in vals.items():
+                tc.put(k, v)
+            lost = next(iter(tc._disk))                   # fichier de spill disparu
+            os.remove(tc._disk[lost])
+            lost_ok = tc.get(lost) is None
+            del vals[lost]
+            for i in range(40, 60):                       # nouveaux spills apres la perte
+                vals[f"k{i}"] = APPLOG * 3 + str(i)
+                tc.put(f"k{i}", vals[f"k{i}"])
+            check("cache texte : spill relu intact",
+                  lost_ok and all(tc.get(k) == v for k, v in vals.items()))
+            check("cache texte : octets memoire exacts",
+                  tc.memory_bytes == sum(_sys.getsizeof(v) for v in tc._hot.values())
+                  + sum(len(b) for b in tc._warm.values()))
+            tc.clear()
+        finally:
+            shutil.rmtree(spill_dir, ignore_errors=True)
+
+        # 17) INDEX DE HACHES (mmap) : construction, recherche, fermeture en fin de run
+        import hashlib
+        import random
+        from hash_index import build_index, HashIndex
+        hix_dir = tempfile.mkdtemp(prefix="afap_hix_")
+        try:
+            known = os.path.join(src, "AppLog", "ser_20260128224951", "2026-01-28 224951-1.log")
+            md5_known = hashlib.md5(open(known, "rb").read()).hexdigest()
+            rnd = random.Random(7)
+            others = [f"{rnd.getrandbits(128):032x}" for _ in range(500)]
+            lst = os.path.join(hix_dir, "liste.txt")
+            with open(lst, "w", encoding="utf-8") as f:
+                f.write(f"{md5_known},{os.path.getsize(known)}\n")
+                f.writelines(f"{h},{1000 + i}\n" for i, h in enumerate(others + others[:50]))
+            hix = os.path.join(hix_dir, "known.afaphix")
+            n = build_index([lst], hix)
+            idx = _cs.load_skiplist(hix)
+            check("index haches : MD5 distincts", n == len(idx) == 501, f"{n}")
+            check("index haches : recherche",
+                  isinstance(idx, HashIndex) and all(h in idx for h in others)
+                  and f"{rnd.getrandbits(128):032x}" not in idx)
+            check("index haches : should_skip par taille + MD5",
+                  _cs.should_skip(known, idx) and not _cs.should_skip(lst, idx))
+            _cs.end_run()
+            check("index haches : ferme par end_run", idx._mm.closed and idx._f.closed)
+        finally:
+            _cs.end_run()
+            shutil.rmtree(hix_dir, ignore_errors=True)
+
+        # 18) LISTING COLONNAIRE : tuples historiques restitues a l'identique
+        from dir_listing import DirListing
+        root = os.path.join(os.sep, "saisie")
+        rows = [(os.path.join(root, rel), rel, mtime, size, ino, dev) for rel, mtime, size, ino, dev in (
+            ("a.LOG", 1700000000.5, 12, 5, 2049),
+            (os.path.join("Scan", "données", "x.db"), None, 0, 2 ** 63, 1),
+            (os.path.join("Scan", "données", "sans_ext"), 1.0, 2 ** 40, 7, 1),
+            (os.path.join("Scan", "y.log"), 2.0, 3, 8, 1))]
+        lst = DirListing.from_rows(root, rows)
+        check("listing colonnaire == tuples", list(lst) == rows and len(lst.dirs) == 3, str(list(lst)))
+        ids = lst.ext_ids_for(('.log', '.zip'))
+        check("listing colonnaire : filtre extension",
+              [lst.rel(i) for i in range(len(lst)) if lst.ext_ids[i] in ids] == ["a.LOG", rows[3][1]])
+
+        # 19) MANIFESTE PERSISTANT : reutilise, non reecrit si inchange, stat actualise
+        from source_manifest import SourceManifest
+        man_dir = tempfile.mkdtemp(prefix="afap_man_")
+        try:
+            tree = os.path.join(man_dir, "scelle")
+            shutil.copytree(src, tree)
+            log = os.path.join(tree, "AppLog", "ser_20260128224951", "2026-01-28 224951-1.log")
+            _cs.configure(manifest=True, manifest_dir=os.path.join(man_dir, "cache"))
+            list(_cs.iter_entries(tree))
+            _cs.end_run()
+            mpath = SourceManifest(tree, os.path.join(man_dir, "cache")).path
+            written = os.stat(mpath).st_mtime_ns
+            list(_cs.iter_entries(tree))
+            _cs.end_run()
+            check("manifeste inchange non reecrit", os.stat(mpath).st_mtime_ns == written)
+            parent = os.stat(os.path.dirname(log))
+            with open(log, "a", encoding="utf-8") as f:                  # reecrit sur place
+                f.write("ajout\n")
+            os.utime(os.path.dirname(log), ns=(parent.st_atime_ns, parent.st_mtime_ns))
+            sizes = {e.rel_path: e.size for e in _cs.iter_entries(tree)}
+            check("manifeste : taille actualisee", list(sizes.values()) == [os.path.getsize(log)], str(sizes))
+        finally:
+            _cs.end_run()
+            _cs.configure(manifest=False, manifest_dir=None)
+            shutil.rmtree(man_dir, ignore_errors=True)
+
+        # 20) ZIP : handles du pool rendus meme sans close() des flux lus
+        import io
+        import zipfile
+        zip_dir = tempfile.mkdtemp(prefix="afap_zip_")
+        try:
+            arc = os.path.join(zip_dir, "src.zip")
+            with zipfile.ZipFile(arc, "w") as z:
+                for i in range(10):
+                    z.writestr(f"AppLog/l{i}.log", APPLOG)
+            datas = [e.open_binary().read() for e in _cs.iter_entries(arc)]      # jamais fermes
+            pool = fs_provider.ARCHIVE_POOL
+            key = next(iter(pool._handles))
+            check("zip : handles rendus au pool",
+                  len(datas) == 10 and len(pool._idle.get(key, ())) == len(pool._handles[key]) <= 4,
+                  f"{len(pool._idle.get(key, ()))}/{len(pool._handles[key])}")
+        finally:
+            _cs.end_run()
+            shutil.rmtree(zip_dir, ignore_errors=True)
+
+        # 21) INDEX DE CHEMINS : glob indexe == filtre complet ; repli VciLog
+        from utils import get_tablet_info
+        idx_dir = tempfile.mkdtemp(prefix="afap_idx_")
+        try:
+            for rel in ("Scan/CloudEData/a/build.prop", "Scan/CloudEData/b/build.prop.bak",
+                        "Scan/CloudEData/build.properties", "Scan/other/build.prop",
+                        "Scan/CloudEData/c/xbuild.prop", ".VciLog/v1.log"):
+                p = os.path.join(idx_dir, *rel.split("/"))
+                os.makedirs(os.path.dirname(p), exist_ok=True)
+                with open(p, "w", encoding="utf-8") as f:
+                    f.write(" Sn: VCI0000042\n SubProduct: MaxiIM\n" if rel.endswith(".log") else "x=1\n")
+            got = sorted(e.rel_path.replace('\\', '/') for e in _cs.iter_entries(idx_dir, glob='*/build.prop*'))
+            import fnmatch
+            ref = sorted(r for r in (e.rel_path.replace('\\', '/') for e in _cs.iter_entries(idx_dir))
+                         if fnmatch.fnmatchcase(r, '*/build.prop*'))
+            check("index chemins : glob == filtre complet", got == ref and len(got) == 4, str(got))
+            info = get_tablet_info(idx_dir)
+            check("tablette : serie lue dans .VciLog", info['serial'] == 'VCI0000042', info['serial'])
+            for rel in ("Dcim/Camera/a.jpg", "x/dCIM/b.jpg", "DCIMx/c.jpg"):
+                p = os.path.join(idx_dir, *rel.split("/"))
+                os.makedirs(os.path.dirname(p), exist_ok=True)
+                open(p, "wb").close()
+            _cs.end_run()
+            got = sorted(e.rel_path.replace('\\', '/') for e in _cs.iter_entries(idx_dir, under_icase='DCIM'))
+            check("index chemins : DCIM toute casse", got == ["Dcim/Camera/a.jpg", "x/dCIM/b.jpg"], str(got))
+        finally:
+            _cs.end_run()
+            shutil.rmtree(idx_dir, ignore_errors=True)
+
+        # 22) SQLITE-ALL : 'a_b/x.db' et 'a/b_x.db' -> CSV distincts
+        import sqlite3
+        from export_sqlite_tables import export_sqlite_tables, EXPORT_SUBDIR
+        sq_dir = tempfile.mkdtemp(prefix="afap_sqall_")
+        try:
+            srcq, outq = os.path.join(sq_dir, "src"), os.path.join(sq_dir, "out")
+            for i, rel in enumerate(("a_b/x.db", "a/b_x.db")):
+                p = os.path.join(srcq, *rel.split("/"))
+                os.makedirs(os.path.dirname(p), exist_ok=True)
+                conn = sqlite3.connect(p)
+                conn.execute("CREATE TABLE t (v INTEGER)")
+                conn.execute("INSERT INTO t VALUES (?)", (i,))
+                conn.commit(); conn.close()
+            os.makedirs(outq)
+            export_sqlite_tables(srcq, outq, sqlite_all=True)
+            csvs = sorted(os.listdir(os.path.join(outq, EXPORT_SUBDIR)))
+            check("sqlite-all : un CSV par base", len(csvs) == 2, str(csvs))
+        finally:
+            _cs.end_run()
+            shutil.rmtree(sq_dir, ignore_errors=True)
+
+        # 23) ZIP IMBRIQUES : support ferme a l'eviction (apres le dernier flux ouvert)
+        import io
+        import zipfile
+        zips = {}
+        for k in ("a", "b"):
+            buf = io.BytesIO()
+            with zipfile.ZipFile(buf, "w") as zf:
+                zf.writestr("m.txt", k * 1000)
+            zips[k] = io.BytesIO(buf.getvalue())
+        pool = fs_provider.NestedArchivePool(max_open=1)
+        stream = pool.open_member("a", lambda: zips["a"], "m.txt")
+        pool.members("b", lambda: zips["b"])
+        ok_open = not zips["a"].closed and stream.read() == b"a" * 1000
+        stream.close()
+        check("zip imbrique : support evince ferme apres le flux",
+              ok_open and zips["a"].closed and not zips["b"].closed)
+        pool.close_all()
+        check("zip imbrique : close_all ferme les supports", zips["b"].closed)
+
         # bilan
         n_ok = sum(1 for _, ok, _ in RESULTS if ok)
         n = len(RESULTS)
@@ -0,0 +1,164 @@
+# text_cache.py — AFAP
+# Auteur : Vincent Chapeau — Teel Technologies Canada (vincent.chapeau@teeltechcanada.com)
+#
+# Cache TEXTE du run (core_scanner.read_text_cached / read_bytes_cached), à trois
+# niveaux ; les valeurs sont du texte (str) ou le contenu brut (bytes) :
+#   1. mémoire, valeur telle quelle          — comptage en OCTETS réels (sys.getsizeof)
+#   2. mémoire, valeur compressée zlib        — un logcat se compresse ~10:1
+#   3. disque, fichiers zlib dans un dossier temporaire local (spill)
+# Éviction LRU : le texte le moins récemment lu descend d'un niveau (1 -> 2 -> 3)
+# au lieu d'être perdu ; une lecture le remonte au niveau 1. Ainsi, même une
+# extraction plus grosse que la RAM n'est lue qu'UNE fois sur le support saisi.
+#
+# Budget mémoire (niveaux 1 + 2) : --cache-mb (CLI) / champ du GUI.
+# Le dossier de spill est supprimé par clear() (core_scanner.end_run()).
+
+import os
+import sys
+import zlib
+import shutil
+import logging
+import tempfile
+import itertools
+import threading
+from collections import OrderedDict
+
+
+class TextCache:
+    def __init__(self, budget_bytes, compress=True, spill=True, spill_root=None):
+        self.budget = budget_bytes
+        self.compress = compress
+        self.spill = spill
+        self.spill_root = spill_root
+        self._hot = OrderedDict()    # clé -> str ou bytes
+        self._warm = OrderedDict()   # clé -> bytes zlib
+        self._disk = {}              # clé -> chemin du fichier zlib
+        self._hot_bytes = 0
+        self._warm_bytes = 0
+        self._spill_dir = None
+        self._spill_seq = itertools.count()   # noms de spill jamais réutilisés
+        self._lock = threading.RLock()
+        self.stats = {'hit': 0, 'hit_zlib': 0, 'hit_disk': 0, 'miss': 0}
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._hot or key in self._warm or key in self._disk
+
+    @property
+    def memory_bytes(self):
+        return self._hot_bytes + self._warm_bytes
+
+    def get(self, key):
+        """Texte en cache (remonté au niveau 1), ou None."""
+        with self._lock:
+            txt = self._hot.get(key)
+            if txt is not None:
+                self._hot.move_to_end(key)
+                self.stats['hit'] += 1
+                return txt
+            blob = self._warm.pop(key, None)
+            if blob is not None:
+                self._warm_bytes -= len(blob)
+                self.stats['hit_zlib'] += 1
+            else:
+                path = self._disk.get(key)
+                if path is None:
+                    self.stats['miss'] += 1
+                    return None
+                try:
+                    with open(path, 'rb') as f:
+                        blob = f.read()
+                except OSError:
+                    del self._disk[key]
+                    self.stats['miss'] += 1
+                    return None
+                self.stats['hit_disk'] += 1
+            raw = zlib.decompress(blob)
+            txt = raw[1:].decode('utf-8', 'surrogatepass') if raw[:1] == b'S' else raw[1:]
+            self._put_hot(key, txt)
+            return txt
+
+    def put(self, key, txt):
+        with self._lock:
+            if key in self._hot:
+                return
+            stale = self._warm.pop(key, None)   # copie compressée devenue inutile
+            if stale is not None:
+                self._warm_bytes -= len(stale)
+            self._put_hot(key, txt)
+
+    def discard(self, key):
+        """Retire `key` de tous les niveaux (valeur devenue inutile au run)."""
+        with self._lock:
+            txt = self._hot.pop(key, None)
+            if txt is not None:
+                self._hot_bytes -= sys.getsizeof(txt)
+            blob = self._warm.pop(key, None)
+            if blob is not None:
+                self._warm_bytes -= len(blob)
+            path = self._disk.pop(key, None)
+            if path is not None:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+    def keys(self):
+        """Clés présentes (instantané, tous niveaux)."""
+        with self._lock:
+            return list(self._hot) + list(self._warm) + list(self._disk)
+
+    def _put_hot(self, key, txt):
+        self._hot[key] = txt
+        self._hot_bytes += sys.getsizeof(txt)
+        self._evict()
+
+    def _evict(self):
+        # Niveau 1 -> 2 (ou 3) jusqu'à respecter le budget, puis niveau 2 -> 3.
+        while self._hot_bytes + self._warm_bytes > self.budget and self._hot:
+            key, txt = self._hot.popitem(last=False)
+            self._hot_bytes -= sys.getsizeof(txt)
+            if key in self._disk:
+                continue                     # copie disque déjà présente
+            if not (self.compress or self.spill):
+                continue
+            raw = b'S' + txt.encode('utf-8', 'surrogatepass') if isinstance(txt, str) else b'B' + txt
+            blob = zlib.compress(raw, 1)
+            if self.compress:
+                self._warm[key] = blob
+                self._warm_bytes += len(blob)
+            else:
+                self._spill_one(key, blob)
+        while self._hot_bytes + self._warm_bytes > self.budget and self._warm:
+            key, blob = self._warm.popitem(last=False)
+            self._warm_bytes -= len(blob)
+            self._spill_one(key, blob)
+
+    def _spill_one(self, key, blob):
+        if not self.spill:
+            return
+        try:
+            if self._spill_dir is None:
+                if self.spill_root:
+                    os.makedirs(self.spill_root, exist_ok=True)
+                self._spill_dir = tempfile.mkdtemp(prefix='afap_textcache_', dir=self.spill_root)
+            path = os.path.join(self._spill_dir, f"{next(self._spill_seq):08d}.z")
+            with open(path, 'wb') as f:
+                f.write(blob)
+            self._disk[key] = path
+        except OSError as e:
+            logging.warning(f"Cache texte : spill disque impossible ({e}) -> désactivé")
+            self.spill = False
+
+    def clear(self):
+        with self._lock:
+            if any(self.stats.values()):
+                logging.info(f"Cache texte : {self.stats}")
+            self._hot.clear()
+            self._warm.clear()
+            self._disk.clear()
+            self._hot_bytes = self._warm_bytes = 0
+            self.stats = dict.fromkeys(self.stats, 0)
+            if self._spill_dir:
+                shutil.rmtree(self._spill_dir, ignore_errors=True)
+                self._spill_dir = None
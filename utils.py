@@ -1,8 +1,11 @@
 # utils.py — AFAP v2.0.0
 # Auteur : Vincent Chapeau — Teel Technologies Canada (vincent.chapeau@teeltechcanada.com)
-import logging, csv, os, re, json
+import logging, csv, os, re, json, itertools
 from core_scanner import iter_entries, iter_text_lines_entry
 
+WANTS = [{'suffix': 'build.prop', 'glob': '*/build.prop*', 'under': '/Scan/CloudEData/'},   # get_tablet_info
+         {'include_ext': ('.log',), 'under': '/.VciLog/'}]
+
 def setup_logging(export_dir):
     log_file = os.path.join(export_dir, 'run_analysis.log')
     for handler in logging.root.handlers[:]:
@@ -30,7 +33,11 @@ def get_tablet_info(src_path: str) -> dict:
     serial_re = re.compile(r'ro\.serialno=([A-Z0-9]+)')
     model_re  = re.compile(r'ro\.product\.model=(.+)')
     try:
-        for entry in iter_entries(src_path):
+        # build.prop / CloudEData, puis en dernier recours les en-têtes VciLog
+        entries = itertools.chain(
+            iter_entries(src_path, suffix='build.prop', glob='*/build.prop*', under='/Scan/CloudEData/'),
+            iter_entries(src_path, include_ext=('.log',), under='/.VciLog/'))
+        for entry in entries:
             rel = entry.rel_path.replace('\\', '/')
             if rel.endswith('build.prop') or '/build.prop' in rel:
                 for line in iter_text_lines_entry(entry):